@@ -0,0 +1,68 @@
+"""Throughput of /api/boards/bulk in rows per second
+
+Imports synthetic board libraries as JSON, NDJSON and CSV into a scratch
+SQLite database, comparing with the one-request-per-board POST /api/boards
+path for the smallest size. Duplicate checks are off here (the synthetic
+rows overlap); bench_library.py measures them.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_bulk_import.py
+"""
+import os
+import sys
+import csv
+import io
+import json
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import make_app, synthetic_rows
+from src.models.board import Board
+
+SIZES = [1000, 10000, 50000]
+FIELDS = ['name', 'width', 'height', 'mounting_holes_x', 'mounting_holes_y',
+          'hole_spacing_x', 'hole_spacing_y', 'hole_diameter', 'standoff_height']
+
+
+def encode(rows, fmt):
+    if fmt == 'json':
+        return json.dumps(rows), 'application/json'
+    if fmt == 'ndjson':
+        return '\n'.join(json.dumps(row) for row in rows), 'application/x-ndjson'
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue(), 'text/csv'
+
+
+def main():
+    with tempfile.TemporaryDirectory() as scratch:
+        app = make_app(os.path.join(scratch, 'bench.db'))
+        client = app.test_client()
+
+        rows = synthetic_rows(SIZES[0])
+        start = time.perf_counter()
+        for row in rows:
+            client.post('/api/boards', json={**row, 'allow_duplicate': True})
+        elapsed = time.perf_counter() - start
+        print(f"{'POST /boards x1':<16} {len(rows):>7} rows {len(rows) / elapsed:>10.0f} rows/s")
+
+        for size in SIZES:
+            rows = synthetic_rows(size, seed=size, invalid_ratio=0.01)
+            for fmt in ('json', 'ndjson', 'csv'):
+                body, content_type = encode(rows, fmt)
+                start = time.perf_counter()
+                summary = client.post('/api/boards/bulk?duplicates=allow', data=body, content_type=content_type).json
+                elapsed = time.perf_counter() - start
+                assert summary['inserted'] + summary['failed'] == size, summary
+                print(f"{'bulk ' + fmt:<16} {size:>7} rows {size / elapsed:>10.0f} rows/s "
+                      f"({summary['failed']} rejected)")
+
+        with app.app_context():
+            print(f"\nboards in scratch database: {Board.query.count()}")
+
+
+if __name__ == '__main__':
+    main()
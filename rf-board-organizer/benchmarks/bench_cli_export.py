@@ -0,0 +1,85 @@
+"""Batch export of many layouts: the export CLI against one HTTP request per layout
+
+Seeds a scratch database with layouts of 12 boards each, then times
+`python -m src.cli export` from cold, again with nothing changed (every
+file skipped), after a standoff parameter change (only standoffs
+rebuilt), and the same layouts fetched one by one from
+/api/layouts/<id>/fabrication.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_cli_export.py [--layouts 200]
+"""
+import os
+import sys
+import argparse
+import contextlib
+import io
+import random
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from common import make_app, synthetic_rows
+from src import cli
+from src.models.board import Board, Layout, LayoutPlacement, db
+
+BOARDS_PER_LAYOUT = 12
+
+
+def seed(app, count):
+    rng = random.Random(0)
+    with app.app_context():
+        board_ids = db.session.scalars(insert(Board).returning(Board.id), synthetic_rows(200)).all()
+        layouts = [Layout(name=f'Rack {i}', base_width=400, base_height=300) for i in range(count)]
+        db.session.add_all(layouts)
+        db.session.flush()
+        db.session.execute(insert(LayoutPlacement), [
+            {'layout_id': layout.id, 'board_id': rng.choice(board_ids), 'x': rng.uniform(0, 300),
+             'y': rng.uniform(0, 200), 'rotation': rng.choice([0, 90])}
+            for layout in layouts for _ in range(BOARDS_PER_LAYOUT)
+        ])
+        db.session.commit()
+        return [layout.id for layout in layouts]
+
+
+def timed_export(label, argv):
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        status = cli.main(argv)
+    elapsed = time.perf_counter() - start
+    assert status == 0, output.getvalue()
+    print(f'{label:<32} {elapsed:>8.2f} s   {output.getvalue().splitlines()[-1].strip()}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--layouts', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, 'export.db')
+        app = make_app(path)
+        layout_ids = seed(app, args.layouts)
+        base = ['export', '--out', os.path.join(scratch, 'out'), '--database-url', f'sqlite:///{path}']
+
+        print(f'{args.layouts} layouts x {BOARDS_PER_LAYOUT} boards, {os.cpu_count()} CPUs\n')
+        timed_export('CLI, cold', base)
+        timed_export('CLI, nothing changed', base)
+        timed_export('CLI, standoff segments changed', base + ['--segments', '48'])
+        timed_export('CLI, cold, 1 worker', base + ['--force', '--workers', '1'])
+
+        client = app.test_client()
+        start = time.perf_counter()
+        size = 0
+        for layout_id in layout_ids:
+            response = client.get(f'/api/layouts/{layout_id}/fabrication')
+            size += len(response.get_data())
+        elapsed = time.perf_counter() - start
+        print(f"{'HTTP bundle per layout':<32} {elapsed:>8.2f} s   {len(layout_ids) / elapsed:.1f} layouts/s, "
+              f'{size / 1e6:.1f} MB zipped')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Concurrent mixed-load test: p50/p99 latency and throughput under many clients
+
+Each client thread runs a mix of board listing, board creation and deletion,
+layout reads and whole-layout saves over its own HTTP connection. Without
+--url the script serves a scratch SQLite database from a threaded server,
+once with SQLAlchemy defaults and once with the tuned storage settings
+(WAL, busy timeout, pragmas, pool sizing); with --url it loads an already
+running server instead.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_concurrent_load.py [--threads 16] [--requests 200] [--url http://host:port]
+"""
+import os
+import sys
+import argparse
+import http.client
+import json
+import logging
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from werkzeug.serving import make_server
+
+from common import make_app, synthetic_rows
+
+SEED_BOARDS = 500
+SHARED_LAYOUTS = 4
+BOARDS_PER_LAYOUT = 40
+
+# Operation weights in the mix
+MIX = [
+    ('list_boards', 35),
+    ('create_board', 20),
+    ('delete_board', 10),
+    ('get_layout', 15),
+    ('save_layout', 20),
+]
+
+
+class Client:
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+
+    def request(self, method, path, payload=None):
+        body = json.dumps(payload) if payload is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        return response.status, data
+
+    def close(self):
+        self.connection.close()
+
+
+def seed(base_url):
+    """Create the shared board library and layouts through the API"""
+    client = Client(base_url)
+    rows = synthetic_rows(SEED_BOARDS)
+    status, _ = client.request('POST', '/api/boards/bulk', rows)
+    assert status == 200, status
+    _, data = client.request('GET', '/api/boards?fields=id')
+    board_ids = [board['id'] for board in json.loads(data)]
+    layout_ids = []
+    for i in range(SHARED_LAYOUTS):
+        _, data = client.request('POST', '/api/layouts',
+                                 {'name': f'Load {i}', 'base_width': 600, 'base_height': 400})
+        layout_ids.append(json.loads(data)['id'])
+    client.close()
+    return board_ids, layout_ids
+
+
+def worker(base_url, requests, board_ids, layout_ids, seed_value, results):
+    rng = random.Random(seed_value)
+    client = Client(base_url)
+    names, weights = zip(*MIX)
+    created = []
+    for _ in range(requests):
+        op = rng.choices(names, weights)[0]
+        if op == 'delete_board' and not created:
+            op = 'create_board'
+        layout_id = rng.choice(layout_ids)
+        if op == 'list_boards':
+            args = ('GET', f'/api/boards?limit=100&after_id={rng.choice(board_ids)}')
+        elif op == 'create_board':
+            args = ('POST', '/api/boards', synthetic_rows(1, seed=rng.random())[0])
+        elif op == 'delete_board':
+            args = ('DELETE', f'/api/boards/{created.pop()}')
+        elif op == 'get_layout':
+            args = ('GET', f'/api/layouts/{layout_id}')
+        else:
+            placements = [{'board_id': board_id, 'x': rng.uniform(0, 500), 'y': rng.uniform(0, 300),
+                           'rotation': rng.choice([0, 90, 180, 270])}
+                          for board_id in rng.sample(board_ids, BOARDS_PER_LAYOUT)]
+            args = ('PUT', f'/api/layouts/{layout_id}/placements', {'placements': placements})
+
+        start = time.perf_counter()
+        try:
+            status, data = client.request(*args)
+        except (OSError, http.client.HTTPException):
+            client.close()
+            client = Client(base_url)
+            status, data = 599, b''
+        elapsed = time.perf_counter() - start
+        if op == 'create_board' and status == 201:
+            created.append(json.loads(data)['id'])
+        results.append((op, elapsed, status))
+    client.close()
+
+
+def run_load(base_url, threads, requests):
+    board_ids, layout_ids = seed(base_url)
+    results = []
+    workers = [threading.Thread(target=worker, args=(base_url, requests, board_ids, layout_ids, i, results))
+               for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def report(label, results, wall):
+    by_op = defaultdict(list)
+    errors = defaultdict(int)
+    for op, elapsed, status in results:
+        by_op[op].append(elapsed)
+        if status >= 500:
+            errors[op] += 1
+    print(f"\n{label}: {len(results)} requests in {wall:.2f} s, {len(results) / wall:.0f} req/s")
+    print(f"  {'operation':<14} {'count':>6} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for op, _ in MIX + [('all', 0)]:
+        times = np.array([elapsed for _, elapsed, _ in results] if op == 'all' else by_op[op]) * 1e3
+        if not len(times):
+            continue
+        failed = sum(errors.values()) if op == 'all' else errors[op]
+        print(f"  {op:<14} {len(times):>6} {np.percentile(times, 50):>9.1f} "
+              f"{np.percentile(times, 99):>9.1f} {failed:>7}")
+
+
+def serve(app):
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help='requests per thread')
+    parser.add_argument('--url', help='load an already running server instead of a scratch one')
+    args = parser.parse_args()
+
+    if args.url:
+        results, wall = run_load(args.url.rstrip('/'), args.threads, args.requests)
+        report(args.url, results, wall)
+        return
+
+    for label, tuned in (('SQLAlchemy defaults', False), ('tuned storage (WAL)', True)):
+        with tempfile.TemporaryDirectory() as scratch:
+            app = make_app(os.path.join(scratch, 'load.db'), tuned=tuned)
+            server, base_url = serve(app)
+            try:
+                results, wall = run_load(base_url, args.threads, args.requests)
+            finally:
+                server.shutdown()
+            report(f'{label}, {args.threads} threads', results, wall)
+
+
+if __name__ == '__main__':
+    main()
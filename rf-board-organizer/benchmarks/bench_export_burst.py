@@ -0,0 +1,75 @@
+"""Burst of DXF/STL exports through the Flask test client
+
+Reports per-route throughput and measures peak memory of a streamed
+large-plate DXF. That exports leave nothing in the temp directory is
+checked by tests/test_export_tempfiles.py.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_export_burst.py
+"""
+import os
+import sys
+import random
+import tempfile
+import time
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import make_app
+
+BURST = 200
+
+
+def synthetic_boards(count, seed=0):
+    rng = random.Random(seed)
+    boards = []
+    for i in range(count):
+        x, y = rng.uniform(0, 1000), rng.uniform(0, 1000)
+        width, height = rng.uniform(20, 80), rng.uniform(15, 60)
+        boards.append({
+            'name': f'Board {i}', 'x': x, 'y': y, 'width': width, 'height': height,
+            'holes': [{'x': x + 3, 'y': y + 3, 'diameter': 3.0},
+                      {'x': x + width - 3, 'y': y + height - 3, 'diameter': 3.0}]
+        })
+    return boards
+
+
+def burst(client, url, bodies):
+    start = time.perf_counter()
+    for body in bodies:
+        response = client.post(url, json=body)
+        assert response.status_code == 200, response.data
+        response.get_data()
+    return len(bodies) / (time.perf_counter() - start)
+
+
+def run(client):
+    # Distinct parameters per request so every export is a cache miss
+    rates = {
+        'generate-dxf': burst(client, '/api/generate-dxf', [
+            {'base_width': 200 + i, 'base_height': 150, 'boards': synthetic_boards(10, i)}
+            for i in range(BURST)]),
+        'generate-stl': burst(client, '/api/generate-stl/bench', [
+            {'hole_diameter': 2.0 + i / 100, 'standoff_height': 5.0} for i in range(BURST)]),
+        'generate-l-bracket': burst(client, '/api/generate-l-bracket/bench', [
+            {'board_width': 40.0 + i, 'board_height': 30.0} for i in range(BURST)]),
+    }
+    for route, rate in rates.items():
+        print(f"{route:<20} {rate:>8.1f} req/s ({BURST} misses)")
+
+    body = {'base_width': 2000, 'base_height': 2000, 'boards': synthetic_boards(20000)}
+    tracemalloc.start()
+    response = client.post('/api/generate-dxf', json=body)
+    size = sum(len(chunk) for chunk in response.response)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"streamed 20000-board DXF: {size / 1e6:.1f} MB, peak traced memory {peak / 1e6:.1f} MB")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as scratch:
+        run(make_app(os.path.join(scratch, 'burst.db')).test_client())
+
+
+if __name__ == '__main__':
+    main()
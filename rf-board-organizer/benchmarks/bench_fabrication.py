@@ -0,0 +1,101 @@
+"""Whole-layout fabrication bundle versus one export request per part
+
+For layouts of increasing size, compares GET /api/layouts/<id>/fabrication
+with what a client had to do before: one /generate-dxf call plus a
+/generate-stl and /generate-l-bracket call per board (each with a fresh
+artifact cache, so nothing is served from memory). Also reports the time
+to the first streamed chunk and checks the merged STL.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_fabrication.py
+"""
+import os
+import sys
+import io
+import random
+import tempfile
+import time
+import zipfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from stl import mesh
+
+from common import make_app, synthetic_rows
+from src.models.board import Board, Layout, LayoutPlacement, db
+from src.routes.board import artifact_cache
+from src.services import fabrication
+
+SIZES = [10, 100, 1000]
+
+
+def seed_layout(app, count):
+    rng = random.Random(count)
+    with app.app_context():
+        layout = Layout(name=f'Bench {count}', base_width=3000, base_height=3000)
+        db.session.add(layout)
+        db.session.flush()
+        board_ids = db.session.scalars(insert(Board).returning(Board.id), synthetic_rows(count, seed=count)).all()
+        db.session.execute(insert(LayoutPlacement), [
+            {'layout_id': layout.id, 'board_id': board_id, 'x': rng.uniform(0, 2900),
+             'y': rng.uniform(0, 2900), 'rotation': rng.choice([0, 90, 180, 270])}
+            for board_id in board_ids
+        ])
+        db.session.commit()
+        return layout.id
+
+
+def per_part_requests(client, layout):
+    """The old client flow: plate DXF, then a standoff and a bracket request per board"""
+    artifact_cache.clear()
+    boards = [{'name': p['board']['name'], 'x': p['x'], 'y': p['y'],
+               'width': p['board']['width'], 'height': p['board']['height'], 'holes': []}
+              for p in layout['placements']]
+    client.post('/api/generate-dxf', json={'boards': boards, 'base_width': layout['base_width'],
+                                          'base_height': layout['base_height']}).get_data()
+    for placement in layout['placements']:
+        board = placement['board']
+        client.post(f"/api/generate-stl/{board['id']}", json={
+            'hole_diameter': board['hole_diameter'], 'standoff_height': board['standoff_height']}).get_data()
+        client.post(f"/api/generate-l-bracket/{board['id']}", json={
+            'board_width': board['width'], 'board_height': board['height'],
+            'standoff_height': board['standoff_height']}).get_data()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as scratch:
+        app = make_app(os.path.join(scratch, 'bench.db'))
+        client = app.test_client()
+        fabrication.get_executor()  # start the pool outside the timings
+
+        print(f"workers: {fabrication.get_executor()._max_workers}")
+        for count in SIZES:
+            layout_id = seed_layout(app, count)
+            layout = client.get(f'/api/layouts/{layout_id}').json
+
+            start = time.perf_counter()
+            per_part_requests(client, layout)
+            per_part = time.perf_counter() - start
+
+            start = time.perf_counter()
+            response = client.get(f'/api/layouts/{layout_id}/fabrication', buffered=False)
+            chunks = iter(response.response)
+            first = next(chunks)
+            first_chunk = time.perf_counter() - start
+            body = first + b''.join(chunks)
+            bundle_time = time.perf_counter() - start
+
+            archive = zipfile.ZipFile(io.BytesIO(body))
+            standoffs = mesh.Mesh.from_file('standoffs.stl', fh=io.BytesIO(archive.read('standoffs.stl')))
+            holes = sum(p['board']['mounting_holes_x'] * p['board']['mounting_holes_y']
+                        for p in layout['placements'])
+            assert len(standoffs.vectors) == holes * 8 * 16, (len(standoffs.vectors), holes)
+            assert standoffs.vectors[..., :2].max() > 100  # translated, not all at the origin
+
+            print(f"{count:>5} boards  per-part requests {per_part * 1e3:>8.0f} ms   "
+                  f"bundle {bundle_time * 1e3:>7.0f} ms (first chunk {first_chunk * 1e3:.0f} ms, "
+                  f"{len(archive.namelist())} files, {len(body) / 1024:.0f} KiB)")
+
+
+if __name__ == '__main__':
+    main()
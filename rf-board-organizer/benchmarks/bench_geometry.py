@@ -0,0 +1,65 @@
+"""Layout geometry: per-board scalar functions vs one vectorized pass
+
+Computes rotated footprints and every mounting-hole centre for layouts of
+1k to 100k placed boards both ways, checking that they agree.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_geometry.py
+"""
+import os
+import sys
+import random
+import time
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from common import synthetic_rows
+from src.services import geometry
+
+SIZES = [1000, 10000, 100000]
+
+
+def synthetic_items(count, seed=0):
+    rng = random.Random(seed)
+    items = []
+    for index, row in enumerate(synthetic_rows(count, seed=seed)):
+        board = SimpleNamespace(id=index, position_x=None, position_y=None, rotation=None, **row)
+        placement = geometry.Placement(rng.uniform(0, 5000), rng.uniform(0, 5000), rng.choice([0, 90, 180, 270]))
+        items.append((index, board, placement))
+    return items
+
+
+def scalar(items):
+    boxes = [geometry.footprint(board, *placement) for _, board, placement in items]
+    holes = [hole for _, board, placement in items for hole in geometry.mounting_holes(board, *placement)]
+    return boxes, holes
+
+
+def compute(columns):
+    boxes = geometry.footprints(columns)
+    return boxes, geometry.hole_centres(columns, boxes)
+
+
+def main():
+    for count in SIZES:
+        items = synthetic_items(count, seed=count)
+        start = time.perf_counter()
+        boxes, holes = scalar(items)
+        scalar_time = time.perf_counter() - start
+        start = time.perf_counter()
+        columns = geometry.item_columns(items)
+        gather_time = time.perf_counter() - start
+        vector_boxes, (owner, centres, diameters) = compute(columns)
+        vector_time = time.perf_counter() - start
+
+        assert np.allclose(vector_boxes, boxes)
+        assert np.allclose(np.column_stack([centres, diameters]), holes)
+        print(f"{count:>7} boards {len(holes):>7} holes  scalar {scalar_time * 1e3:>8.1f} ms  "
+              f"vectorized {vector_time * 1e3:>7.1f} ms  ({scalar_time / vector_time:.0f}x; "
+              f"{(vector_time - gather_time) * 1e3:.1f} ms after gathering columns)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""GET /api/boards latency and payload size at 10k and 100k boards
+
+Compares the previous ORM-hydrating implementation with the column-only
+query (full list, projected, one page) and with gzip/br compression.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_get_boards.py
+"""
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import jsonify
+from sqlalchemy import insert
+
+from common import make_app, synthetic_rows
+from src.models.board import Board
+from src.models.user import db
+
+SIZES = [10000, 100000]
+REPEAT = 3
+
+
+def legacy_get_boards():
+    """The previous get_boards body: every row hydrated into a Board object"""
+    boards = Board.query.all()
+    return jsonify([{
+        'id': board.id,
+        'name': board.name,
+        'width': board.width,
+        'height': board.height,
+        'mounting_holes_x': board.mounting_holes_x,
+        'mounting_holes_y': board.mounting_holes_y,
+        'hole_spacing_x': board.hole_spacing_x,
+        'hole_spacing_y': board.hole_spacing_y,
+        'hole_diameter': board.hole_diameter,
+        'standoff_height': board.standoff_height
+    } for board in boards])
+
+
+def best(func):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as scratch:
+        app = make_app(os.path.join(scratch, 'bench.db'))
+        app.add_url_rule('/legacy/boards', 'legacy_boards', legacy_get_boards)
+        client = app.test_client()
+
+        loaded = 0
+        for size in SIZES:
+            with app.app_context():
+                db.session.execute(insert(Board), synthetic_rows(size - loaded, seed=size))
+                db.session.commit()
+            loaded = size
+
+            cases = [
+                ('legacy ORM', '/legacy/boards', {}),
+                ('columns, full', '/api/boards', {}),
+                ('columns, fields=id,name', '/api/boards?fields=id,name', {}),
+                ('columns, limit=500', '/api/boards?limit=500', {}),
+                ('columns, full, gzip', '/api/boards', {'Accept-Encoding': 'gzip'}),
+                ('columns, full, br', '/api/boards', {'Accept-Encoding': 'br'}),
+            ]
+            print(f"\n{size} boards")
+            for label, url, headers in cases:
+                elapsed, response = best(lambda: client.get(url, headers=headers))
+                assert response.status_code == 200
+                print(f"  {label:<26} {elapsed * 1e3:>9.1f} ms {len(response.data) / 1024:>9.0f} KiB")
+
+
+if __name__ == '__main__':
+    main()
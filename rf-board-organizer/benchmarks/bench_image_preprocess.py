@@ -0,0 +1,114 @@
+"""Upload preprocessing before the model call: bytes sent and end-to-end latency
+
+Synthetic uploads: a 12 MP phone photo (EXIF-rotated, with a white margin),
+a 1440p PNG screenshot and a small JPEG. For each it reports the bytes the
+model receives and the preprocessing time, then posts them to
+/api/extract-dimensions with a FakeExtractor that charges a fixed model
+latency plus upload time at BANDWIDTH, with preprocessing on and off,
+one at a time and CONCURRENCY at once.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_image_preprocess.py
+"""
+import os
+import sys
+import io
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from common import make_app
+from src.services import extraction, images
+
+MODEL_LATENCY = 0.3
+BANDWIDTH = 2 * 1024 * 1024  # bytes/s, a typical office uplink
+CONCURRENCY = 4
+REQUESTS = 8
+
+
+def phone_photo(seed=0):
+    """4032x3024 JPEG, stored landscape with EXIF orientation 6 and a white margin"""
+    rng = np.random.default_rng(seed)
+    height, width = 3024, 4032
+    y, x = np.mgrid[0:height, 0:width]
+    board = np.stack([40 + x // 40 % 30, 90 + y // 50 % 40, 50 + (x + y) // 60 % 20], axis=-1)
+    board = board + rng.normal(0, 6, board.shape)
+    pixels = np.full((height, width, 3), 250.0)
+    pixels[300:height - 300, 400:width - 400] = board[300:height - 300, 400:width - 400]
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    exif = image.getexif()
+    exif[images.EXIF_ORIENTATION] = 6
+    out = io.BytesIO()
+    image.save(out, 'JPEG', quality=92, exif=exif)
+    return out.getvalue(), 'image/jpeg'
+
+
+def screenshot():
+    """2560x1440 PNG of a datasheet drawing: flat colours and thin lines"""
+    image = Image.new('RGB', (2560, 1440), 'white')
+    draw = ImageDraw.Draw(image)
+    for k in range(40):
+        draw.rectangle((200 + 20 * k, 150 + 10 * k, 2300 - 15 * k, 1300 - 8 * k), outline=(20, 20, 20), width=2)
+        draw.text((220 + 20 * k, 160 + 10 * k), f'{12.5 + k:.1f} mm', fill=(0, 0, 160))
+    out = io.BytesIO()
+    image.save(out, 'PNG')
+    return out.getvalue(), 'image/png'
+
+
+def small_photo(seed=1):
+    rng = np.random.default_rng(seed)
+    image = Image.fromarray(rng.integers(60, 200, (600, 800, 3), dtype=np.uint8))
+    out = io.BytesIO()
+    image.save(out, 'JPEG', quality=85)
+    return out.getvalue(), 'image/jpeg'
+
+
+def post(client, data, mime_type, serial):
+    # Trailing bytes after the image end make every upload a cache miss without changing the picture
+    upload = data + b'%08d' % serial
+    start = time.perf_counter()
+    response = client.post('/api/extract-dimensions', content_type='multipart/form-data',
+                           data={'image': (io.BytesIO(upload), 'upload', mime_type)})
+    assert response.status_code == 200, response.get_data()[:200]
+    return time.perf_counter() - start
+
+
+def main():
+    uploads = {'phone photo': phone_photo(), 'screenshot': screenshot(), 'small jpeg': small_photo()}
+
+    print(f"{'upload':<12} {'original':>10} {'sent':>10} {'preprocess':>11}")
+    for label, (data, mime_type) in uploads.items():
+        images.preprocess(data, mime_type)
+        start = time.perf_counter()
+        sent, sent_type = images.preprocess(data, mime_type)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<12} {len(data) / 1024:>8.0f}KB {len(sent) / 1024:>8.0f}KB {elapsed * 1e3:>9.0f}ms"
+              f"  {sent_type}, {Image.open(io.BytesIO(sent)).size}")
+
+    serial = iter(range(10 ** 9))
+    with tempfile.TemporaryDirectory() as scratch:
+        client = make_app(os.path.join(scratch, 'bench.db')).test_client()
+        print(f"\n{'upload':<12} {'mode':<5} {'serial p50':>11} {f'x{CONCURRENCY} p50':>10} {f'x{CONCURRENCY} wall':>10} "
+              f"{'sent/request':>13}")
+        for label, (data, mime_type) in uploads.items():
+            for enabled in (False, True):
+                images.PREPROCESS = enabled
+                fake = extraction.FakeExtractor(latency=MODEL_LATENCY, bandwidth=BANDWIDTH)
+                extraction.set_extractor(fake)
+                serial_times = [post(client, data, mime_type, next(serial)) for _ in range(3)]
+                start = time.perf_counter()
+                with ThreadPoolExecutor(CONCURRENCY) as pool:
+                    burst = list(pool.map(lambda _: post(client, data, mime_type, next(serial)), range(REQUESTS)))
+                wall = time.perf_counter() - start
+                print(f"{label:<12} {'on' if enabled else 'off':<5} {statistics.median(serial_times) * 1e3:>9.0f}ms "
+                      f"{statistics.median(burst) * 1e3:>8.0f}ms {wall:>9.2f}s "
+                      f"{fake.bytes_received / fake.calls / 1024:>11.0f}KB")
+
+
+if __name__ == '__main__':
+    main()
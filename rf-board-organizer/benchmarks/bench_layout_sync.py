@@ -0,0 +1,141 @@
+"""Concurrent drag editing: whole-layout PUTs vs PATCH deltas, with and without coalescing
+
+Several clients drag their own board on one shared layout as fast as the
+server answers while viewers follow the layout's event stream. Reports
+request latency, bytes sent per update, database write transactions per
+second and how long an update takes to reach the viewers.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_layout_sync.py [--draggers 4] [--viewers 8] [--moves 200]
+"""
+import os
+import sys
+import argparse
+import http.client
+import json
+import socket
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from bench_concurrent_load import Client, serve
+from common import make_app, synthetic_rows
+from src.services import layout_sync
+
+PLACEMENTS = 40
+
+
+def follow(base_url, layout_id, received, stop):
+    """Read the layout's event stream, recording (version, arrival time) per event"""
+    host, port = base_url.rsplit(':', 1)
+    connection = http.client.HTTPConnection(host.split('//')[1], int(port), timeout=1)
+    connection.request('GET', f'/api/layouts/{layout_id}/events')
+    response = connection.getresponse()
+    while not stop.is_set():
+        try:
+            line = response.fp.readline()
+        except socket.timeout:
+            continue
+        if not line:
+            break
+        if line.startswith(b'id: '):
+            received.append((int(line[4:]), time.perf_counter()))
+    connection.close()
+
+
+def drag(base_url, layout_id, version, mode, placements, index, moves, sent, timings, sizes):
+    client = Client(base_url)
+    for step in range(moves):
+        x, y = 10 + (step % 100), 10 + index * 5
+        if mode == 'put':
+            placements[index] = {**placements[index], 'x': x, 'y': y}
+            body = {'placements': placements}
+            method = 'PUT'
+        else:
+            body = {'version': version, 'client': f'dragger-{index}',
+                    'ops': [{'op': 'move', 'id': placements[index]['id'], 'x': x, 'y': y}]}
+            method = 'PATCH'
+        start = time.perf_counter()
+        status, data = client.request(method, f'/api/layouts/{layout_id}/placements', body)
+        timings.append(time.perf_counter() - start)
+        assert status == 200, (status, data[:200])
+        version = json.loads(data)['version']
+        sent[version] = start
+        sizes.append(len(json.dumps(body)))
+    client.close()
+
+
+def run(mode, interval, draggers, viewers, moves):
+    layout_sync.hub = layout_sync.LayoutHub(interval)
+    with tempfile.TemporaryDirectory() as scratch:
+        app = make_app(os.path.join(scratch, 'sync.db'))
+        server, base_url = serve(app)
+        try:
+            client = Client(base_url)
+            rows = synthetic_rows(PLACEMENTS)
+            client.request('POST', '/api/boards/bulk?duplicates=allow', rows)
+            _, data = client.request('POST', '/api/layouts', {'name': 'Sync', 'base_width': 600, 'base_height': 400})
+            layout_id = json.loads(data)['id']
+            _, data = client.request('PUT', f'/api/layouts/{layout_id}/placements', {'placements': [
+                {'board_id': board_id, 'x': 0, 'y': 0, 'rotation': 0} for board_id in range(1, PLACEMENTS + 1)]})
+            layout = json.loads(data)
+            placements = [{key: p[key] for key in ('id', 'board_id', 'x', 'y', 'rotation')}
+                          for p in layout['placements']]
+            client.close()
+
+            stop = threading.Event()
+            streams = [[] for _ in range(viewers)]
+            followers = [threading.Thread(target=follow, args=(base_url, layout_id, received, stop), daemon=True)
+                         for received in streams]
+            for thread in followers:
+                thread.start()
+            time.sleep(0.2)
+
+            writes = layout_sync.hub.writes
+            sent, timings, sizes = {}, [], []
+            workers = [threading.Thread(target=drag, args=(base_url, layout_id, layout['version'], mode,
+                                                           list(placements), index, moves, sent, timings, sizes))
+                       for index in range(draggers)]
+            start = time.perf_counter()
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            wall = time.perf_counter() - start
+            writes = layout_sync.hub.writes - writes
+            time.sleep(max(interval, 0.1) + 0.2)
+            stop.set()
+            for thread in followers:
+                thread.join()
+        finally:
+            server.shutdown()
+
+    timings = np.array(timings) * 1e3
+    delays = np.array([arrival - sent[version] for received in streams for version, arrival in received
+                       if version in sent]) * 1e3
+    label = 'PUT whole layout' if mode == 'put' else f'PATCH, coalesce {interval:g} s'
+    print(f"{label:<24} {np.percentile(timings, 50):>7.1f} {np.percentile(timings, 99):>7.1f} "
+          f"{np.mean(sizes):>8.0f} {len(timings) / wall:>8.0f} {writes / wall:>9.1f} "
+          f"{np.percentile(delays, 50):>8.1f} {np.percentile(delays, 99):>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--draggers', type=int, default=4)
+    parser.add_argument('--viewers', type=int, default=8)
+    parser.add_argument('--moves', type=int, default=200, help='updates per dragger')
+    args = parser.parse_args()
+
+    print(f'{args.draggers} draggers x {args.moves} updates, {args.viewers} viewers, {PLACEMENTS} placements\n')
+    print(f"{'':<24} {'p50 ms':>7} {'p99 ms':>7} {'bytes':>8} {'upd/s':>8} {'writes/s':>9} "
+          f"{'fan p50':>8} {'fan p99':>8}")
+    run('put', 0, args.draggers, args.viewers, args.moves)
+    run('patch', 0, args.draggers, args.viewers, args.moves)
+    run('patch', layout_sync.COALESCE_INTERVAL, args.draggers, args.viewers, args.moves)
+
+
+if __name__ == '__main__':
+    main()
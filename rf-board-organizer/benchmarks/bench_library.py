@@ -0,0 +1,121 @@
+"""Board library search and duplicate detection at 100k boards
+
+Bulk-imports a synthetic library (duplicate checks and FTS triggers on),
+then compares name search through the FTS5 index with a LIKE scan,
+hole-pattern lookup through ix_board_signature with a full scan, times the
+duplicate check on POST /api/boards, and re-imports part of the library
+with small measurement noise to see every row caught as a duplicate.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_library.py
+"""
+import os
+import sys
+import json
+import random
+import statistics
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+from common import make_app
+from src.models.board import Board
+from src.models.user import db
+from src.services import library
+
+SIZE = 100000
+REIMPORT = 10000
+REPEAT = 50
+VENDORS = ['Adafruit', 'SparkFun', 'Seeed', 'Waveshare', 'DFRobot', 'Pololu', 'Arduino', 'Pimoroni',
+           'Espressif', 'Olimex']
+KINDS = ['Feather', 'Breakout', 'HAT', 'Shield', 'Driver', 'Sensor', 'Relay', 'Display', 'Amplifier',
+         'Regulator', 'Charger', 'Radio', 'GPS', 'IMU', 'Motor Controller']
+
+
+def library_rows(count, seed=0):
+    """Boards with varied names and geometry, few of them near-duplicates by chance"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        width, height = round(rng.uniform(10, 200), 2), round(rng.uniform(10, 150), 2)
+        chip = ''.join(rng.choice('ABCDEFGHJKLMNPRSTVWXZ') for _ in range(2)) + str(rng.randint(100, 9999))
+        rows.append({
+            'name': f'{rng.choice(VENDORS)} {rng.choice(KINDS)} {chip} rev {i % 7}',
+            'width': width,
+            'height': height,
+            'mounting_holes_x': rng.randint(1, 2),
+            'mounting_holes_y': rng.randint(1, 2),
+            'hole_spacing_x': round(width * rng.uniform(0.6, 0.95), 2),
+            'hole_spacing_y': round(height * rng.uniform(0.6, 0.95), 2),
+            'hole_diameter': rng.choice([2.0, 2.5, 3.0, 3.2, 3.5, 4.0]),
+            'standoff_height': rng.choice([3.0, 5.0, 10.0]),
+        })
+    return rows
+
+
+def p50_ms(call, repeat=REPEAT):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1e3
+
+
+def main():
+    rows = library_rows(SIZE)
+    with tempfile.TemporaryDirectory() as scratch:
+        app = make_app(os.path.join(scratch, 'bench.db'))
+        client = app.test_client()
+
+        start = time.perf_counter()
+        summary = client.post('/api/boards/bulk', data=json.dumps(rows), content_type='application/json').json
+        elapsed = time.perf_counter() - start
+        print(f"import {SIZE} boards: {SIZE / elapsed:.0f} rows/s, {summary['inserted']} inserted, "
+              f"{summary['duplicates']} near-duplicates skipped")
+
+        with app.app_context():
+            print('\nname search (50 results)    FTS5 ms    LIKE ms  matches')
+            for terms in ('adafruit feather', 'motor', rows[SIZE // 2]['name'].split()[-3]):
+                words = terms.split()
+                like = select(Board.id).where(*[Board.name.ilike(f'%{word}%') for word in words])
+                matches = db.session.scalar(select(func.count()).select_from(like.subquery()))
+                fts = p50_ms(lambda: library.search(terms, limit=50))
+                scan = p50_ms(lambda: db.session.execute(like.order_by(Board.id).limit(50)).all())
+                print(f"  {terms!r:<24} {fts:>10.2f} {scan:>10.2f} {matches:>8}")
+
+            print('\nhole-pattern lookup         index ms    scan ms  matches')
+            for row in rows[:3]:
+                spec = {field: row[field] for field in library.DuplicateIndex.FIELDS}
+                pattern = {field: spec[field] for field in ('mounting_holes_x', 'mounting_holes_y',
+                                                            'hole_spacing_x', 'hole_spacing_y')}
+                scan_query = select(Board.id).where(
+                    Board.mounting_holes_x + 0 == pattern['mounting_holes_x'],
+                    Board.mounting_holes_y + 0 == pattern['mounting_holes_y'],
+                    func.abs(Board.hole_spacing_x - pattern['hole_spacing_x']) <= library.DUPLICATE_TOLERANCE,
+                    func.abs(Board.hole_spacing_y - pattern['hole_spacing_y']) <= library.DUPLICATE_TOLERANCE)
+                matches = len(library.search(spec=pattern, limit=SIZE))
+                indexed = p50_ms(lambda: library.search(spec=pattern, limit=SIZE))
+                scan = p50_ms(lambda: db.session.execute(scan_query).all(), repeat=10)
+                label = f"{pattern['mounting_holes_x']}x{pattern['mounting_holes_y']} holes"
+                print(f"  {label:<24} {indexed:>10.2f} {scan:>10.2f} {matches:>8}")
+
+            check = p50_ms(lambda: library.find_duplicates(rows[0]))
+        print(f'\nduplicate check per POST /boards: {check:.2f} ms')
+
+        rng = random.Random(1)
+        noisy = []
+        for row in rows[:REIMPORT]:
+            row = {field: round(value + rng.uniform(-0.2, 0.2), 2) if field in ('width', 'height') else value
+                   for field, value in row.items()}
+            noisy.append(row)
+        start = time.perf_counter()
+        summary = client.post('/api/boards/bulk', data=json.dumps(noisy), content_type='application/json').json
+        elapsed = time.perf_counter() - start
+        print(f"re-import {REIMPORT} measured-again boards: {REIMPORT / elapsed:.0f} rows/s, "
+              f"{summary['duplicates']} caught, {summary['inserted']} inserted")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Micro-benchmark: vectorized standoff/bracket kernel vs the original per-face loop
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_mesh.py
+"""
+import os
+import sys
+import math
+import timeit
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from stl import mesh
+
+from src.services import mesh as meshing
+
+SEGMENT_COUNTS = [16, 128, 1024]
+INNER_RADIUS = 1.5
+OUTER_RADIUS = 2.25
+HEIGHT = 10.0
+BRACKET_BOARDS = 200
+
+
+def legacy_standoff(inner_radius, outer_radius, height, segments):
+    """The list-and-loop implementation previously inlined in generate_stl"""
+    vertices = []
+    for i in range(segments):
+        angle = 2 * math.pi * i / segments
+        x_outer = outer_radius * math.cos(angle)
+        y_outer = outer_radius * math.sin(angle)
+        x_inner = inner_radius * math.cos(angle)
+        y_inner = inner_radius * math.sin(angle)
+        vertices.extend([[x_outer, y_outer, 0], [x_inner, y_inner, 0]])
+        vertices.extend([[x_outer, y_outer, height], [x_inner, y_inner, height]])
+    vertices = np.array(vertices)
+
+    face_list = []
+    for i in range(segments):
+        next_i = (i + 1) % segments
+        ob, ib, ot, it = i * 4, i * 4 + 1, i * 4 + 2, i * 4 + 3
+        nob, nib, not_, nit = next_i * 4, next_i * 4 + 1, next_i * 4 + 2, next_i * 4 + 3
+        face_list.extend([[ob, nob, ot], [nob, not_, ot]])
+        face_list.extend([[ib, it, nib], [nib, it, nit]])
+        face_list.extend([[ob, ib, nob], [nob, ib, nib]])
+        face_list.extend([[ot, not_, it], [not_, nit, it]])
+    faces = np.array(face_list)
+
+    standoff_mesh = mesh.Mesh(np.zeros(faces.shape[0], dtype=mesh.Mesh.dtype))
+    for i, face in enumerate(faces):
+        for j in range(3):
+            standoff_mesh.vectors[i][j] = vertices[face[j], :]
+    return standoff_mesh
+
+
+def vectorized_standoff(inner_radius, outer_radius, height, segments):
+    return meshing.to_mesh(*meshing.hollow_cylinder(inner_radius, outer_radius, height, segments))
+
+
+def best_of(func, *args, repeat=5):
+    timer = timeit.Timer(lambda: func(*args))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main():
+    print(f"{'segments':>8} {'faces':>7} {'legacy ms':>10} {'numpy ms':>10} {'speedup':>8}")
+    for segments in SEGMENT_COUNTS:
+        args = (INNER_RADIUS, OUTER_RADIUS, HEIGHT, segments)
+        assert np.allclose(legacy_standoff(*args).vectors, vectorized_standoff(*args).vectors)
+        legacy = best_of(legacy_standoff, *args)
+        vectorized = best_of(vectorized_standoff, *args)
+        print(f"{segments:>8} {segments * 8:>7} {legacy * 1e3:>10.3f} {vectorized * 1e3:>10.3f} "
+              f"{legacy / vectorized:>7.1f}x")
+
+    brackets = best_of(lambda: meshing.to_mesh(*meshing.l_brackets(50.0, 30.0, 3.0, 10.0, 10.0)))
+    print(f"\nfour L-brackets (vectorized): {brackets * 1e3:.3f} ms")
+
+    # Drilled brackets for a layout of BRACKET_BOARDS boards sharing a few standoff heights:
+    # triangulating every corner versus transforming one cached template per shape
+    rng = np.random.default_rng(0)
+    boards = [(rng.uniform(20, 100), rng.uniform(15, 80), rng.choice([3.0, 5.0, 10.0]))
+              for _ in range(BRACKET_BOARDS)]
+
+    def per_corner():
+        build = meshing.l_bracket_template.__wrapped__
+        for width, height, standoff in boards:
+            corners = meshing.corner_transforms(width, height)
+            meshing.combine([meshing.transform_copies(*build(3.0, 10.0, standoff, 3.0, 5.0, 16), corners[k:k + 1])
+                             for k in range(len(corners))])
+
+    def templated():
+        meshing.l_bracket_template.cache_clear()
+        for width, height, standoff in boards:
+            meshing.l_brackets(width, height, 3.0, 10.0, standoff, 3.0, 5.0, 16)
+
+    uncached = best_of(per_corner, repeat=1)
+    cached = best_of(templated, repeat=1)
+    print(f"drilled brackets for {BRACKET_BOARDS} boards: triangulate per corner {uncached * 1e3:.1f} ms, "
+          f"cached template {cached * 1e3:.1f} ms ({uncached / cached:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
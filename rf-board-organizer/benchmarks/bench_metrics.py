@@ -0,0 +1,71 @@
+"""Cost of the request-timing middleware and of the opt-in profiler
+
+The same requests (a small page of boards, and a standoff STL served from
+the artifact cache) against a bare app, an instrumented one, and the
+instrumented one with X-Profile set. Also times rendering /metrics once
+many route and span series exist.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_metrics.py
+"""
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+
+from common import make_app, synthetic_rows
+from src.models.board import Board, db
+from src.services import metrics
+
+REQUESTS = 2000
+TOKEN = 'bench'
+
+
+def per_request(client, method, url, headers=None, **kwargs):
+    for _ in range(20):
+        with client.open(url, method=method, headers=headers, **kwargs) as response:
+            response.get_data()
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        with client.open(url, method=method, headers=headers, **kwargs) as response:
+            response.get_data()
+    return (time.perf_counter() - start) / REQUESTS * 1e6
+
+
+def main():
+    os.environ['PROFILE_TOKEN'] = TOKEN
+    requests = [
+        ('GET /api/boards?limit=20', 'GET', '/api/boards?limit=20', {}),
+        ('POST /api/generate-stl', 'POST', '/api/generate-stl/bench',
+         {'json': {'hole_diameter': 3.0, 'standoff_height': 10.0}}),
+    ]
+    with tempfile.TemporaryDirectory() as scratch:
+        bare = make_app(os.path.join(scratch, 'bare.db'))
+        instrumented = make_app(os.path.join(scratch, 'instrumented.db'), instrumented=True)
+        for app in (bare, instrumented):
+            with app.app_context():
+                db.session.execute(insert(Board), synthetic_rows(100))
+                db.session.commit()
+
+        print(f"{'request':<26} {'bare':>9} {'timed':>9} {'profiled':>10}")
+        for label, method, url, kwargs in requests:
+            plain = per_request(bare.test_client(), method, url, **kwargs)
+            timed = per_request(instrumented.test_client(), method, url, **kwargs)
+            profiled = per_request(instrumented.test_client(), method, url, headers={'X-Profile': TOKEN}, **kwargs)
+            print(f"{label:<26} {plain:>7.0f}us {timed:>7.0f}us {profiled:>8.0f}us   "
+                  f"(middleware +{timed - plain:.0f}us)")
+
+        for route in range(200):
+            metrics.request_duration.observe(0.01, 'GET', f'/api/synthetic/{route}', '200')
+        client = instrumented.test_client()
+        start = time.perf_counter()
+        body = client.get('/metrics').get_data()
+        print(f"\n/metrics with {body.count(b'_count')} series: {(time.perf_counter() - start) * 1e3:.1f} ms, "
+              f"{len(body) / 1024:.0f} KiB")
+
+
+if __name__ == '__main__':
+    main()
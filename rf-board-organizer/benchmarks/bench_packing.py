@@ -0,0 +1,91 @@
+"""Packing engine benchmark on synthetic board sets
+
+For each set, reports how many boards were placed, the plate utilisation
+and the runtime, and checks that no two placed footprints (plus clearance)
+overlap or leave the plate.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_packing.py
+"""
+import os
+import sys
+import math
+import random
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.packing import pack_rectangles
+
+MARGIN = 2.0
+
+
+def uniform_small(count, rng):
+    return [(rng.uniform(15, 40), rng.uniform(15, 40)) for _ in range(count)]
+
+
+def mixed(count, rng):
+    sizes = []
+    for _ in range(count):
+        if rng.random() < 0.15:
+            sizes.append((rng.uniform(60, 120), rng.uniform(40, 90)))
+        else:
+            sizes.append((rng.uniform(15, 50), rng.uniform(10, 35)))
+    return sizes
+
+
+def long_thin(count, rng):
+    return [(rng.uniform(50, 100), rng.uniform(8, 20)) for _ in range(count)]
+
+
+def identical(count, rng):
+    return [(50.0, 30.0)] * count
+
+
+GENERATORS = [uniform_small, mixed, long_thin, identical]
+COUNTS = [50, 200, 500]
+# Plate area relative to the total board area (with clearance)
+PLATE_SLACK = 1.05
+
+
+def check(sizes, results, plate_width, plate_height):
+    rects = []
+    for (w, h), result in zip(sizes, results):
+        if result is None:
+            continue
+        x, y, rotation = result
+        if rotation % 180 == 90:
+            w, h = h, w
+        assert x >= MARGIN - 1e-6 and y >= MARGIN - 1e-6
+        assert x + w <= plate_width - MARGIN + 1e-6 and y + h <= plate_height - MARGIN + 1e-6
+        rects.append((x, y, x + w + MARGIN, y + h + MARGIN))
+    rects.sort()
+    for i, (ax0, ay0, ax1, ay1) in enumerate(rects):
+        for bx0, by0, bx1, by1 in rects[i + 1:]:
+            if bx0 >= ax1 - 1e-6:
+                break
+            assert by0 >= ay1 - 1e-6 or ay0 >= by1 - 1e-6, 'overlap'
+
+
+def main():
+    print(f"{'set':<14} {'boards':>6} {'placed':>6} {'util %':>7} {'ms':>8}")
+    for generator in GENERATORS:
+        for count in COUNTS:
+            rng = random.Random(count)
+            sizes = generator(count, rng)
+            area = sum((w + MARGIN) * (h + MARGIN) for w, h in sizes)
+            side = math.sqrt(area * PLATE_SLACK)
+            plate_width, plate_height = side * 1.4, side / 1.4
+
+            start = time.perf_counter()
+            results = pack_rectangles(sizes, plate_width, plate_height, MARGIN)
+            elapsed = time.perf_counter() - start
+
+            check(sizes, results, plate_width, plate_height)
+            placed = [size for size, result in zip(sizes, results) if result]
+            utilisation = sum(w * h for w, h in placed) / (plate_width * plate_height)
+            print(f"{generator.__name__:<14} {count:>6} {len(placed):>6} "
+                  f"{utilisation * 100:>6.1f}% {elapsed * 1e3:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
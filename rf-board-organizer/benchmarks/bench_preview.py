@@ -0,0 +1,148 @@
+"""Layout previews: vectorized rasteriser vs a per-board loop, and a cached gallery page
+
+Times rasterize() against drawing each board and hole with its own slice
+assignment, for growing layouts, then loads a gallery of layouts through
+GET /api/layouts/<id>/preview.{svg,png}: first render, cache hits, and
+conditional requests answered 304. Sizes are compared with the
+/geometry JSON a client would otherwise fetch to draw the same thing.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_preview.py [--layouts 24] [--boards 60]
+"""
+import os
+import sys
+import argparse
+import statistics
+import tempfile
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from common import make_app, synthetic_rows
+from src.services import preview
+
+REPEAT = 5
+
+
+class Placed:
+    def __init__(self, x, y, rotation=0):
+        self.x, self.y, self.rotation = x, y, rotation
+
+
+class Row:
+    def __init__(self, row):
+        self.__dict__.update(row)
+
+
+def grid_items(count, base_width, base_height):
+    """count synthetic boards spread over the plate, some overlapping"""
+    rng = np.random.default_rng(0)
+    items = []
+    for i, row in enumerate(synthetic_rows(count)):
+        board = Row({**row, 'id': i + 1})
+        x = rng.uniform(0, base_width - board.width)
+        y = rng.uniform(0, base_height - board.height)
+        items.append((i + 1, board, Placed(x, y, int(rng.choice([0, 90])))))
+    return items
+
+
+def rasterize_loop(items, base_width, base_height, width=preview.DEFAULT_WIDTH):
+    """The straightforward version: one slice per board, one mask per hole, no anti-aliasing"""
+    boxes, centres, diameters = preview.layout_shapes(items)
+    width, height = preview.image_size(base_width, base_height, width)
+    scale = width / base_width
+    labels = np.full((height, width), preview.PLATE, dtype=np.uint8)
+    for x0, y0, x1, y1 in boxes:
+        c0, c1 = max(0, round(x0 * scale)), min(width, round(x1 * scale))
+        r0, r1 = max(0, round((base_height - y1) * scale)), min(height, round((base_height - y0) * scale))
+        if c0 >= c1 or r0 >= r1:
+            continue
+        region = labels[r0:r1, c0:c1]
+        region[region == preview.PLATE] = preview.BOARD
+        labels[r0:r1, c0] = labels[r0:r1, c1 - 1] = preview.BOARD_EDGE
+        labels[r0, c0:c1] = labels[r1 - 1, c0:c1] = preview.BOARD_EDGE
+    rows, cols = np.mgrid[0:height, 0:width]
+    for (x, y), diameter in zip(centres, diameters):
+        inside = ((cols + 0.5 - x * scale) ** 2 + (rows + 0.5 - (base_height - y) * scale) ** 2
+                  <= (diameter / 2 * scale) ** 2)
+        labels[inside] = preview.HOLE
+    return preview.PALETTE[labels]
+
+
+def best_ms(call, repeat=REPEAT):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1e3
+
+
+def render_times():
+    print(f"{'boards':>7} {'loop ms':>8} {'raster ms':>10} {'png ms':>8} {'svg ms':>8} {'png KB':>7} {'svg KB':>7}")
+    for count in (10, 100, 1000, 5000):
+        base_width, base_height = 1200, 800
+        items = grid_items(count, base_width, base_height)
+        loop = best_ms(lambda: rasterize_loop(items, base_width, base_height))
+        raster = best_ms(lambda: preview.rasterize(items, base_width, base_height))
+        png = best_ms(lambda: preview.render_png(items, base_width, base_height))
+        svg = best_ms(lambda: preview.render_svg(items, base_width, base_height))
+        png_size = len(preview.render_png(items, base_width, base_height))
+        svg_size = len(preview.render_svg(items, base_width, base_height))
+        print(f'{count:>7} {loop:>8.1f} {raster:>10.1f} {png:>8.1f} {svg:>8.1f} '
+              f'{png_size / 1024:>7.1f} {svg_size / 1024:>7.1f}')
+
+
+def gallery(layouts, boards):
+    with tempfile.TemporaryDirectory() as scratch:
+        app = make_app(os.path.join(scratch, 'preview.db'))
+        client = app.test_client()
+        client.post('/api/boards/bulk?duplicates=allow', json=synthetic_rows(boards))
+        ids = []
+        rng = np.random.default_rng(1)
+        for i in range(layouts):
+            layout = client.post('/api/layouts', json={'name': f'Layout {i}', 'base_width': 600,
+                                                       'base_height': 400}).get_json()
+            client.put(f"/api/layouts/{layout['id']}/placements", json={'placements': [
+                {'board_id': board_id, 'x': float(rng.uniform(0, 450)), 'y': float(rng.uniform(0, 300)),
+                 'rotation': 0} for board_id in range(1, boards + 1)]})
+            ids.append(layout['id'])
+
+        def page(path, etags=None):
+            start = time.perf_counter()
+            size, tags = 0, {}
+            for layout_id in ids:
+                headers = {'If-None-Match': etags[layout_id]} if etags else {}
+                response = client.get(path.format(layout_id), headers=headers)
+                size += len(response.data)
+                tags[layout_id] = response.headers.get('ETag')
+            return (time.perf_counter() - start) * 1e3, size, tags
+
+        print(f'\nGallery of {layouts} layouts x {boards} boards (whole page)')
+        print(f"{'':<28} {'ms':>8} {'KB':>8}")
+        elapsed, size, _ = page('/api/layouts/{}/geometry')
+        print(f"{'geometry JSON':<28} {elapsed:>8.1f} {size / 1024:>8.1f}")
+        for image_format in ('svg', 'png'):
+            path = '/api/layouts/{}/preview.' + image_format
+            elapsed, size, tags = page(path)
+            print(f"{image_format + ' first render':<28} {elapsed:>8.1f} {size / 1024:>8.1f}")
+            hits = [page(path)[0] for _ in range(REPEAT)]
+            print(f"{image_format + ' cached':<28} {statistics.median(hits):>8.1f} {size / 1024:>8.1f}")
+            elapsed, size, _ = page(path, tags)
+            print(f"{image_format + ' revalidated (304)':<28} {elapsed:>8.1f} {size / 1024:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--layouts', type=int, default=24)
+    parser.add_argument('--boards', type=int, default=60, help='boards per layout')
+    args = parser.parse_args()
+
+    print(f'Render at {preview.DEFAULT_WIDTH} px wide, best of {REPEAT}\n')
+    render_times()
+    gallery(args.layouts, args.boards)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Multi-plate stack planner: plates used, stack height and search throughput
+
+Random board libraries (mixed sizes and standoff heights) split over
+300 x 200 mm plates. Compares the three deterministic orders alone with
+the parallel search under a time budget, and checks that no two boards on
+a plate overlap and every board lies inside its plate.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_stacking.py [--budget 2] [--workers N]
+"""
+import os
+import sys
+import argparse
+import random
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import stacking
+
+SIZES = [50, 200, 1000]
+PLATE = (300.0, 200.0)
+MARGIN = 2.0
+
+
+def synthetic_boards(count, seed=0):
+    rng = random.Random(seed)
+    return [{'width': rng.uniform(20, 100), 'height': rng.uniform(15, 80),
+             'standoff_height': rng.choice([3.0, 5.0, 10.0, 20.0])} for _ in range(count)]
+
+
+def check(boards, plan):
+    for plate in plan['plates']:
+        boxes = []
+        for index, x, y, rotation in plate['placements']:
+            w, h = boards[index]['width'], boards[index]['height']
+            if rotation % 180:
+                w, h = h, w
+            assert x >= MARGIN - 1e-6 and y >= MARGIN - 1e-6
+            assert x + w <= PLATE[0] - MARGIN + 1e-6 and y + h <= PLATE[1] - MARGIN + 1e-6
+            boxes.append((x, y, x + w, y + h))
+        for i, a in enumerate(boxes):
+            for b in boxes[i + 1:]:
+                assert a[2] + MARGIN <= b[0] + 1e-6 or b[2] + MARGIN <= a[0] + 1e-6 \
+                    or a[3] + MARGIN <= b[1] + 1e-6 or b[3] + MARGIN <= a[1] + 1e-6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget', type=float, default=2.0)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"{'boards':>6} {'search':<16} {'plates':>7} {'bound':>6} {'stack mm':>9} {'candidates':>11} {'time':>7}")
+    for count in SIZES:
+        boards = synthetic_boards(count, seed=count)
+        for label, budget in (('orders only', 0), (f'{args.budget:g}s parallel', args.budget)):
+            plan = stacking.plan_stack(boards, *PLATE, margin=MARGIN, time_budget=budget, workers=args.workers)
+            check(boards, plan)
+            print(f"{count:>6} {label:<16} {len(plan['plates']):>7} {plan['lower_bound']:>6} "
+                  f"{plan['stack_height']:>9.1f} {plan['candidates']:>11} {plan['elapsed']:>6.2f}s")
+
+
+if __name__ == '__main__':
+    main()
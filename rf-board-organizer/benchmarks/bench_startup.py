@@ -0,0 +1,108 @@
+"""Worker start-up: import time, app creation and first requests
+
+Each measurement runs in a fresh interpreter against a scratch SQLite
+file (never the bundled src/database/app.db), created beforehand. "lazy" is the normal start (export and extraction backends load
+on first use, background preload off so it does not blur the numbers);
+"eager" imports every backend up front, as the app did before they were
+made lazy. Also lists the slowest imports from python -X importtime and
+which heavy libraries a CRUD-only worker ends up loading.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+import os
+import sys
+import argparse
+import json
+import statistics
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ['numpy', 'ezdxf', 'stl', 'google.generativeai']
+
+PROBE = '''
+import json, sys, time, warnings
+warnings.simplefilter('ignore')
+timings = {}
+start = time.perf_counter()
+import src.main
+timings['import'] = time.perf_counter() - start
+if EAGER:
+    import importlib
+    from src.services import lazy
+    for name in lazy.EXPORT_BACKENDS + lazy.EXTRACTION_BACKENDS:
+        importlib.import_module(name)
+    timings['import'] = time.perf_counter() - start
+mark = time.perf_counter()
+app = src.main.create_app(DATABASE_URL)
+timings['create_app'] = time.perf_counter() - mark
+client = app.test_client()
+mark = time.perf_counter()
+assert client.get('/api/boards').status_code == 200
+timings['first_crud'] = time.perf_counter() - mark
+loaded_after_crud = [name for name in HEAVY if name in sys.modules]
+mark = time.perf_counter()
+with client.post('/api/generate-dxf', json={'boards': [], 'base_width': 100, 'base_height': 100}) as response:
+    assert response.status_code == 200, response.get_data()
+timings['first_export'] = time.perf_counter() - mark
+timings['ready'] = timings['import'] + timings['create_app'] + timings['first_crud']
+print(json.dumps({'timings': timings, 'loaded_after_crud': loaded_after_crud}))
+'''
+
+
+def probe(eager, database_url):
+    code = f'EAGER = {eager}\nHEAVY = {HEAVY!r}\nDATABASE_URL = {database_url!r}\n' + PROBE
+    env = dict(os.environ, PRELOAD_BACKENDS='0', PYTHONWARNINGS='ignore')
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True,
+                            check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(database_url, count=10):
+    """(cumulative ms, module) of the slowest top-level imports of src.main plus create_app"""
+    code = f"import src.main; src.main.create_app({database_url!r})"
+    env = dict(os.environ, PRELOAD_BACKENDS='0', PYTHONWARNINGS='ignore')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Top-level entries only: nested imports are indented further in the module column
+        if not name.startswith('  '):
+            rows.append((int(cumulative) / 1e3, name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        report(f"sqlite:///{os.path.join(scratch, 'startup.db')}", args.runs)
+
+
+def report(database_url, runs):
+    # A worker normally starts against existing tables: create them first
+    probe(False, database_url)
+    print(f"{'mode':<6} {'import':>9} {'create_app':>11} {'first CRUD':>11} {'ready':>9} {'first export':>13}")
+    for label, eager in (('eager', True), ('lazy', False)):
+        samples = [probe(eager, database_url) for _ in range(runs)]
+        median = {key: statistics.median(sample['timings'][key] for sample in samples)
+                  for key in samples[0]['timings']}
+        print(f"{label:<6} {median['import'] * 1e3:>7.0f}ms {median['create_app'] * 1e3:>9.0f}ms "
+              f"{median['first_crud'] * 1e3:>9.0f}ms {median['ready'] * 1e3:>7.0f}ms "
+              f"{median['first_export'] * 1e3:>11.0f}ms")
+        print(f"       loaded by a CRUD request: {', '.join(samples[0]['loaded_after_crud']) or 'none of ' + ', '.join(HEAVY)}")
+
+    print('\nslowest imports at start-up (lazy):')
+    for milliseconds, name in slowest_imports(database_url):
+        print(f"  {milliseconds:>7.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Laser toolpath optimisation: cut and rapid travel length before and after
+
+Boards are tiled edge to edge (so neighbours share outline edges) and
+listed in random order, as a client would post them. Reports the estimated
+cut and travel length of the plain DXF order against the merged and
+ordered toolpath, the time the optimisation takes, and checks that every
+original edge is still covered by a merged one.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/bench_toolpath.py
+"""
+import os
+import sys
+import math
+import random
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services import toolpath
+
+SIZES = [50, 500, 2000]
+CELL = (60.0, 40.0)
+
+
+def tiled_layout(count, seed=0):
+    rng = random.Random(seed)
+    columns = math.ceil(math.sqrt(count))
+    boards = []
+    for i in range(count):
+        x, y = (i % columns) * CELL[0], (i // columns) * CELL[1]
+        boards.append({'name': f'Board {i}', 'x': x, 'y': y, 'width': CELL[0], 'height': CELL[1],
+                       'holes': [{'x': x + dx, 'y': y + dy, 'diameter': 3.0}
+                                 for dx in (5.0, CELL[0] - 5.0) for dy in (5.0, CELL[1] - 5.0)]})
+    rng.shuffle(boards)
+    rows = math.ceil(count / columns)
+    return boards, columns * CELL[0], rows * CELL[1]
+
+
+def covered(segment, merged):
+    """Midpoint of segment lies on some merged line"""
+    mx, my = (segment.start[0] + segment.end[0]) / 2, (segment.start[1] + segment.end[1]) / 2
+    for cut in merged:
+        if cut.kind != 'line':
+            continue
+        (x0, y0), (x1, y1) = cut.start, cut.end
+        cross = (x1 - x0) * (my - y0) - (y1 - y0) * (mx - x0)
+        if abs(cross) < 1e-6 and min(x0, x1) - 1e-6 <= mx <= max(x0, x1) + 1e-6 \
+                and min(y0, y1) - 1e-6 <= my <= max(y0, y1) + 1e-6:
+            return True
+    return False
+
+
+def main():
+    print(f"{'boards':>6} {'entities':>15} {'cut m':>15} {'travel m':>15} {'time':>8}")
+    for count in SIZES:
+        boards, width, height = tiled_layout(count, seed=count)
+        before = toolpath.layout_cuts(boards, width, height)
+        start = time.perf_counter()
+        after = toolpath.optimise(before)
+        elapsed = time.perf_counter() - start
+        stats = toolpath.report(before, after)
+
+        if count <= 500:
+            lines = [cut for cut in after if cut.kind == 'line']
+            assert all(covered(cut, lines) for cut in before if cut.kind == 'line')
+        assert stats['cut_length_after'] <= stats['cut_length_before']
+
+        print(f"{count:>6} {stats['entities_before']:>7} -> {stats['entities_after']:<5} "
+              f"{stats['cut_length_before'] / 1e3:>6.1f} -> {stats['cut_length_after'] / 1e3:<5.1f} "
+              f"{stats['travel_length_before'] / 1e3:>6.1f} -> {stats['travel_length_after'] / 1e3:<5.1f} "
+              f"{elapsed:>7.2f}s")
+
+
+if __name__ == '__main__':
+    main()
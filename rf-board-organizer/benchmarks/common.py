@@ -0,0 +1,48 @@
+"""Shared helpers for the benchmark scripts: scratch app and synthetic boards"""
+import os
+import sys
+import random
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from src.models.user import db
+from src.routes.board import board_bp
+from src.services import library, metrics
+from src.services.storage import add_missing_columns, configure_storage
+
+
+def make_app(path, tuned=True, instrumented=False):
+    """Flask app with the board routes on a scratch SQLite database"""
+    app = Flask(__name__)
+    configure_storage(app, f'sqlite:///{path}', tuned=tuned)
+    app.register_blueprint(board_bp, url_prefix='/api')
+    if instrumented:
+        metrics.init_app(app)
+    with app.app_context():
+        db.create_all()
+        add_missing_columns()
+        library.ensure_search_index()
+    return app
+
+
+def synthetic_rows(count, seed=0, invalid_ratio=0.0):
+    """Board library rows with realistic dimensions; a fraction made invalid on request"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        width, height = round(rng.uniform(20, 100), 2), round(rng.uniform(15, 80), 2)
+        row = {
+            'name': f'Module {i}',
+            'width': width,
+            'height': height,
+            'mounting_holes_x': rng.choice([1, 2]),
+            'mounting_holes_y': rng.choice([1, 2]),
+            'hole_spacing_x': round(width * 0.8, 2),
+            'hole_spacing_y': round(height * 0.8, 2),
+            'hole_diameter': rng.choice([2.5, 3.0, 3.5]),
+            'standoff_height': rng.choice([3.0, 5.0, 10.0])
+        }
+        if rng.random() < invalid_ratio:
+            row['width'] = -1
+        rows.append(row)
+    return rows
@@ -0,0 +1,315 @@
+"""Endpoint benchmark and regression suite
+
+Drives the board routes through the Flask test client (no network) against
+scratch SQLite databases holding synthetic board libraries and layouts of
+10 to 10,000 boards. Extraction uses a FakeExtractor, so no API key is
+needed. Results are JSON: save one as a baseline, then compare later runs
+against it; compare exits non-zero when any case slows down by more than
+the threshold.
+
+Run from the rf-board-organizer directory:
+    python benchmarks/suite.py run [--sizes 10 100] [--cases get_boards generate_dxf] [--output FILE]
+    python benchmarks/suite.py baseline [--name NAME]
+    python benchmarks/suite.py compare BASELINE [CURRENT] [--threshold 0.15] [--metric min_ms]
+
+Baselines are machine specific; keep them next to the machine that made them.
+"""
+import os
+import sys
+import argparse
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+
+from common import make_app, synthetic_rows
+from src.models.board import Board, Layout, LayoutPlacement, db
+from src.routes.board import artifact_cache
+from src.services import extraction
+
+SIZES = [10, 100, 1000, 10000]
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+# Each case is timed for at least MIN_TIME seconds and MIN_ITERATIONS calls
+MIN_TIME = 0.5
+MIN_ITERATIONS = 5
+MAX_ITERATIONS = 200
+
+# Changes smaller than this are noise whatever their ratio
+NOISE_FLOOR_MS = 0.5
+DEFAULT_THRESHOLD = 0.15
+
+
+def seed(app, size):
+    """size boards, all placed on one layout; returns the layout id"""
+    rng = random.Random(size)
+    with app.app_context():
+        board_ids = db.session.scalars(insert(Board).returning(Board.id), synthetic_rows(size, seed=size)).all()
+        side = 100.0 * size ** 0.5 + 100
+        layout = Layout(name=f'Suite {size}', base_width=side, base_height=side)
+        db.session.add(layout)
+        db.session.flush()
+        db.session.execute(insert(LayoutPlacement), [
+            {'layout_id': layout.id, 'board_id': board_id, 'x': rng.uniform(0, layout.base_width - 100),
+             'y': rng.uniform(0, layout.base_height - 100), 'rotation': rng.choice([0, 90, 180, 270])}
+            for board_id in board_ids
+        ])
+        db.session.commit()
+        return layout.id
+
+
+def expect(response, *statuses):
+    assert response.status_code in (statuses or (200,)), (response.status_code, response.get_data()[:200])
+    response.get_data()
+
+
+# Cases: name -> (scales with layout size, setup(client, layout_id) -> call())
+
+def case_get_boards(client, layout_id):
+    return lambda: expect(client.get('/api/boards'))
+
+
+def case_get_boards_page(client, layout_id):
+    return lambda: expect(client.get('/api/boards?limit=100&fields=id,name,width,height'))
+
+
+def case_create_board(client, layout_id):
+    # Outlines larger than any synthetic library board and 2 mm apart, so no row is a
+    # near-duplicate and every call times the duplicate check and the insert
+    rows = iter([{**row, 'width': 150.0 + 2 * i, 'height': 120.0, 'hole_spacing_x': round((150.0 + 2 * i) * 0.8, 2),
+                  'hole_spacing_y': 96.0}
+                 for i, row in enumerate(synthetic_rows(MAX_ITERATIONS + 1, seed=1))])
+    return lambda: expect(client.post('/api/boards', json=next(rows)), 201)
+
+
+def case_get_layout(client, layout_id):
+    return lambda: expect(client.get(f'/api/layouts/{layout_id}'))
+
+
+def _dxf_body(client, layout_id, dxf_format):
+    layout = client.get(f'/api/layouts/{layout_id}/geometry').json
+    return {'boards': layout['items'], 'base_width': layout['base_width'],
+            'base_height': layout['base_height'], 'format': dxf_format}
+
+
+def case_generate_dxf(client, layout_id):
+    body = _dxf_body(client, layout_id, 'blocks')
+
+    def call():
+        artifact_cache.clear()
+        expect(client.post('/api/generate-dxf', json=body))
+    return call
+
+
+def case_generate_dxf_cached(client, layout_id):
+    body = _dxf_body(client, layout_id, 'blocks')
+    return lambda: expect(client.post('/api/generate-dxf', json=body))
+
+
+def case_generate_dxf_r12(client, layout_id):
+    body = _dxf_body(client, layout_id, 'r12')
+    return lambda: expect(client.post('/api/generate-dxf', json=body))
+
+
+def case_generate_stl(client, layout_id):
+    def call():
+        artifact_cache.clear()
+        expect(client.post('/api/generate-stl/suite', json={'hole_diameter': 3.0, 'standoff_height': 10.0,
+                                                           'segments': 64}))
+    return call
+
+
+def case_generate_l_bracket(client, layout_id):
+    def call():
+        artifact_cache.clear()
+        expect(client.post('/api/generate-l-bracket/suite', json={'board_width': 50.0, 'board_height': 30.0,
+                                                                 'standoff_height': 10.0}))
+    return call
+
+
+def case_extract_dimensions(client, layout_id):
+    """Stubbed model; a new image every call, so each one misses the result cache"""
+    counter = iter(range(10 ** 9))
+
+    def call():
+        image = b'\x89PNG suite image %d' % next(counter)
+        expect(client.post('/api/extract-dimensions', data={'image': (io.BytesIO(image), 'board.png')},
+                           content_type='multipart/form-data'))
+    return call
+
+
+def case_extract_dimensions_cached(client, layout_id):
+    data = b'\x89PNG suite cached image'
+
+    def call():
+        expect(client.post('/api/extract-dimensions', data={'image': (io.BytesIO(data), 'board.png')},
+                           content_type='multipart/form-data'))
+    return call
+
+
+CASES = {
+    'get_boards': (True, case_get_boards),
+    'get_boards_page': (True, case_get_boards_page),
+    'create_board': (True, case_create_board),
+    'get_layout': (True, case_get_layout),
+    'generate_dxf': (True, case_generate_dxf),
+    'generate_dxf_cached': (True, case_generate_dxf_cached),
+    'generate_dxf_r12': (True, case_generate_dxf_r12),
+    'generate_stl': (False, case_generate_stl),
+    'generate_l_bracket': (False, case_generate_l_bracket),
+    'extract_dimensions': (False, case_extract_dimensions),
+    'extract_dimensions_cached': (False, case_extract_dimensions_cached),
+}
+
+
+def time_call(call):
+    call()  # warm-up: imports, first-query planning, caches that should be warm
+    times = []
+    started = time.perf_counter()
+    while len(times) < MAX_ITERATIONS and (len(times) < MIN_ITERATIONS or time.perf_counter() - started < MIN_TIME):
+        start = time.perf_counter()
+        call()
+        times.append((time.perf_counter() - start) * 1e3)
+    times.sort()
+    return {
+        'median_ms': round(statistics.median(times), 4),
+        'p90_ms': round(times[int(0.9 * (len(times) - 1))], 4),
+        'min_ms': round(times[0], 4),
+        'iterations': len(times),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, cases):
+    extraction.set_extractor(extraction.FakeExtractor())
+    results = {}
+    for index, size in enumerate(sizes):
+        with tempfile.TemporaryDirectory() as scratch:
+            app = make_app(os.path.join(scratch, 'suite.db'))
+            client = app.test_client()
+            layout_id = seed(app, size)
+            for name in cases:
+                scales, setup = CASES[name]
+                if not scales and index > 0:
+                    continue
+                key = f'{name}@{size}' if scales else name
+                results[key] = time_call(setup(client, layout_id))
+                print(f"  {key:<34} {results[key]['median_ms']:>10.2f} ms median "
+                      f"({results[key]['iterations']} runs)", flush=True)
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'machine': f'{platform.system()} {platform.machine()} {os.cpu_count()} cpu',
+            'sizes': sizes,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, metric='median_ms'):
+    """Rows of (case, baseline ms, current ms, ratio, status) and whether anything regressed
+
+    Baseline entries for cases the current run did not include are skipped.
+    """
+    rows = []
+    regressed = False
+    ran = {key.split('@')[0] for key in current['results']}
+    for key in sorted(set(baseline['results']) | set(current['results'])):
+        if key.split('@')[0] not in ran:
+            continue
+        old = baseline['results'].get(key, {}).get(metric)
+        new = current['results'].get(key, {}).get(metric)
+        if old is None or new is None:
+            rows.append((key, old, new, None, 'new' if old is None else 'missing'))
+            continue
+        ratio = new / old if old else float('inf')
+        if ratio > 1 + threshold and new - old > NOISE_FLOOR_MS:
+            status = 'REGRESSION'
+            regressed = True
+        elif ratio < 1 - threshold and old - new > NOISE_FLOOR_MS:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((key, old, new, ratio, status))
+    return rows, regressed
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(data, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    print(f"wrote {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for name in ('run', 'baseline', 'compare'):
+        command = commands.add_parser(name)
+        if name == 'compare':
+            command.add_argument('--sizes', type=int, nargs='+', help="layout sizes (default: the baseline's)")
+        else:
+            command.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+        command.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES))
+        if name == 'run':
+            command.add_argument('--output', help='write results to this JSON file')
+        if name == 'baseline':
+            command.add_argument('--name', default='default', help=f'saved as {BASELINE_DIR}/NAME.json')
+        if name == 'compare':
+            command.add_argument('baseline', help='baseline JSON (a path, or a name under baselines/)')
+            command.add_argument('current', nargs='?', help='results JSON; runs the suite when omitted')
+            command.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                 help='relative slowdown that counts as a regression')
+            command.add_argument('--metric', choices=['median_ms', 'min_ms', 'p90_ms'], default='median_ms',
+                                 help='statistic to compare; min_ms is steadier on a busy machine')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        results = run(args.sizes, args.cases)
+        if args.output:
+            save(results, args.output)
+    elif args.command == 'baseline':
+        save(run(args.sizes, args.cases), os.path.join(BASELINE_DIR, f'{args.name}.json'))
+    else:
+        baseline_path = args.baseline
+        if not os.path.exists(baseline_path):
+            baseline_path = os.path.join(BASELINE_DIR, f'{args.baseline}.json')
+        baseline = load(baseline_path)
+        current = load(args.current) if args.current else run(args.sizes or baseline['meta']['sizes'], [
+            name for name in args.cases if any(key.split('@')[0] == name for key in baseline['results'])])
+        rows, regressed = compare(baseline, current, args.threshold, args.metric)
+
+        print(f"\n{'case':<34} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}  status")
+        for key, old, new, ratio, status in rows:
+            print(f"{key:<34} {old if old is not None else '-':>12} {new if new is not None else '-':>12} "
+                  f"{f'{ratio:.2f}x' if ratio is not None else '-':>7}  {status}")
+        if regressed:
+            print(f"\nregressions beyond {args.threshold:.0%} found")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
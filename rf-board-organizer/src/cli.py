@@ -0,0 +1,212 @@
+"""Command-line tools that work on the database directly, without the web app
+
+    python -m src.cli export [--out DIR] [--layout ID ...] [--workers N] [--force]
+"""
+import os
+import sys
+# Same as src/main.py: make `src` importable however the module is started
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import struct
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from flask import Flask
+from werkzeug.utils import secure_filename
+
+MANIFEST_NAME = '.export-manifest.json'
+
+OUTPUTS = ('plate', 'standoffs', 'brackets')
+
+
+def write_atomic(path, data):
+    """Write data to path through a temporary file, so a crash never leaves half a file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f'{path}.partial'
+    with open(partial, 'wb') as out:
+        out.write(data)
+    os.replace(partial, path)
+    return len(data)
+
+
+def write_plate(path, builder, boards, base_width, base_height):
+    from src.services import export
+    return write_atomic(path, export.dxf_bytes(getattr(export, builder)(boards, base_width, base_height)))
+
+
+def write_standoffs(path, holes, segments, chord_tolerance):
+    from src.services import fabrication
+    count, records = fabrication.standoff_records(holes, segments, chord_tolerance)
+    return write_atomic(path, fabrication.STL_HEADER + struct.pack('<I', count) + records)
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME)) as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError):
+        return {}
+
+
+def plan_outputs(layouts, args, fingerprint):
+    """Every output file as (kind, relative path, input key, task arguments)
+
+    Brackets are keyed by their (width, height, standoff height) spec, so a
+    board type on many layouts is built once.
+    """
+    from src.services import fabrication
+    from src.services.cache import cache_key
+    from src.services.export import DXF_BUILDERS
+    from src.services.layouts import layout_items
+
+    outputs = []
+    for layout in layouts:
+        # As in the routes, a layout without placements stands for every board
+        items = layout_items(layout)
+        plan = fabrication.plan_for_layout_items(items, layout.base_width, layout.base_height,
+                                                 include_brackets='brackets' in args.only)
+        folder = f"{layout.id}-{secure_filename(layout.name) or 'layout'}"
+        if 'plate' in args.only:
+            params = {'boards': plan['boards'], 'base_width': plan['base_width'],
+                      'base_height': plan['base_height'], 'format': args.dxf_format}
+            outputs.append(('plate', f'{folder}/plate.dxf', cache_key('dxf', {**params, 'generator': fingerprint}),
+                            (DXF_BUILDERS[args.dxf_format], plan['boards'], plan['base_width'],
+                             plan['base_height'])))
+        if 'standoffs' in args.only and len(plan['holes']):
+            params = {'holes': plan['holes'].tolist(), 'segments': args.segments,
+                      'chord_tolerance': args.chord_tolerance, 'generator': fingerprint}
+            outputs.append(('standoffs', f'{folder}/standoffs.stl', cache_key('standoffs', params),
+                            (plan['holes'], args.segments, args.chord_tolerance)))
+        for spec, names in plan['brackets'].items():
+            key = cache_key('l_bracket', {'spec': spec, 'generator': fingerprint})
+            outputs.extend(('brackets', f'{folder}/{name}', key, spec) for name in names)
+    return outputs
+
+
+def run_export(args):
+    from src.models.board import Layout, db
+    from src.services import fabrication
+    from src.services.cache import generator_fingerprint
+    from src.services.storage import configure_storage, database_url
+
+    started = time.perf_counter()
+    app = Flask(__name__)
+    configure_storage(app, args.database_url or database_url())
+    with app.app_context():
+        query = Layout.query.order_by(Layout.id)
+        if args.layout:
+            query = query.filter(Layout.id.in_(args.layout))
+        layouts = query.all()
+        fingerprint = generator_fingerprint()
+        outputs = plan_outputs(layouts, args, fingerprint)
+        db.engine.dispose()
+    planned = time.perf_counter()
+
+    manifest = {} if args.force else load_manifest(args.out)
+    stale = [output for output in outputs
+             if manifest.get(output[1]) != output[2] or not os.path.exists(os.path.join(args.out, output[1]))]
+    counts = defaultdict(lambda: defaultdict(int))
+    for kind, *_ in outputs:
+        counts[kind]['files'] += 1
+    failures = []
+
+    workers = args.workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        brackets = defaultdict(list)
+        for kind, path, key, task in stale:
+            target = os.path.join(args.out, path)
+            if kind == 'plate':
+                futures[executor.submit(write_plate, target, *task)] = (kind, [(path, key)])
+            elif kind == 'standoffs':
+                futures[executor.submit(write_standoffs, target, *task)] = (kind, [(path, key)])
+            else:
+                brackets[task].append((path, key))
+        specs = list(brackets)
+        for start in range(0, len(specs), fabrication.BRACKET_CHUNK):
+            chunk = specs[start:start + fabrication.BRACKET_CHUNK]
+            futures[executor.submit(fabrication.bracket_stls, chunk)] = ('brackets', [brackets[s] for s in chunk])
+
+        for future in as_completed(futures):
+            kind, targets = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                paths = [path for path, _ in targets] if kind != 'brackets' else [
+                    path for group in targets for path, _ in group]
+                failures.extend((path, e) for path in paths)
+                counts[kind]['failed'] += len(paths)
+                continue
+            if kind == 'brackets':
+                # One build per spec, written wherever that board type appears
+                written = [(path, key, write_atomic(os.path.join(args.out, path), data))
+                           for group, data in zip(targets, result) for path, key in group]
+            else:
+                written = [(targets[0][0], targets[0][1], result)]
+            for path, key, size in written:
+                manifest[path] = key
+                counts[kind]['written'] += 1
+                counts[kind]['bytes'] += size
+
+    os.makedirs(args.out, exist_ok=True)
+    write_atomic(os.path.join(args.out, MANIFEST_NAME), json.dumps(manifest, indent=1, sort_keys=True).encode())
+    elapsed = time.perf_counter() - started
+    report(counts, failures, len(layouts), args.out, workers, planned - started, elapsed)
+    return 1 if failures else 0
+
+
+def report(counts, failures, layouts, out_dir, workers, planning, elapsed):
+    print(f'{layouts} layouts -> {out_dir} with {workers} workers in {elapsed:.2f} s '
+          f'(reading and planning {planning:.2f} s)')
+    print(f"  {'output':<10} {'files':>7} {'written':>8} {'skipped':>8} {'failed':>7} {'MB':>9}")
+    total = defaultdict(int)
+    for kind in OUTPUTS:
+        if kind not in counts:
+            continue
+        row = counts[kind]
+        skipped = row['files'] - row['written'] - row['failed']
+        print(f"  {kind:<10} {row['files']:>7} {row['written']:>8} {skipped:>8} {row['failed']:>7} "
+              f"{row['bytes'] / 1e6:>9.2f}")
+        for field, value in row.items():
+            total[field] += value
+    print(f"  {total['written']} files written: {total['written'] / elapsed:.1f} files/s, "
+          f"{total['bytes'] / 1e6 / elapsed:.2f} MB/s")
+    for path, error in failures[:20]:
+        print(f'  failed {path}: {error}', file=sys.stderr)
+
+
+def main(argv=None):
+    import dotenv
+    dotenv.load_dotenv()
+
+    parser = argparse.ArgumentParser(prog='python -m src.cli', description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help='write DXF/STL files for saved layouts',
+                                 description='Write plate.dxf, standoffs.stl and brackets/*.stl for each layout '
+                                             'into OUT/<id>-<name>/, skipping files whose inputs are unchanged '
+                                             'since the last run.')
+    export.add_argument('--out', default='exports', help='output directory (default: exports)')
+    export.add_argument('--layout', type=int, action='append', help='layout id to export (repeatable; default all)')
+    export.add_argument('--only', default=','.join(OUTPUTS),
+                        type=lambda value: [kind.strip() for kind in value.split(',')],
+                        help=f"comma-separated subset of {', '.join(OUTPUTS)}")
+    export.add_argument('--dxf-format', default='blocks', choices=('blocks', 'flat', 'toolpath'))
+    export.add_argument('--segments', type=int, help='standoff cylinder segments')
+    export.add_argument('--chord-tolerance', type=float, help='standoff chord tolerance in mm (instead of segments)')
+    export.add_argument('--workers', type=int, help='worker processes (default: one per CPU)')
+    export.add_argument('--force', action='store_true', help='rebuild everything')
+    export.add_argument('--database-url', help='defaults to DATABASE_URL or the bundled SQLite file')
+
+    args = parser.parse_args(argv)
+    if args.command == 'export':
+        unknown = set(args.only) - set(OUTPUTS)
+        if unknown:
+            parser.error(f"unknown outputs: {', '.join(sorted(unknown))}")
+        return run_export(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,45 +4,94 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from flask import Flask, send_from_directory
-from flask_cors import CORS
-from src.models.user import db
-from src.routes.user import user_bp
-from src.routes.board import board_bp
-# Import models to ensure they are registered with SQLAlchemy
-from src.models.board import Board, Layout
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-
-# Enable CORS for all routes
-CORS(app)
-
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(board_bp, url_prefix='/api')
-
-# uncomment if you need to use database
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-with app.app_context():
-    db.create_all()
-
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
+from src.services import lazy
+
+STATIC_FOLDER = os.path.join(os.path.dirname(__file__), 'static')
+
+
+def create_app(database_url=None):
+    """Build the Flask app
+
+    Nothing heavy happens at import: .env is read and the routes are imported
+    here, and the export/extraction backends load on first use. Environment:
+    CREATE_TABLES=0 skips creating tables, columns and indexes (run
+    `flask --app src.main init-db` once instead), PRELOAD_BACKENDS=0 turns off
+    importing those backends in a background thread after start-up.
+    """
+    import dotenv
+    dotenv.load_dotenv()
+
+    from flask_cors import CORS
+    from src.models.user import db
+    from src.routes.user import user_bp
+    from src.routes.board import board_bp
+    # Import models to ensure they are registered with SQLAlchemy
+    from src.models.board import Board, Layout, LayoutPlacement
+    from src.models.extraction import ExtractionResult
+    from src.services import extraction, library, metrics
+    from src.services.storage import add_missing_columns, configure_storage
+
+    app = Flask(__name__, static_folder=STATIC_FOLDER)
+    app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
+
+    # Enable CORS for all routes
+    CORS(app)
+
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(board_bp, url_prefix='/api')
+
+    # DATABASE_URL overrides the bundled SQLite file; SQLite connections get WAL and a busy timeout
+    configure_storage(app, database_url)
+    if os.getenv('CREATE_TABLES', '1') == '1':
+        with app.app_context():
+            db.create_all()
+            add_missing_columns()
+            library.ensure_search_index()
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Create any missing tables, columns and search indexes"""
+        db.create_all()
+        add_missing_columns()
+        library.ensure_search_index()
+
+    # Per-route latency histograms at /metrics; X-Profile: $PROFILE_TOKEN profiles one request
+    metrics.init_app(app)
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        static_folder_path = app.static_folder
+        if static_folder_path is None:
+                return "Static folder not configured", 404
+
+        if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
+            return send_from_directory(static_folder_path, path)
         else:
-            return "index.html not found", 404
+            index_path = os.path.join(static_folder_path, 'index.html')
+            if os.path.exists(index_path):
+                return send_from_directory(static_folder_path, 'index.html')
+            else:
+                return "index.html not found", 404
+
+    if os.getenv('PRELOAD_BACKENDS', '1') == '1':
+        backends = lazy.EXPORT_BACKENDS
+        api_key = os.getenv('GOOGLE_API_KEY')
+        if api_key and api_key != extraction.PLACEHOLDER_API_KEY:
+            backends += lazy.EXTRACTION_BACKENDS
+        lazy.preload(backends)
+
+    return app
+
+
+def __getattr__(name):
+    # `src.main:app` and `from src.main import app` keep working; the app is built on first access
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5004, debug=True)
+    create_app().run(host='0.0.0.0', port=5004, debug=os.getenv('FLASK_DEBUG', '1') == '1', threaded=True)
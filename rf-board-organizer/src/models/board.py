@@ -18,22 +18,21 @@ class Board(db.Model):
     position_y = db.Column(db.Float, default=0.0)
     rotation = db.Column(db.Integer, default=0)  # 0, 90, 180, 270 degrees
     
+    # Geometric signature for pattern lookups and duplicate checks (see services/library.py):
+    # hole pattern first, then the outline, each rounded to its bucket
+    __table_args__ = (
+        db.Index('ix_board_signature', mounting_holes_x, mounting_holes_y, db.func.round(hole_spacing_x),
+                 db.func.round(hole_spacing_y), db.func.round(hole_diameter, 1), db.func.round(width),
+                 db.func.round(height)),
+    )
+    
+    # Library spec columns returned by GET /boards, in response order
+    SPEC_FIELDS = ('id', 'name', 'width', 'height', 'mounting_holes_x', 'mounting_holes_y',
+                   'hole_spacing_x', 'hole_spacing_y', 'hole_diameter', 'standoff_height')
+    POSITION_FIELDS = ('position_x', 'position_y', 'rotation')
+    
     def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'width': self.width,
-            'height': self.height,
-            'mounting_holes_x': self.mounting_holes_x,
-            'mounting_holes_y': self.mounting_holes_y,
-            'hole_spacing_x': self.hole_spacing_x,
-            'hole_spacing_y': self.hole_spacing_y,
-            'hole_diameter': self.hole_diameter,
-            'standoff_height': self.standoff_height,
-            'position_x': self.position_x,
-            'position_y': self.position_y,
-            'rotation': self.rotation
-        }
+        return {field: getattr(self, field) for field in self.SPEC_FIELDS + self.POSITION_FIELDS}
 
 class Layout(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -41,6 +40,11 @@ class Layout(db.Model):
     base_width = db.Column(db.Float, nullable=False)  # Base plate width
     base_height = db.Column(db.Float, nullable=False)  # Base plate height
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    # Bumped by every change to the placements (see services/layout_sync.py)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    
+    placements = db.relationship('LayoutPlacement', backref='layout', lazy='select',
+                                 cascade='all, delete-orphan', passive_deletes=True)
     
     def to_dict(self):
         return {
@@ -48,6 +52,33 @@ class Layout(db.Model):
             'name': self.name,
             'base_width': self.base_width,
             'base_height': self.base_height,
+            'version': self.version,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class LayoutPlacement(db.Model):
+    """One board placed on one layout; a board may appear on many layouts, or several times on one"""
+    id = db.Column(db.Integer, primary_key=True)
+    layout_id = db.Column(db.Integer, db.ForeignKey('layout.id', ondelete='CASCADE'), nullable=False)
+    board_id = db.Column(db.Integer, db.ForeignKey('board.id', ondelete='CASCADE'), nullable=False)
+    x = db.Column(db.Float, nullable=False, default=0.0)
+    y = db.Column(db.Float, nullable=False, default=0.0)
+    rotation = db.Column(db.Integer, nullable=False, default=0)  # 0, 90, 180, 270 degrees
+    
+    board = db.relationship('Board', lazy='joined')
+    
+    __table_args__ = (
+        db.Index('ix_layout_placement_layout_id', 'layout_id'),
+        db.Index('ix_layout_placement_board_id', 'board_id'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'layout_id': self.layout_id,
+            'board_id': self.board_id,
+            'x': self.x,
+            'y': self.y,
+            'rotation': self.rotation
+        }
+
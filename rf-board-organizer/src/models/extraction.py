@@ -0,0 +1,41 @@
+import json
+from datetime import datetime, timedelta, timezone
+from src.models.user import db
+
+class ExtractionResult(db.Model):
+    """Cached dimension extraction, keyed by a hash of the image and prompt"""
+    key = db.Column(db.String(64), primary_key=True)  # sha256 hex
+    dimensions = db.Column(db.Text, nullable=False)  # JSON object
+    raw_response = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp(), index=True)
+
+    @staticmethod
+    def _cutoff(ttl):
+        return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=ttl)
+
+    @classmethod
+    def lookup(cls, key, ttl):
+        """Cached result for key if it is younger than ttl seconds"""
+        result = db.session.get(cls, key)
+        if result is None or result.created_at < cls._cutoff(ttl):
+            return None
+        return result
+
+    @classmethod
+    def store(cls, key, dimensions, raw_response, ttl):
+        """Insert or refresh a result and drop entries older than ttl seconds"""
+        cls.query.filter(cls.created_at < cls._cutoff(ttl)).delete()
+        db.session.merge(cls(
+            key=key,
+            dimensions=json.dumps(dimensions),
+            raw_response=raw_response,
+            created_at=datetime.now(timezone.utc).replace(tzinfo=None)
+        ))
+        db.session.commit()
+
+    def to_dict(self):
+        return {
+            'success': True,
+            'dimensions': json.loads(self.dimensions),
+            'raw_response': self.raw_response
+        }
@@ -1,46 +1,149 @@
-from flask import Blueprint, jsonify, request, send_file
-from src.models.board import Board, Layout, db
-import ezdxf
-import numpy as np
-from stl import mesh
-import os
-import tempfile
+from flask import Blueprint, Response, current_app, jsonify, request, send_file, stream_with_context
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import contains_eager
+from src.models.board import Board, Layout, LayoutPlacement, db
+from src.services import extraction, layout_sync, library, metrics, serialization
+from src.services.cache import ArtifactCache, cache_key, generator_fingerprint, key_etag
+from src.services.jobs import JobManager
+from src.services.layouts import layout_items
+from src.services.lazy import LazyModule
+import io
 import math
-import google.generativeai as genai
-import json
-import re
+import os
+from urllib.parse import urlencode
 from werkzeug.utils import secure_filename
-import dotenv
 
-dotenv.load_dotenv()
+# Geometry and export backends (NumPy, ezdxf, numpy-stl) load on first use
+# or from create_app's background preload, not when this module is imported
+board_import = LazyModule('src.services.board_import')
+export = LazyModule('src.services.export')
+fabrication = LazyModule('src.services.fabrication')
+geometry = LazyModule('src.services.geometry')
+packing = LazyModule('src.services.packing')
+preview = LazyModule('src.services.preview')
+stacking = LazyModule('src.services.stacking')
+toolpath = LazyModule('src.services.toolpath')
+validation = LazyModule('src.services.validation')
 
 board_bp = Blueprint('board', __name__)
 
-# Configure Gemini API (you'll need to set the API key)
-# For now, we'll use a placeholder - in production, this should be an environment variable
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-if GOOGLE_API_KEY != 'YOUR_GOOGLE_API_KEY_HERE':
-    genai.configure(api_key=GOOGLE_API_KEY)
+# Identical dimension extractions in flight at the same time share one model call
+extraction_flight = extraction.SingleFlight()
+
+# Background batch extraction (bounded pool, rate limited, retried)
+extraction_jobs = JobManager()
+MAX_BATCH_IMAGES = int(os.getenv('MAX_BATCH_IMAGES', 200))
+
+# Generated DXF/STL files keyed by a hash of their parameters, optionally spilling to disk
+artifact_cache = ArtifactCache(
+    max_bytes=int(os.getenv('ARTIFACT_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    spill_dir=os.getenv('ARTIFACT_CACHE_DIR')
+)
+
+# Largest page GET /boards serves at once
+MAX_PAGE_SIZE = 10000
+
+# Longest search POST /layouts/stack may ask for, in seconds
+MAX_STACK_BUDGET = float(os.getenv('MAX_STACK_BUDGET', 10))
+
+# Layouts with more boards than this are streamed as R12 DXF rather than cached
+DXF_STREAM_THRESHOLD = int(os.getenv('DXF_STREAM_THRESHOLD', 1000))
 
 @board_bp.route('/boards', methods=['GET'])
 def get_boards():
-    boards = Board.query.all()
-    return jsonify([{
-        'id': board.id,
-        'name': board.name,
-        'width': board.width,
-        'height': board.height,
-        'mounting_holes_x': board.mounting_holes_x,
-        'mounting_holes_y': board.mounting_holes_y,
-        'hole_spacing_x': board.hole_spacing_x,
-        'hole_spacing_y': board.hole_spacing_y,
-        'hole_diameter': board.hole_diameter,
-        'standoff_height': board.standoff_height
-    } for board in boards])
+    """List boards, optionally paginated and projected
+    
+    Query parameters: limit and after_id for keyset pagination (ordered by
+    id; the next page's after_id is sent in X-Next-After-Id and a Link
+    header), fields to return a comma-separated subset of columns. Without
+    limit every board is returned.
+    """
+    fields = request.args.get('fields')
+    fields = [field.strip() for field in fields.split(',')] if fields else list(Board.SPEC_FIELDS)
+    unknown = [field for field in fields if field not in Board.SPEC_FIELDS + Board.POSITION_FIELDS]
+    if unknown:
+        return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+    limit = request.args.get('limit', type=int)
+    after_id = request.args.get('after_id', type=int)
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+    
+    # The id is always selected for the cursor, even if not projected
+    columns = [getattr(Board, field) for field in fields]
+    query = select(Board.id, *columns).order_by(Board.id)
+    if after_id is not None:
+        query = query.where(Board.id > after_id)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    # Plain tuples, no ORM objects
+    rows = db.session.execute(query).all()
+    
+    headers = {}
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_after = rows[-1][0]
+        headers['X-Next-After-Id'] = str(next_after)
+        headers['Link'] = f'<{request.base_url}?{urlencode({**request.args, "after_id": next_after})}>; rel="next"'
+    
+    return serialization.json_response([dict(zip(fields, row[1:])) for row in rows], headers=headers)
+
+@board_bp.route('/boards/search', methods=['GET'])
+def search_boards():
+    """Search the board library by name and/or geometric signature
+    
+    Query parameters: q (words matched as prefixes against board names,
+    best matches first), a hole pattern as holes_x, holes_y, spacing_x,
+    spacing_y and optionally diameter, width and height (each matched
+    within tolerance mm, default DUPLICATE_TOLERANCE), plus fields and
+    limit (default 50) as for GET /boards.
+    """
+    fields = request.args.get('fields')
+    fields = [field.strip() for field in fields.split(',')] if fields else list(Board.SPEC_FIELDS)
+    unknown = [field for field in fields if field not in Board.SPEC_FIELDS + Board.POSITION_FIELDS]
+    if unknown:
+        return jsonify({'error': f"Unknown fields: {', '.join(unknown)}"}), 400
+    limit = request.args.get('limit', 50, type=int)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+    
+    params = {'mounting_holes_x': 'holes_x', 'mounting_holes_y': 'holes_y', 'hole_spacing_x': 'spacing_x',
+              'hole_spacing_y': 'spacing_y', 'hole_diameter': 'diameter', 'width': 'width', 'height': 'height'}
+    spec = {field: request.args.get(param, type=float) for field, param in params.items()}
+    spec = {field: value for field, value in spec.items() if value is not None}
+    if spec and not all(field in spec for field in list(params)[:4]):
+        return jsonify({'error': 'A hole pattern needs holes_x, holes_y, spacing_x and spacing_y'}), 400
+    terms = request.args.get('q', '').strip()
+    if not terms and not spec:
+        return jsonify({'error': 'Give q and/or a hole pattern'}), 400
+    
+    rows = library.search(terms, spec, [getattr(Board, field) for field in fields], limit,
+                          request.args.get('tolerance', library.DUPLICATE_TOLERANCE, type=float))
+    return serialization.json_response([dict(zip(fields, row[1:])) for row in rows])
 
 @board_bp.route('/boards', methods=['POST'])
 def create_board():
-    data = request.json
+    """Add a board to the library
+    
+    Near-duplicates of an existing board (same hole pattern, diameter and
+    outline within DUPLICATE_TOLERANCE, either way round) are refused with
+    409 and their ids, unless the body sets allow_duplicate. name and the
+    numeric signature fields (outline, hole pattern and diameter) are
+    required (400).
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Body must be a JSON object'}), 400
+    missing = [field for field in ('name',) + library.SIGNATURE_FIELDS if data.get(field) is None]
+    if missing:
+        return jsonify({'error': f"Missing fields: {', '.join(missing)}"}), 400
+    invalid = [field for field in library.SIGNATURE_FIELDS
+               if isinstance(data[field], bool) or not isinstance(data[field], (int, float))]
+    if invalid:
+        return jsonify({'error': f"Fields must be numbers: {', '.join(invalid)}"}), 400
+    if not data.get('allow_duplicate'):
+        duplicates = library.find_duplicates(data)
+        if duplicates:
+            return jsonify({'error': 'A near-identical board already exists', 'duplicates': duplicates}), 409
     board = Board(
         name=data['name'],
         width=data['width'],
@@ -56,18 +159,506 @@ def create_board():
     db.session.commit()
     return jsonify({'id': board.id}), 201
 
+@board_bp.route('/boards/bulk', methods=['POST'])
+def bulk_create_boards():
+    """Import many boards from a JSON array, NDJSON or CSV body
+    
+    The body is parsed as a stream and inserted in batched transactions;
+    invalid rows are reported individually and do not stop the import.
+    Near-duplicates of library boards or of earlier rows are skipped and
+    listed, unless ?duplicates=allow.
+    """
+    summary = board_import.import_boards(request.stream, request.content_type,
+                                         skip_duplicates=request.args.get('duplicates') != 'allow')
+    if 'format_error' in summary and not summary['received']:
+        return jsonify({'error': summary['format_error']}), 400
+    return jsonify(summary), 200
+
 @board_bp.route('/boards/<int:board_id>', methods=['DELETE'])
 def delete_board(board_id):
     board = Board.query.get_or_404(board_id)
+    layout_ids = set(db.session.scalars(select(LayoutPlacement.layout_id).where(LayoutPlacement.board_id == board_id)))
+    for layout_id in layout_ids:
+        layout_sync.hub.flush(layout_id)
+    LayoutPlacement.query.filter_by(board_id=board_id).delete()
+    # Layouts that lose placements get a new version (so their previews are redrawn)
+    if layout_ids:
+        db.session.execute(update(Layout).where(Layout.id.in_(layout_ids)).values(version=Layout.version + 1))
     db.session.delete(board)
     db.session.commit()
+    for layout_id in layout_ids:
+        layout_sync.hub.forget(layout_id, write=False)
     return '', 204
 
+@board_bp.route('/layouts', methods=['GET'])
+def get_layouts():
+    layouts = Layout.query.all()
+    return jsonify([layout.to_dict() for layout in layouts])
+
+@board_bp.route('/layouts', methods=['POST'])
+def create_layout():
+    data = request.json
+    layout = Layout(
+        name=data['name'],
+        base_width=data['base_width'],
+        base_height=data['base_height']
+    )
+    db.session.add(layout)
+    db.session.commit()
+    return jsonify(layout.to_dict()), 201
+
+def serialize_layout(layout_id):
+    """Layout with its placements and board specs, loaded in one joined query"""
+    layout_sync.hub.flush(layout_id)
+    rows = db.session.execute(
+        select(Layout, LayoutPlacement, Board)
+        .outerjoin(LayoutPlacement, LayoutPlacement.layout_id == Layout.id)
+        .outerjoin(Board, Board.id == LayoutPlacement.board_id)
+        .where(Layout.id == layout_id)
+        .order_by(LayoutPlacement.id)
+        # Fill placement.board from this join instead of its own joined eager load
+        .options(contains_eager(LayoutPlacement.board))
+    ).all()
+    if not rows:
+        return None
+    result = rows[0][0].to_dict()
+    result['placements'] = [
+        {**placement.to_dict(), 'board': board.to_dict()}
+        for _, placement, board in rows if placement is not None
+    ]
+    return result
+
+@board_bp.route('/layouts/<int:layout_id>', methods=['GET'])
+def get_layout(layout_id):
+    layout = serialize_layout(layout_id)
+    if layout is None:
+        return jsonify({'error': 'Layout not found'}), 404
+    # The version, for If-Match on PUT .../placements
+    response = jsonify(layout)
+    response.set_etag(str(layout['version']))
+    return response
+
+@board_bp.route('/layouts/<int:layout_id>/placements', methods=['PUT'])
+def save_layout_placements(layout_id):
+    """Write a whole layout in one transaction
+    
+    JSON body: placements, a list of {id?, board_id, x, y, rotation}. Entries
+    with an id update that placement, entries without one are inserted and
+    placements left out are removed. name, base_width and base_height may be
+    updated in the same request. With version (or an If-Match header) the
+    write is refused with 409 if the layout has changed since.
+    """
+    layout = Layout.query.get_or_404(layout_id)
+    data = request.json
+    placements = data.get('placements', [])
+    expected_version = data.get('version', request.headers.get('If-Match'))
+    if expected_version is not None:
+        try:
+            expected_version = int(str(expected_version).strip('"'))
+        except ValueError:
+            return jsonify({'error': 'version must be a layout version'}), 400
+    
+    existing = set(db.session.scalars(
+        select(LayoutPlacement.id).where(LayoutPlacement.layout_id == layout_id)))
+    board_ids = {placement['board_id'] for placement in placements}
+    known_boards = set(db.session.scalars(select(Board.id).where(Board.id.in_(board_ids))))
+    if board_ids - known_boards:
+        return jsonify({'error': f'Unknown board ids: {sorted(board_ids - known_boards)}'}), 400
+    
+    updates, inserts = [], []
+    for placement in placements:
+        row = {
+            'board_id': placement['board_id'],
+            'x': float(placement.get('x', 0.0)),
+            'y': float(placement.get('y', 0.0)),
+            'rotation': int(placement.get('rotation', 0)) % 360
+        }
+        if placement.get('id') is None:
+            inserts.append({**row, 'layout_id': layout_id})
+        elif placement['id'] in existing:
+            updates.append({**row, 'id': placement['id']})
+        else:
+            return jsonify({'error': f"Placement {placement['id']} does not belong to this layout"}), 400
+    removed = existing - {row['id'] for row in updates}
+    
+    try:
+        with layout_sync.hub.rewriting(layout_id, expected_version, data.get('client')):
+            for field in ('name', 'base_width', 'base_height'):
+                if field in data:
+                    setattr(layout, field, data[field])
+            # executemany-style statements, committed together
+            if updates:
+                db.session.execute(update(LayoutPlacement), updates)
+            if inserts:
+                db.session.execute(insert(LayoutPlacement), inserts)
+            if removed:
+                db.session.execute(delete(LayoutPlacement).where(LayoutPlacement.id.in_(removed)))
+            db.session.commit()
+    except layout_sync.LayoutConflict as e:
+        return conflict_response(e)
+    
+    return jsonify(serialize_layout(layout_id))
+
+def conflict_response(error):
+    return jsonify({'error': str(error), 'version': error.version, 'changes': error.changes}), 409
+
+@board_bp.route('/layouts/<int:layout_id>/placements', methods=['PATCH'])
+def patch_layout_placements(layout_id):
+    """Apply a small delta to a layout's placements
+    
+    JSON body: version (the layout version the client last saw), ops (a
+    list of {op: move, id, x, y}, {op: rotate, id, rotation, x?, y?},
+    {op: add, board_id, x, y, rotation} or {op: remove, id}) and an optional
+    client id. Applies unless another client changed one of the same
+    placements after version (409, with those changes). Returns the new
+    version and the applied ops, added placements with their ids; the same
+    delta goes out on the layout's event stream.
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data.get('version'), int) or isinstance(data['version'], bool):
+        return jsonify({'error': 'version is required'}), 400
+    try:
+        version, ops = layout_sync.hub.apply(layout_id, data['version'], data.get('ops'), data.get('client'))
+    except LookupError:
+        return jsonify({'error': 'Layout not found'}), 404
+    except layout_sync.DeltaError as e:
+        return jsonify({'error': str(e)}), 400
+    except layout_sync.LayoutConflict as e:
+        return conflict_response(e)
+    return jsonify({'layout_id': layout_id, 'version': version, 'ops': ops})
+
+@board_bp.route('/layouts/<int:layout_id>/events', methods=['GET'])
+def layout_events(layout_id):
+    """Server-sent events with every change to a layout's placements
+    
+    'change' events carry a delta as PATCH applied it; 'reset' events mean
+    the layout was rewritten and should be reloaded. Event ids are layout
+    versions, so a reconnecting EventSource resumes after Last-Event-ID;
+    ?since=version does the same for the first connection. ?client= leaves
+    out that client's own changes.
+    """
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        since = int(since) if since is not None else None
+    except ValueError:
+        return jsonify({'error': 'since must be a layout version'}), 400
+    stream = layout_sync.hub.subscribe(layout_id, since, request.args.get('client'))
+    if stream is None:
+        return jsonify({'error': 'Layout not found'}), 404
+    return Response(stream, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def is_id_list(value):
+    """Whether a posted value is a list of integer ids (booleans are not ids)"""
+    return isinstance(value, list) and all(isinstance(item, int) and not isinstance(item, bool) for item in value)
+
+def as_number(value):
+    """A posted value as a finite float, or None if it is not a JSON number (booleans are not numbers)"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return None
+    return float(value)
+
+@board_bp.route('/layouts/<int:layout_id>/pack', methods=['POST'])
+def pack_layout(layout_id):
+    """Place boards on the layout's base plate with the MaxRects packer
+    
+    Optional JSON body: board_ids (defaults to the layout's placements, or
+    every board if it has none), margin (clearance in mm between boards and
+    to the plate edge) and rotations (allowed subset of 0/90/180/270).
+    """
+    layout = Layout.query.get_or_404(layout_id)
+    data = request.get_json(silent=True) or {}
+    margin = as_number(data.get('margin', 2.0))
+    rotations = data.get('rotations', list(packing.ROTATIONS))
+    
+    if margin is None or margin < 0:
+        return jsonify({'error': 'margin must be a non-negative number'}), 400
+    if not rotations or any(rotation not in packing.ROTATIONS for rotation in rotations):
+        return jsonify({'error': 'rotations must be a subset of 0, 90, 180, 270'}), 400
+    if data.get('board_ids') is not None and not is_id_list(data['board_ids']):
+        return jsonify({'error': 'board_ids must be a list of board ids'}), 400
+    
+    items = layout_items(layout, data.get('board_ids'))
+    results = packing.pack_rectangles(
+        [(board.width, board.height) for _, board, _ in items],
+        layout.base_width, layout.base_height, margin, rotations,
+        [(placement or board).rotation or 0 for _, board, placement in items]
+    )
+    
+    placements = []
+    unplaced = []
+    with layout_sync.hub.rewriting(layout.id):
+        for (item_id, board, placement), result in zip(items, results):
+            if result is None:
+                unplaced.append(item_id)
+                continue
+            if placement is not None:
+                placement.x, placement.y, placement.rotation = result
+            else:
+                board.position_x, board.position_y, board.rotation = result
+            placements.append({
+                'id': item_id,
+                'position_x': result[0],
+                'position_y': result[1],
+                'rotation': result[2]
+            })
+        db.session.commit()
+    
+    used_area = sum(board.width * board.height for (_, board, _), result in zip(items, results) if result)
+    return jsonify({
+        'layout_id': layout.id,
+        'target': 'placements' if items and items[0][2] is not None else 'boards',
+        'placements': placements,
+        'unplaced': unplaced,
+        'utilisation': used_area / (layout.base_width * layout.base_height)
+    })
+
+@board_bp.route('/layouts/stack', methods=['POST'])
+def plan_layout_stack():
+    """Split boards over the fewest stacked base plates, saved as one layout per plate
+    
+    JSON body: board_ids (repeat an id to place several of that board),
+    base_width and base_height of every plate, and optionally name, margin,
+    rotations, headroom (mm above the tallest PCB on a plate), plate_thickness
+    and time_budget (seconds of parallel search, up to MAX_STACK_BUDGET).
+    Plates are ordered bottom to top; each reports the clearance it needs
+    from its standoff heights.
+    """
+    data = request.get_json(silent=True) or {}
+    board_ids = data.get('board_ids') or []
+    if not board_ids or 'base_width' not in data or 'base_height' not in data:
+        return jsonify({'error': 'board_ids, base_width and base_height are required'}), 400
+    if not is_id_list(board_ids):
+        return jsonify({'error': 'board_ids must be a list of board ids'}), 400
+    try:
+        base_width, base_height = float(data['base_width']), float(data['base_height'])
+    except (TypeError, ValueError):
+        base_width = base_height = math.nan
+    if not (math.isfinite(base_width) and math.isfinite(base_height) and base_width > 0 and base_height > 0):
+        return jsonify({'error': 'base_width and base_height must be positive numbers'}), 400
+    rotations = data.get('rotations', list(packing.ROTATIONS))
+    if not rotations or any(rotation not in packing.ROTATIONS for rotation in rotations):
+        return jsonify({'error': 'rotations must be a subset of 0, 90, 180, 270'}), 400
+    options = {field: as_number(data.get(field, default)) for field, default in (
+        ('margin', 2.0), ('headroom', stacking.DEFAULT_HEADROOM),
+        ('plate_thickness', stacking.DEFAULT_PLATE_THICKNESS), ('time_budget', stacking.DEFAULT_TIME_BUDGET))}
+    invalid = [field for field, value in options.items() if value is None or value < 0]
+    if invalid:
+        return jsonify({'error': f"Must be non-negative numbers: {', '.join(invalid)}"}), 400
+    
+    found = {board.id: board for board in Board.query.filter(Board.id.in_(set(board_ids)))}
+    missing = sorted(set(board_ids) - set(found))
+    if missing:
+        return jsonify({'error': 'Boards not found', 'board_ids': missing}), 404
+    boards = [found[board_id] for board_id in board_ids]
+    
+    plan = stacking.plan_stack(
+        boards, base_width, base_height,
+        margin=options['margin'], rotations=rotations,
+        headroom=options['headroom'], plate_thickness=options['plate_thickness'],
+        time_budget=min(options['time_budget'], MAX_STACK_BUDGET)
+    )
+    
+    name = data.get('name') or 'Stack'
+    count = len(plan['plates'])
+    layouts = [Layout(name=f'{name} {level}/{count}', base_width=base_width,
+                      base_height=base_height) for level in range(1, count + 1)]
+    db.session.add_all(layouts)
+    db.session.flush()
+    rows = [{'layout_id': layout.id, 'board_id': board_ids[index], 'x': x, 'y': y, 'rotation': rotation}
+            for layout, plate in zip(layouts, plan['plates']) for index, x, y, rotation in plate['placements']]
+    if rows:
+        db.session.execute(insert(LayoutPlacement), rows)
+    db.session.commit()
+    
+    return jsonify({
+        'layouts': [dict(layout.to_dict(), level=level, clearance=plate['clearance'],
+                         board_count=len(plate['placements']))
+                    for level, (layout, plate) in enumerate(zip(layouts, plan['plates']), 1)],
+        'unplaced': [board_ids[index] for index in plan['unplaced']],
+        'stack_height': plan['stack_height'],
+        'plate_lower_bound': plan['lower_bound'],
+        'candidates': plan['candidates'],
+        'elapsed': plan['elapsed']
+    }), 201
+
+@board_bp.route('/layouts/<int:layout_id>/validate', methods=['GET'])
+def validate_layout(layout_id):
+    """Check placed boards for overlaps, clearance and plate bounds
+    
+    Query parameters: board_ids (comma separated; defaults to the layout's
+    placements, or every board if it has none), clearance and hole_clearance
+    in mm, and moved=<id> to re-check only the board or placement that moved.
+    """
+    layout = Layout.query.get_or_404(layout_id)
+    clearance = request.args.get('clearance', 2.0, type=float)
+    hole_clearance = request.args.get('hole_clearance', 1.0, type=float)
+    moved = request.args.get('moved', type=int)
+    
+    board_ids = None
+    if request.args.get('board_ids'):
+        try:
+            board_ids = [int(board_id) for board_id in request.args['board_ids'].split(',')]
+        except ValueError:
+            return jsonify({'error': 'board_ids must be comma separated board ids'}), 400
+    items = layout_items(layout, board_ids)
+    
+    validator = validation.validator_for_layout_items(items, layout.base_width, layout.base_height,
+                                                      clearance, hole_clearance)
+    
+    if moved is not None:
+        if moved not in validator.boards:
+            return jsonify({'error': f'{moved} is not part of this layout'}), 404
+        issues = validator.check(moved)
+    else:
+        issues = validator.validate()
+    
+    return jsonify({
+        'layout_id': layout.id,
+        'valid': not issues,
+        'issues': issues
+    })
+
+@board_bp.route('/layouts/<int:layout_id>/geometry', methods=['GET'])
+def get_layout_geometry(layout_id):
+    """Rotated footprint and absolute mounting-hole centres of everything on a layout
+    
+    Computed in one vectorized pass over the layout's boards; the same
+    numbers the exports use.
+    """
+    layout = Layout.query.get_or_404(layout_id)
+    return serialization.json_response({
+        'layout_id': layout.id,
+        'base_width': layout.base_width,
+        'base_height': layout.base_height,
+        'items': geometry.layout_geometry(layout_items(layout))
+    })
+
+@board_bp.route('/layouts/<int:layout_id>/preview.<image_format>', methods=['GET'])
+def layout_preview(layout_id, image_format):
+    """Plate, board footprints and mounting holes as an SVG or PNG thumbnail
+    
+    Rendered on the server and cached per layout version, so a gallery
+    of layouts loads small images instead of every layout's geometry.
+    Query parameters: width in pixels (default 320), and v, the layout
+    version (as GET /layouts lists it): with the current version the
+    response may be cached for good, since a new version is a new URL.
+    Without it browsers revalidate by ETag. A layout without placements
+    previews every board (as layout_items does), which its version does
+    not track, so that preview is keyed by the boards' specs and positions
+    and always revalidated.
+    """
+    mimetypes = {'svg': 'image/svg+xml', 'png': 'image/png'}
+    if image_format not in mimetypes:
+        return jsonify({'error': 'Preview format must be svg or png'}), 404
+    width = request.args.get('width', preview.DEFAULT_WIDTH, type=int)
+    if not preview.MIN_WIDTH <= width <= preview.MAX_WIDTH:
+        return jsonify({'error': f'width must be between {preview.MIN_WIDTH} and {preview.MAX_WIDTH}'}), 400
+    
+    layout_sync.hub.flush(layout_id)
+    layout = Layout.query.get_or_404(layout_id)
+    if not preview.valid_plate(layout.base_width, layout.base_height):
+        return jsonify({'error': 'Layout base_width and base_height must be positive to preview'}), 400
+    # Every placement change bumps the version, so old previews are never served (the LRU drops them)
+    params = {'layout_id': layout.id, 'version': layout.version, 'width': width,
+              'base_width': layout.base_width, 'base_height': layout.base_height}
+    items = None
+    if not layout.placements:
+        items = layout_items(layout)
+        params['boards'] = [[getattr(board, field) for field in Board.SPEC_FIELDS + Board.POSITION_FIELDS]
+                            for _, board, _ in items]
+    key = cache_key(f'preview_{image_format}', params)
+    etag = key_etag(key)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        def build():
+            with metrics.span('preview_render'):
+                render = preview.render_svg if image_format == 'svg' else preview.render_png
+                return render(items if items is not None else layout_items(layout),
+                              layout.base_width, layout.base_height, width)
+        
+        response = Response(artifact_cache.get_or_create(key, build).data, mimetype=mimetypes[image_format])
+    response.set_etag(etag)
+    if items is None and request.args.get('v') == str(layout.version):
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def export_boards(data):
+    """((boards, base_width, base_height), None) for a DXF export body, or (None, error response)
+    
+    With layout_id the boards come from that layout (404 if unknown).
+    Otherwise posted boards carrying a board_id (with x, y and rotation) get
+    their footprint and holes computed from the Board row (400 listing any
+    unknown ids); others are used as sent. A body that is not an object,
+    a non-integer layout_id or board_id, or boards that are not a list of
+    objects is a 400.
+    """
+    if not isinstance(data, dict):
+        return None, (jsonify({'error': 'Body must be a JSON object'}), 400)
+    if data.get('layout_id') is not None:
+        if not is_id_list([data['layout_id']]):
+            return None, (jsonify({'error': 'layout_id must be a layout id'}), 400)
+        layout = db.session.get(Layout, data['layout_id'])
+        if layout is None:
+            return None, (jsonify({'error': 'Layout not found'}), 404)
+        return (geometry.layout_geometry(layout_items(layout)),
+                data.get('base_width', layout.base_width), data.get('base_height', layout.base_height)), None
+    
+    boards = data.get('boards', [])
+    if not isinstance(boards, list) or not all(isinstance(board, dict) for board in boards):
+        return None, (jsonify({'error': 'boards must be a list of objects'}), 400)
+    boards = list(boards)
+    if not is_id_list([board['board_id'] for board in boards if board.get('board_id') is not None]):
+        return None, (jsonify({'error': 'board_id must be a board id'}), 400)
+    referenced = [(index, board) for index, board in enumerate(boards) if board.get('board_id') is not None]
+    if referenced:
+        board_ids = {board['board_id'] for _, board in referenced}
+        rows = {row.id: row for row in Board.query.filter(Board.id.in_(board_ids))}
+        unknown = board_ids - set(rows)
+        if unknown:
+            return None, (jsonify({'error': f'Unknown board ids: {sorted(unknown)}'}), 400)
+        items = [(board.get('id', index), rows[board['board_id']],
+                  geometry.Placement(board.get('x', 0.0), board.get('y', 0.0), board.get('rotation', 0)))
+                 for index, board in referenced]
+        for (index, _), resolved in zip(referenced, geometry.layout_geometry(items)):
+            boards[index] = resolved
+    return (boards, data.get('base_width', 200), data.get('base_height', 150)), None
+
+@board_bp.route('/layouts/<int:layout_id>/fabrication', methods=['GET'])
+def fabrication_bundle(layout_id):
+    """Stream a ZIP with everything needed to build a layout
+    
+    Contains plate.dxf, standoffs.stl (one standoff on every mounting hole,
+    already in plate coordinates) and an L-bracket STL per board under
+    brackets/. Query parameters: segments or chord_tolerance for the
+    standoffs, and brackets=0 to leave the brackets out.
+    """
+    layout = Layout.query.get_or_404(layout_id)
+    plan = fabrication.plan_for_layout_items(
+        layout_items(layout), layout.base_width, layout.base_height,
+        include_brackets=request.args.get('brackets', '1') != '0'
+    )
+    download_name = f"{secure_filename(layout.name) or 'layout'}_fabrication.zip"
+    return Response(
+        fabrication.iter_bundle(plan, request.args.get('segments', type=int),
+                                request.args.get('chord_tolerance', type=float)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename={download_name}'}
+    )
+
 @board_bp.route('/extract-dimensions', methods=['POST'])
 def extract_dimensions():
-    """Extract board dimensions from uploaded image using Gemini API"""
+    """Extract board dimensions from uploaded image using Gemini API
+    
+    Results are cached in the database by image hash and normalised prompt,
+    and identical requests in flight at the same time share one model call.
+    """
     
-    if GOOGLE_API_KEY == 'YOUR_GOOGLE_API_KEY_HERE':
+    extractor = extraction.get_extractor()
+    if extractor is None:
         return jsonify({
             'success': False,
             'error': 'Google API key not configured. Please set the GOOGLE_API_KEY environment variable.'
@@ -90,115 +681,26 @@ def extract_dimensions():
                 'error': 'No image file selected'
             }), 400
         
-        # Save the uploaded file temporarily
-        filename = secure_filename(image_file.filename)
-        temp_dir = tempfile.mkdtemp()
-        temp_path = os.path.join(temp_dir, filename)
-        image_file.save(temp_path)
+        with metrics.span('upload'):
+            image_bytes = image_file.read()
+        mime_type = image_file.mimetype or 'image/png'
         
         try:
-            # Upload file to Gemini
-            uploaded_file = genai.upload_file(temp_path)
-            
-            # Create a comprehensive prompt for dimension extraction
-            system_prompt = """
-You are an expert at analyzing technical drawings and dimensional diagrams of electronic circuit boards and RF modules. 
-
-Analyze this image and extract the following information:
-1. Board/module name or identifier
-2. Overall board dimensions (width and height in mm)
-3. Number of mounting holes in X direction (1 or 2)
-4. Number of mounting holes in Y direction (1 or 2) 
-5. Mounting hole spacing in X direction (center-to-center distance in mm)
-6. Mounting hole spacing in Y direction (center-to-center distance in mm)
-7. Mounting hole diameter (in mm)
-
-User's additional context: """ + user_prompt + """
-
-Please respond with a JSON object in this exact format:
-{
-  "name": "Board Name",
-  "width": 50.0,
-  "height": 30.0,
-  "mounting_holes_x": 2,
-  "mounting_holes_y": 2,
-  "hole_spacing_x": 40.0,
-  "hole_spacing_y": 20.0,
-  "hole_diameter": 3.0,
-  "standoff_height": 10.0
-}
-
-Important notes:
-- All dimensions should be in millimeters
-- mounting_holes_x and mounting_holes_y should be 1 or 2 only
-- If only 1 hole in a direction, set the spacing for that direction to 0.0
-- If you cannot determine a value, use reasonable defaults for RF circuit boards
-- Ensure the JSON is valid and properly formatted
-"""
-            
-            # Generate content using Gemini
-            model = genai.GenerativeModel('gemini-2.5-flash-preview-05-20')
-            response = model.generate_content([uploaded_file, system_prompt])
-            
-            # Parse the response
-            response_text = response.text.strip()
-            
-            # Try to extract JSON from the response
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                dimensions = json.loads(json_str)
-                
-                # Validate the extracted dimensions
-                required_fields = ['name', 'width', 'height', 'mounting_holes_x', 'mounting_holes_y', 
-                                 'hole_spacing_x', 'hole_spacing_y', 'hole_diameter']
-                
-                for field in required_fields:
-                    if field not in dimensions:
-                        raise ValueError(f"Missing required field: {field}")
-                
-                # Ensure numeric fields are properly typed
-                numeric_fields = ['width', 'height', 'hole_spacing_x', 'hole_spacing_y', 
-                                'hole_diameter', 'standoff_height']
-                for field in numeric_fields:
-                    if field in dimensions:
-                        dimensions[field] = float(dimensions[field])
-                
-                # Ensure integer fields are properly typed
-                int_fields = ['mounting_holes_x', 'mounting_holes_y']
-                for field in int_fields:
-                    if field in dimensions:
-                        dimensions[field] = int(dimensions[field])
-                        # Validate hole counts
-                        if dimensions[field] not in [1, 2]:
-                            dimensions[field] = 2  # Default to 2 if invalid
-                
-                # Set default standoff height if not provided
-                if 'standoff_height' not in dimensions:
-                    dimensions['standoff_height'] = 3.0
-                
-                return jsonify({
-                    'success': True,
-                    'dimensions': dimensions,
-                    'raw_response': response_text
-                })
-            else:
-                raise ValueError("Could not extract valid JSON from Gemini response")
-                
+            dimensions, response_text, cached = extraction.extract_with_cache(
+                extractor, extraction_flight, image_bytes, mime_type, user_prompt)
         except Exception as e:
             return jsonify({
                 'success': False,
                 'error': f"Error processing with Gemini API: {str(e)}",
-                'raw_response': response.text if 'response' in locals() else None
+                'raw_response': getattr(e, 'raw_response', None)
             }), 500
-            
-        finally:
-            # Clean up temporary file
-            try:
-                os.remove(temp_path)
-                os.rmdir(temp_dir)
-            except:
-                pass
+        
+        return jsonify({
+            'success': True,
+            'dimensions': dimensions,
+            'raw_response': response_text,
+            'cached': cached
+        })
                 
     except Exception as e:
         return jsonify({
@@ -206,164 +708,157 @@ Important notes:
             'error': f"Server error: {str(e)}"
         }), 500
 
+@board_bp.route('/extract-dimensions/batch', methods=['POST'])
+def extract_dimensions_batch():
+    """Queue many datasheet images for background extraction
+    
+    Multipart form: one or more 'images', an optional 'prompt' shared by all
+    of them, and 'create_boards' to insert the validated results as boards
+    once the job finishes. Returns a job id to poll; the finished job lists
+    library boards that results duplicated (duplicate_board_ids) and results
+    that repeated an earlier image of the batch (batch_duplicates).
+    """
+    extractor = extraction.get_extractor()
+    if extractor is None:
+        return jsonify({
+            'success': False,
+            'error': 'Google API key not configured. Please set the GOOGLE_API_KEY environment variable.'
+        }), 500
+    
+    image_files = [f for f in request.files.getlist('images') if f.filename]
+    if not image_files:
+        return jsonify({
+            'success': False,
+            'error': 'No image files provided'
+        }), 400
+    if len(image_files) > MAX_BATCH_IMAGES:
+        return jsonify({
+            'success': False,
+            'error': f'At most {MAX_BATCH_IMAGES} images per batch'
+        }), 400
+    
+    with metrics.span('upload'):
+        images = [(secure_filename(f.filename), f.read(), f.mimetype or 'image/png') for f in image_files]
+    create_boards = request.form.get('create_boards', '').lower() in ('1', 'true', 'yes')
+    job = extraction_jobs.submit(current_app._get_current_object(), extractor, extraction_flight,
+                                 images, request.form.get('prompt', ''), create_boards)
+    return jsonify({'success': True, 'job_id': job.id, 'total': len(images)}), 202
+
+@board_bp.route('/extract-dimensions/jobs/<job_id>', methods=['GET'])
+def get_extraction_job(job_id):
+    """Progress and per-image results of a batch extraction job"""
+    job = extraction_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+def export_response(kind, params, build, download_name, mimetype):
+    """Serve a generated file from the artifact cache with a strong ETag
+
+    The ETag comes from the parameters and the generator code, so clients
+    sending a matching If-None-Match get a 304 without anything being
+    built. The export routes are POSTs, which werkzeug's conditional
+    handling skips, so the check is done here.
+    """
+    key = cache_key(kind, {**params, 'generator': generator_fingerprint()})
+    if request.if_none_match.contains(key_etag(key)):
+        response = Response(status=304)
+        response.set_etag(key_etag(key))
+        return response
+    artifact = artifact_cache.get_or_create(key, build)
+    return send_file(io.BytesIO(artifact.data), as_attachment=True,
+                     download_name=download_name, mimetype=mimetype,
+                     etag=artifact.etag)
+
 @board_bp.route('/generate-dxf', methods=['POST'])
 def generate_dxf():
-    """Generate DXF file for laser cutting"""
+    """Generate DXF file for laser cutting
+    
+    Optional format: 'blocks' (one block per board type, placed with
+    INSERTs), 'flat' (individual entities per board), 'toolpath' (edges
+    merged and entities ordered for cutting) or 'r12' (streamed R12,
+    nothing held in memory). Defaults to blocks, or r12 above
+    DXF_STREAM_THRESHOLD boards. Boards may be given by layout_id or by
+    board_id so the server computes their holes (see export_boards).
+    """
     try:
-        data = request.json
-        boards = data.get('boards', [])
-        base_width = data.get('base_width', 200)
-        base_height = data.get('base_height', 150)
-        
-        # Create DXF document
-        doc = ezdxf.new('R2010')
-        msp = doc.modelspace()
-        
-        # Create layers
-        doc.layers.new('BOARD_OUTLINE', dxfattribs={'color': 1})  # Red
-        doc.layers.new('MOUNTING_HOLES', dxfattribs={'color': 2})  # Yellow
-        doc.layers.new('BOARD_LABELS', dxfattribs={'color': 3})  # Green
-        doc.layers.new('BASE_OUTLINE', dxfattribs={'color': 4})  # Cyan
-        
-        # Add base plate outline
-        msp.add_lwpolyline([
-            (0, 0), (base_width, 0), (base_width, base_height), (0, base_height), (0, 0)
-        ], dxfattribs={'layer': 'BASE_OUTLINE'})
-        
-        # Add boards
-        for board in boards:
-            x, y = board['x'], board['y']
-            width, height = board['width'], board['height']
-            
-            # Board outline
-            msp.add_lwpolyline([
-                (x, y), (x + width, y), (x + width, y + height), (x, y + height), (x, y)
-            ], dxfattribs={'layer': 'BOARD_OUTLINE'})
-            
-            # Board label
-            msp.add_text(board['name'], dxfattribs={
-                'layer': 'BOARD_LABELS',
-                'height': 5,
-                'insert': (x + width/2, y + height/2)
-            })
-            
-            # Mounting holes
-            for hole in board.get('holes', []):
-                msp.add_circle((hole['x'], hole['y']), hole['diameter']/2, 
-                             dxfattribs={'layer': 'MOUNTING_HOLES'})
+        with metrics.span('json_parse'):
+            data = request.get_json()
+        resolved, error = export_boards(data)
+        if error:
+            return error
+        boards, base_width, base_height = resolved
+        dxf_format = data.get('format') or ('r12' if len(boards) > DXF_STREAM_THRESHOLD else 'blocks')
+        if dxf_format not in export.DXF_BUILDERS and dxf_format != 'r12':
+            return jsonify({'error': 'format must be blocks, flat, toolpath or r12'}), 400
+        
+        # Optional pre-flight check of the posted placement
+        if data.get('validate'):
+            issues = validation.validator_for_export(boards, base_width, base_height, data.get('clearance', 2.0),
+                                                     data.get('hole_clearance', 1.0)).validate()
+            if issues:
+                return jsonify({'error': 'Layout failed validation', 'issues': issues}), 422
+        
+        # R12 output is streamed straight to the client instead of cached
+        if dxf_format == 'r12':
+            return Response(
+                stream_with_context(export.iter_layout_dxf(boards, base_width, base_height)),
+                mimetype='application/dxf',
+                headers={'Content-Disposition': 'attachment; filename=rf_board_layout.dxf'}
+            )
         
-        # Save to temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.dxf')
-        doc.saveas(temp_file.name)
-        temp_file.close()
+        def build():
+            with metrics.span('dxf_build'):
+                doc = getattr(export, export.DXF_BUILDERS[dxf_format])(boards, base_width, base_height)
+            with metrics.span('file_write'):
+                return export.dxf_bytes(doc)
         
-        return send_file(temp_file.name, as_attachment=True, 
-                        download_name='rf_board_layout.dxf', mimetype='application/dxf')
+        params = {'boards': boards, 'base_width': base_width, 'base_height': base_height,
+                  'format': dxf_format}
+        return export_response('dxf', params, build,
+                               'rf_board_layout.dxf', 'application/dxf')
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@board_bp.route('/toolpath-report', methods=['POST'])
+def toolpath_report():
+    """Estimated cut and travel length of a layout before and after toolpath optimisation
+    
+    Takes the same JSON body as /generate-dxf; posted boards without
+    numeric x, y, width, height and hole positions are a 400.
+    """
+    resolved, error = export_boards(request.get_json(silent=True))
+    if error:
+        return error
+    try:
+        before = toolpath.layout_cuts(*resolved)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid board geometry: {e!r}'}), 400
+    return jsonify(toolpath.report(before, toolpath.optimise(before)))
+
 @board_bp.route('/generate-stl/<board_name>', methods=['POST'])
 def generate_stl(board_name):
     """Generate STL file for board standoffs"""
     try:
-        data = request.json
+        with metrics.span('json_parse'):
+            data = request.get_json()
         hole_diameter = data.get('hole_diameter', 3.0)
         standoff_height = data.get('standoff_height', 3.0)
         
-        # Create cylindrical standoff with hollow center
-        inner_radius = hole_diameter / 2
-        outer_radius = inner_radius * 1.5  # 1.5x bigger outer diameter
-        
-        # Generate mesh for hollow cylinder
-        vertices = []
-        faces = []
-        
-        # Number of segments for the cylinder
-        segments = 16
-        
-        # Generate vertices
-        for i in range(segments):
-            angle = 2 * math.pi * i / segments
-            
-            # Outer vertices
-            x_outer = outer_radius * math.cos(angle)
-            y_outer = outer_radius * math.sin(angle)
-            
-            # Inner vertices  
-            x_inner = inner_radius * math.cos(angle)
-            y_inner = inner_radius * math.sin(angle)
-            
-            # Bottom vertices
-            vertices.extend([
-                [x_outer, y_outer, 0],  # outer bottom
-                [x_inner, y_inner, 0]   # inner bottom
-            ])
-            
-            # Top vertices
-            vertices.extend([
-                [x_outer, y_outer, standoff_height],  # outer top
-                [x_inner, y_inner, standoff_height]   # inner top
-            ])
-        
-        vertices = np.array(vertices)
-        
-        # Generate faces
-        face_list = []
-        
-        for i in range(segments):
-            next_i = (i + 1) % segments
-            
-            # Indices for current and next segment
-            curr_outer_bottom = i * 4
-            curr_inner_bottom = i * 4 + 1
-            curr_outer_top = i * 4 + 2
-            curr_inner_top = i * 4 + 3
-            
-            next_outer_bottom = next_i * 4
-            next_inner_bottom = next_i * 4 + 1
-            next_outer_top = next_i * 4 + 2
-            next_inner_top = next_i * 4 + 3
-            
-            # Outer wall (2 triangles)
-            face_list.extend([
-                [curr_outer_bottom, next_outer_bottom, curr_outer_top],
-                [next_outer_bottom, next_outer_top, curr_outer_top]
-            ])
-            
-            # Inner wall (2 triangles, reversed winding)
-            face_list.extend([
-                [curr_inner_bottom, curr_inner_top, next_inner_bottom],
-                [next_inner_bottom, curr_inner_top, next_inner_top]
-            ])
-            
-            # Bottom ring (2 triangles)
-            face_list.extend([
-                [curr_outer_bottom, curr_inner_bottom, next_outer_bottom],
-                [next_outer_bottom, curr_inner_bottom, next_inner_bottom]
-            ])
-            
-            # Top ring (2 triangles)
-            face_list.extend([
-                [curr_outer_top, next_outer_top, curr_inner_top],
-                [next_outer_top, next_inner_top, curr_inner_top]
-            ])
-        
-        faces = np.array(face_list)
-        
-        # Create mesh
-        standoff_mesh = mesh.Mesh(np.zeros(faces.shape[0], dtype=mesh.Mesh.dtype))
-        for i, face in enumerate(faces):
-            for j in range(3):
-                standoff_mesh.vectors[i][j] = vertices[face[j], :]
+        # Segments for the cylinder, either explicit or from a chord tolerance
+        params = export.standoff_params(hole_diameter, standoff_height,
+                                        data.get('segments'), data.get('chord_tolerance'))
         
-        # Save to temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.stl')
-        standoff_mesh.save(temp_file.name)
-        temp_file.close()
+        def build():
+            with metrics.span('mesh_build'):
+                mesh = export.build_standoff_mesh(**params)
+            with metrics.span('file_write'):
+                return export.stl_bytes(mesh, f'{board_name}_standoff.stl')
         
-        return send_file(temp_file.name, as_attachment=True,
-                        download_name=f'{board_name}_standoff.stl', mimetype='application/sla')
+        # The name is written into the STL header, so it is part of the key
+        return export_response('standoff', {**params, 'name': board_name}, build,
+                               f'{board_name}_standoff.stl', 'application/sla')
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -372,147 +867,22 @@ def generate_stl(board_name):
 def generate_l_bracket(board_name):
     """Generate STL file for L-brackets for boards without mounting holes"""
     try:
-        data = request.json
-        board_width = data.get('board_width', 50.0)
-        board_height = data.get('board_height', 30.0)
-        standoff_height = data.get('standoff_height', 10.0)
-        
-        # L-bracket parameters
-        bracket_thickness = 3.0  # 3mm thick brackets
-        bracket_width = 10.0     # 10mm wide brackets
-        hole_diameter = 3.0      # Standard mounting hole diameter
-        hole_offset = 5.0        # Distance from edge to hole center
-        
-        # Create 4 L-brackets (one for each corner)
-        all_vertices = []
-        all_faces = []
-        vertex_offset = 0
-        
-        # Define the 4 corner positions
-        corners = [
-            {'x': 0, 'y': 0, 'name': 'bottom_left'},
-            {'x': board_width, 'y': 0, 'name': 'bottom_right'},
-            {'x': board_width, 'y': board_height, 'name': 'top_right'},
-            {'x': 0, 'y': board_height, 'name': 'top_left'}
-        ]
-        
-        for corner in corners:
-            # Generate L-bracket geometry for this corner
-            bracket_vertices, bracket_faces = generate_l_bracket_geometry(
-                corner['x'], corner['y'], corner['name'],
-                bracket_thickness, bracket_width, standoff_height,
-                hole_diameter, hole_offset
-            )
-            
-            # Adjust face indices to account for previous vertices
-            adjusted_faces = bracket_faces + vertex_offset
-            
-            all_vertices.extend(bracket_vertices)
-            all_faces.extend(adjusted_faces)
-            vertex_offset += len(bracket_vertices)
-        
-        # Convert to numpy arrays
-        vertices = np.array(all_vertices)
-        faces = np.array(all_faces)
-        
-        # Create mesh
-        l_bracket_mesh = mesh.Mesh(np.zeros(faces.shape[0], dtype=mesh.Mesh.dtype))
-        for i, face in enumerate(faces):
-            for j in range(3):
-                l_bracket_mesh.vectors[i][j] = vertices[face[j], :]
-        
-        # Save to temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.stl')
-        l_bracket_mesh.save(temp_file.name)
-        temp_file.close()
-        
-        return send_file(temp_file.name, as_attachment=True,
-                        download_name=f'{board_name}_l_brackets.stl', mimetype='application/sla')
+        with metrics.span('json_parse'):
+            data = request.get_json()
+        params = {
+            'board_width': data.get('board_width', 50.0),
+            'board_height': data.get('board_height', 30.0),
+            'standoff_height': data.get('standoff_height', 10.0)
+        }
+        
+        def build():
+            with metrics.span('mesh_build'):
+                mesh = export.build_l_bracket_mesh(**params)
+            with metrics.span('file_write'):
+                return export.stl_bytes(mesh, f'{board_name}_l_brackets.stl')
+        
+        return export_response('l_bracket', {**params, 'name': board_name}, build,
+                               f'{board_name}_l_brackets.stl', 'application/sla')
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-
-def generate_l_bracket_geometry(corner_x, corner_y, corner_name, thickness, width, height, hole_diameter, hole_offset):
-    """Generate geometry for a single L-bracket at a specific corner"""
-    vertices = []
-    faces = []
-    
-    # Define L-bracket shape based on corner position
-    if corner_name == 'bottom_left':
-        # L-bracket extends right and up from corner
-        base_points = [
-            [corner_x - thickness, corner_y - thickness],  # Outer corner
-            [corner_x + width, corner_y - thickness],      # Right edge of horizontal arm
-            [corner_x + width, corner_y],                  # Inner corner of horizontal arm
-            [corner_x, corner_y],                          # Board corner
-            [corner_x, corner_y + width],                  # Inner corner of vertical arm
-            [corner_x - thickness, corner_y + width]       # Top edge of vertical arm
-        ]
-        hole_pos = [corner_x + hole_offset, corner_y + hole_offset]
-        
-    elif corner_name == 'bottom_right':
-        # L-bracket extends left and up from corner
-        base_points = [
-            [corner_x + thickness, corner_y - thickness],  # Outer corner
-            [corner_x - width, corner_y - thickness],      # Left edge of horizontal arm
-            [corner_x - width, corner_y],                  # Inner corner of horizontal arm
-            [corner_x, corner_y],                          # Board corner
-            [corner_x, corner_y + width],                  # Inner corner of vertical arm
-            [corner_x + thickness, corner_y + width]       # Top edge of vertical arm
-        ]
-        hole_pos = [corner_x - hole_offset, corner_y + hole_offset]
-        
-    elif corner_name == 'top_right':
-        # L-bracket extends left and down from corner
-        base_points = [
-            [corner_x + thickness, corner_y + thickness],  # Outer corner
-            [corner_x - width, corner_y + thickness],      # Left edge of horizontal arm
-            [corner_x - width, corner_y],                  # Inner corner of horizontal arm
-            [corner_x, corner_y],                          # Board corner
-            [corner_x, corner_y - width],                  # Inner corner of vertical arm
-            [corner_x + thickness, corner_y - width]       # Bottom edge of vertical arm
-        ]
-        hole_pos = [corner_x - hole_offset, corner_y - hole_offset]
-        
-    else:  # top_left
-        # L-bracket extends right and down from corner
-        base_points = [
-            [corner_x - thickness, corner_y + thickness],  # Outer corner
-            [corner_x + width, corner_y + thickness],      # Right edge of horizontal arm
-            [corner_x + width, corner_y],                  # Inner corner of horizontal arm
-            [corner_x, corner_y],                          # Board corner
-            [corner_x, corner_y - width],                  # Inner corner of vertical arm
-            [corner_x - thickness, corner_y - width]       # Bottom edge of vertical arm
-        ]
-        hole_pos = [corner_x + hole_offset, corner_y - hole_offset]
-    
-    # Create 3D vertices (bottom and top faces)
-    for point in base_points:
-        vertices.append([point[0], point[1], 0])        # Bottom face
-        vertices.append([point[0], point[1], height])   # Top face
-    
-    # Generate faces for the L-bracket
-    num_points = len(base_points)
-    
-    # Bottom face (triangulated)
-    for i in range(1, num_points - 1):
-        faces.append([0, i * 2, (i + 1) * 2])
-    
-    # Top face (triangulated, reversed winding)
-    for i in range(1, num_points - 1):
-        faces.append([1, (i + 1) * 2 + 1, i * 2 + 1])
-    
-    # Side faces
-    for i in range(num_points):
-        next_i = (i + 1) % num_points
-        
-        # Two triangles per side face
-        faces.append([i * 2, next_i * 2, i * 2 + 1])
-        faces.append([next_i * 2, next_i * 2 + 1, i * 2 + 1])
-    
-    # Create hole by subtracting a cylinder (simplified approach)
-    # For now, we'll create the bracket without the hole and let the user drill it
-    # In a more advanced implementation, we could subtract a cylindrical mesh
-    
-    return vertices, faces
-
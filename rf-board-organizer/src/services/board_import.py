@@ -0,0 +1,241 @@
+import csv
+import io
+import json
+import math
+import numpy as np
+from sqlalchemy import insert
+from src.models.board import Board, db
+from src.services import library
+
+BATCH_SIZE = 1000
+READ_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 1000
+
+FLOAT_FIELDS = ['width', 'height', 'hole_spacing_x', 'hole_spacing_y', 'hole_diameter', 'standoff_height']
+INT_FIELDS = ['mounting_holes_x', 'mounting_holes_y']
+DEFAULTS = {'standoff_height': 10.0}
+
+# Field names used by the frontend's JSON component import
+ALIASES = {
+    'mounting_hole_dx': 'hole_spacing_x',
+    'mounting_hole_dy': 'hole_spacing_y',
+    'mounting_hole_diameter': 'hole_diameter',
+}
+
+
+class ImportFormatError(ValueError):
+    """The body as a whole cannot be parsed in the requested format"""
+
+
+def iter_json_array(stream, read_size=READ_SIZE):
+    """Yield the elements of a top-level JSON array without loading the whole body
+
+    Elements that fail to decode end the stream with ImportFormatError,
+    since the parser cannot resynchronise inside an array.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    started = False
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = stream.read(read_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    while True:
+        # Skip whitespace and separators until the next value
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n':
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            fill()
+        if position >= len(buffer):
+            raise ImportFormatError('Unexpected end of JSON array')
+
+        char = buffer[position]
+        if not started:
+            if char != '[':
+                raise ImportFormatError('Expected a JSON array of boards')
+            started = True
+            position += 1
+            continue
+        if char == ']':
+            return
+        if char == ',':
+            position += 1
+            continue
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ImportFormatError(f'Invalid JSON: {e}')
+                fill()
+                continue
+            # A number at the end of the buffer may still be incomplete
+            if end == len(buffer) and not eof:
+                fill()
+                continue
+            break
+        position = end
+        yield value
+
+
+def iter_rows(stream, content_type):
+    """Yield (row_number, record_or_None, parse_error_or_None) from a request body stream"""
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if not isinstance(stream, io.BufferedIOBase):
+        stream = io.BufferedReader(stream)
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if content_type in ('application/x-ndjson', 'application/jsonl', 'application/x-jsonlines'):
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line), None
+            except json.JSONDecodeError as e:
+                yield number, None, f'Invalid JSON: {e.msg}'
+    elif content_type == 'text/csv':
+        for number, record in enumerate(csv.DictReader(text), start=1):
+            yield number, {k.strip(): v for k, v in record.items() if k is not None and v not in (None, '')}, None
+    elif content_type == 'application/json':
+        for number, record in enumerate(iter_json_array(text), start=1):
+            yield number, record, None
+    else:
+        raise ImportFormatError('Content-Type must be application/json, application/x-ndjson or text/csv')
+
+
+def _to_float(value):
+    if value is None or isinstance(value, bool):
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _canonical(record):
+    """record with aliased fields renamed; a field given under its own name wins over its alias"""
+    return {ALIASES.get(k, k): v for k, v in record.items() if ALIASES.get(k) not in record}
+
+
+def validate_batch(records):
+    """Validate a batch of records column-wise
+
+    Returns (rows, errors): Board column dicts for the valid records and
+    {index: [messages]} for the rest.
+    """
+    records = [_canonical(record) if isinstance(record, dict) else None for record in records]
+    count = len(records)
+    not_objects = {index for index, record in enumerate(records) if record is None}
+    errors = {index: ['Row is not an object'] for index in not_objects}
+    records = [record or {} for record in records]
+
+    columns = {
+        field: np.array([_to_float(record.get(field, DEFAULTS.get(field))) for record in records], dtype=float)
+        for field in FLOAT_FIELDS + INT_FIELDS
+    }
+    names = [record.get('name') for record in records]
+
+    checks = [
+        (np.array([not isinstance(name, str) or not name.strip() or len(name) > 100 for name in names], dtype=bool),
+         'name is required (at most 100 characters)'),
+    ]
+    for field in FLOAT_FIELDS + INT_FIELDS:
+        checks.append((np.isnan(columns[field]), f'{field} is missing or not a number'))
+    for field in ('width', 'height', 'hole_diameter', 'standoff_height'):
+        checks.append((columns[field] <= 0, f'{field} must be positive'))
+    for field in ('hole_spacing_x', 'hole_spacing_y'):
+        checks.append((columns[field] < 0, f'{field} must not be negative'))
+    for field in INT_FIELDS:
+        checks.append((~np.isin(columns[field], [1, 2]), f'{field} must be 1 or 2'))
+    checks.append((columns['hole_spacing_x'] > columns['width'], 'hole_spacing_x exceeds width'))
+    checks.append((columns['hole_spacing_y'] > columns['height'], 'hole_spacing_y exceeds height'))
+
+    invalid = np.zeros(count, dtype=bool)
+    for mask, message in checks:
+        invalid |= mask
+        for index in np.flatnonzero(mask):
+            if int(index) not in not_objects:
+                errors.setdefault(int(index), []).append(message)
+
+    rows = []
+    for index in np.flatnonzero(~invalid):
+        row = {'name': names[index].strip()}
+        for field in FLOAT_FIELDS:
+            row[field] = float(columns[field][index])
+        for field in INT_FIELDS:
+            row[field] = int(columns[field][index])
+        rows.append(row)
+    return rows, errors
+
+
+def import_boards(stream, content_type, batch_size=BATCH_SIZE, skip_duplicates=True):
+    """Stream, validate and insert boards batch by batch
+
+    Each batch is inserted with one executemany statement and committed on
+    its own, so a bad row never aborts the rest of the import. Rows that
+    are near-duplicates of a library board (or of an earlier row) are
+    skipped unless skip_duplicates is off. Returns a summary with per-row
+    errors and duplicates (each capped at MAX_REPORTED_ERRORS).
+    """
+    summary = {'received': 0, 'inserted': 0, 'failed': 0, 'errors': [], 'errors_truncated': False,
+               'duplicates': 0, 'duplicate_rows': []}
+    duplicates = library.DuplicateIndex.load() if skip_duplicates else None
+
+    def report(number, messages):
+        summary['failed'] += 1
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append({'row': number, 'errors': messages})
+        else:
+            summary['errors_truncated'] = True
+
+    def flush(batch):
+        numbers = [number for number, _ in batch]
+        rows, errors = validate_batch([record for _, record in batch])
+        for index in sorted(errors):
+            report(numbers[index], errors[index])
+        if duplicates is not None:
+            valid_numbers = [number for index, number in enumerate(numbers) if index not in errors]
+            unique = []
+            for number, row in zip(valid_numbers, rows):
+                existing = duplicates.match(row)
+                if existing is None:
+                    duplicates.add(('duplicate_of_row', number), row)
+                    unique.append(row)
+                    continue
+                summary['duplicates'] += 1
+                if len(summary['duplicate_rows']) < MAX_REPORTED_ERRORS:
+                    kind, value = existing
+                    summary['duplicate_rows'].append({'row': number, kind: value})
+            rows = unique
+        if rows:
+            db.session.execute(insert(Board), rows)
+            db.session.commit()
+            summary['inserted'] += len(rows)
+
+    batch = []
+    try:
+        for number, record, parse_error in iter_rows(stream, content_type):
+            summary['received'] += 1
+            if parse_error:
+                report(number, [parse_error])
+                continue
+            batch.append((number, record))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+    except ImportFormatError as e:
+        # Rows read before the body became unparseable are still imported
+        summary['format_error'] = str(e)
+    if batch:
+        flush(batch)
+    return summary
@@ -0,0 +1,210 @@
+import functools
+import hashlib
+import importlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict, namedtuple
+
+# A cached export: the file bytes and the strong ETag of the key it is cached under
+Artifact = namedtuple('Artifact', ['data', 'etag'])
+
+# Modules whose code decides what exported files contain; editing any of them
+# (e.g. a new standoff design) changes every export's key
+GENERATOR_MODULES = ('src.services.export', 'src.services.mesh', 'src.services.fabrication',
+                     'src.services.geometry', 'src.services.toolpath')
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_SPILL_MAX_BYTES = 512 * 1024 * 1024
+
+# Spill files are named by their key; anything else in spill_dir is not ours
+SPILL_NAME = re.compile(r'[0-9a-f]{64}')
+
+
+def _canonical(value):
+    """Normalise request parameters so equivalent requests hash identically"""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        # 50 and 50.0 describe the same part
+        return float(value)
+    return str(value)
+
+
+def cache_key(kind, params):
+    """Canonical SHA-256 of an export kind and its parameters"""
+    payload = json.dumps([kind, _canonical(params)], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def key_etag(key):
+    """Strong ETag for the file cached under key
+    
+    Taken from the parameters rather than the bytes, which carry DXF/STL
+    timestamps and handles: the same request gets the same ETag after an
+    eviction, a restart or on another worker, and can be answered 304
+    before anything is built.
+    """
+    return key[:32]
+
+
+@functools.lru_cache(maxsize=None)
+def generator_fingerprint():
+    """SHA-256 of the GENERATOR_MODULES sources, for keys that must change when the generators do"""
+    digest = hashlib.sha256()
+    for name in GENERATOR_MODULES:
+        with open(importlib.import_module(name).__file__, 'rb') as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """Size-bounded LRU cache of generated export files
+
+    Entries live in memory up to max_bytes. When spill_dir is set, entries
+    evicted from memory are written there (itself bounded by spill_max_bytes)
+    and promoted back into memory on the next hit. Spill files left by an
+    earlier run are indexed on start-up (oldest first), so they count
+    towards spill_max_bytes and are evicted like any other.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entry_bytes=None,
+                 spill_dir=None, spill_max_bytes=DEFAULT_SPILL_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes if max_entry_bytes is not None else max_bytes // 4
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._spilled = OrderedDict()
+        self._spill_size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            self._index_spilled()
+
+    def get(self, key):
+        with self._lock:
+            artifact = self._entries.get(key)
+            if artifact is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return artifact
+            artifact = self._load_spilled(key)
+            if artifact is not None:
+                self._store(key, artifact)
+                self.hits += 1
+                return artifact
+            self.misses += 1
+            return None
+
+    def put(self, key, data):
+        artifact = Artifact(data, key_etag(key))
+        if len(data) <= self.max_entry_bytes:
+            with self._lock:
+                self._store(key, artifact)
+        return artifact
+
+    def get_or_create(self, key, build):
+        """Return the cached artifact for key, building and storing it on a miss"""
+        artifact = self.get(key)
+        if artifact is None:
+            artifact = self.put(key, build())
+        return artifact
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            for key in list(self._spilled):
+                self._drop_spilled(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'spilled_entries': len(self._spilled),
+                'spilled_bytes': self._spill_size,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def _store(self, key, artifact):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._size -= len(old.data)
+        self._entries[key] = artifact
+        self._size += len(artifact.data)
+        while self._size > self.max_bytes and self._entries:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted.data)
+            self._spill(evicted_key, evicted)
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, key)
+
+    def _index_spilled(self):
+        found = []
+        for entry in os.scandir(self.spill_dir):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith('.tmp'):
+                # A spill interrupted by the process exiting
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+            elif SPILL_NAME.fullmatch(entry.name):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, key, size in sorted(found):
+            self._spilled[key] = size
+            self._spill_size += size
+        while self._spill_size > self.spill_max_bytes and self._spilled:
+            self._drop_spilled(next(iter(self._spilled)))
+
+    def _spill(self, key, artifact):
+        if not self.spill_dir or len(artifact.data) > self.spill_max_bytes:
+            return
+        if key in self._spilled:
+            self._spilled.move_to_end(key)
+            return
+        path = self._spill_path(key)
+        try:
+            # Written aside and renamed, so a crash never leaves a truncated entry to index
+            with open(path + '.tmp', 'wb') as f:
+                f.write(artifact.data)
+            os.replace(path + '.tmp', path)
+        except OSError:
+            return
+        self._spilled[key] = len(artifact.data)
+        self._spill_size += len(artifact.data)
+        while self._spill_size > self.spill_max_bytes and self._spilled:
+            self._drop_spilled(next(iter(self._spilled)))
+
+    def _load_spilled(self, key):
+        if key not in self._spilled:
+            return None
+        try:
+            with open(self._spill_path(key), 'rb') as f:
+                data = f.read()
+        except OSError:
+            self._drop_spilled(key)
+            return None
+        self._drop_spilled(key)
+        return Artifact(data, key_etag(key))
+
+    def _drop_spilled(self, key):
+        self._spill_size -= self._spilled.pop(key, 0)
+        try:
+            os.remove(self._spill_path(key))
+        except OSError:
+            pass
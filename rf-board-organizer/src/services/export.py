@@ -0,0 +1,240 @@
+import io
+import math
+import ezdxf
+from ezdxf.addons import r12writer
+from stl import Mode
+from src.services import mesh as meshing
+from src.services import toolpath
+
+# Layer name -> ACI color used by every DXF writer
+LAYER_COLORS = {
+    'BOARD_OUTLINE': 1,   # Red
+    'MOUNTING_HOLES': 2,  # Yellow
+    'BOARD_LABELS': 3,    # Green
+    'BASE_OUTLINE': 4,    # Cyan
+}
+
+# Builder function names for each cached DXF format (R12 is streamed instead)
+DXF_BUILDERS = {
+    'blocks': 'build_layout_dxf',
+    'flat': 'build_flat_layout_dxf',
+    'toolpath': 'build_toolpath_dxf',
+}
+
+# Flush size of the streaming DXF writer
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# L-bracket parameters
+BRACKET_THICKNESS = 3.0  # 3mm thick brackets
+BRACKET_WIDTH = 10.0     # 10mm wide brackets
+BRACKET_HOLE_DIAMETER = 3.0  # Standard mounting hole diameter
+BRACKET_HOLE_OFFSET = 5.0    # Distance from edge to hole center
+
+
+def _new_layout_doc(base_width, base_height):
+    doc = ezdxf.new('R2010')
+
+    # Create layers
+    for layer, color in LAYER_COLORS.items():
+        doc.layers.new(layer, dxfattribs={'color': color})
+
+    # Add base plate outline
+    doc.modelspace().add_lwpolyline([
+        (0, 0), (base_width, 0), (base_width, base_height), (0, base_height), (0, 0)
+    ], dxfattribs={'layer': 'BASE_OUTLINE'})
+    return doc
+
+
+def board_shape(board):
+    """(key, centre, rotation, base width, base height, holes) of a board dict
+
+    Board dicts carry their placed footprint (x, y, width, height) and absolute
+    holes, plus an optional rotation. The shape is expressed unrotated about
+    the board centre, so the same module placed anywhere, at any quarter
+    turn, maps to the same key.
+    """
+    rotation = int(board.get('rotation') or 0) % 360
+    width, height = board['width'], board['height']
+    center_x, center_y = board['x'] + width / 2, board['y'] + height / 2
+    if rotation % 180 == 90:
+        width, height = height, width
+
+    rad = math.radians(rotation)
+    cos, sin = round(math.cos(rad), 12), round(math.sin(rad), 12)
+    holes = []
+    for hole in board.get('holes', []):
+        rel_x, rel_y = hole['x'] - center_x, hole['y'] - center_y
+        # Undo the placement rotation
+        holes.append((round(rel_x * cos + rel_y * sin, 6), round(-rel_x * sin + rel_y * cos, 6),
+                       round(hole['diameter'], 6)))
+    holes = tuple(sorted(holes))
+    key = (board['name'], round(width, 6), round(height, 6), holes)
+    return key, (center_x, center_y), rotation, width, height, holes
+
+
+def build_layout_dxf(boards, base_width, base_height):
+    """Build the laser-cutting DXF document for a base plate and its boards
+
+    Each distinct board shape (name, size and hole pattern) is defined once
+    as a block centred on the board, and every placement is an INSERT at the
+    board centre with its rotation, so plates repeating a module stay small.
+    """
+    doc = _new_layout_doc(base_width, base_height)
+    msp = doc.modelspace()
+    blocks = {}
+
+    for board in boards:
+        key, center, rotation, width, height, holes = board_shape(board)
+        name = blocks.get(key)
+        if name is None:
+            name = blocks[key] = f'BOARD_{len(blocks)}'
+            block = doc.blocks.new(name=name)
+            block.add_lwpolyline([
+                (-width/2, -height/2), (width/2, -height/2), (width/2, height/2), (-width/2, height/2)
+            ], close=True, dxfattribs={'layer': 'BOARD_OUTLINE'})
+            block.add_text(key[0], dxfattribs={'layer': 'BOARD_LABELS', 'height': 5, 'insert': (0, 0)})
+            for hole_x, hole_y, diameter in holes:
+                block.add_circle((hole_x, hole_y), diameter/2, dxfattribs={'layer': 'MOUNTING_HOLES'})
+
+        msp.add_blockref(name, center, dxfattribs={'layer': 'BOARD_OUTLINE', 'rotation': rotation})
+
+    return doc
+
+
+def build_flat_layout_dxf(boards, base_width, base_height):
+    """Layout DXF with every board drawn as individual entities, no blocks
+
+    For CAM tools that do not expand INSERTs.
+    """
+    doc = _new_layout_doc(base_width, base_height)
+    msp = doc.modelspace()
+
+    # Add boards
+    for board in boards:
+        x, y = board['x'], board['y']
+        width, height = board['width'], board['height']
+
+        # Board outline
+        msp.add_lwpolyline([
+            (x, y), (x + width, y), (x + width, y + height), (x, y + height), (x, y)
+        ], dxfattribs={'layer': 'BOARD_OUTLINE'})
+
+        # Board label
+        msp.add_text(board['name'], dxfattribs={
+            'layer': 'BOARD_LABELS',
+            'height': 5,
+            'insert': (x + width/2, y + height/2)
+        })
+
+        # Mounting holes
+        for hole in board.get('holes', []):
+            msp.add_circle((hole['x'], hole['y']), hole['diameter']/2,
+                           dxfattribs={'layer': 'MOUNTING_HOLES'})
+
+    return doc
+
+
+def build_toolpath_dxf(boards, base_width, base_height):
+    """Layout DXF with cut entities merged and ordered for the laser
+
+    Overlapping and collinear edges are fused so shared board edges are cut
+    once, and entities are written holes first, then board outlines, then
+    the plate outline, each group ordered to keep rapid travel short (see
+    toolpath.optimise). Labels come last, as they are not cut.
+    """
+    doc = ezdxf.new('R2010')
+    msp = doc.modelspace()
+    for layer, color in LAYER_COLORS.items():
+        doc.layers.new(layer, dxfattribs={'color': color})
+
+    for cut in toolpath.optimise(toolpath.layout_cuts(boards, base_width, base_height)):
+        if cut.kind == 'circle':
+            msp.add_circle(cut.center, cut.radius, dxfattribs={'layer': cut.layer})
+        else:
+            msp.add_line(cut.start, cut.end, dxfattribs={'layer': cut.layer})
+
+    for board in boards:
+        msp.add_text(board['name'], dxfattribs={
+            'layer': 'BOARD_LABELS',
+            'height': 5,
+            'insert': (board['x'] + board['width']/2, board['y'] + board['height']/2)
+        })
+    return doc
+
+
+def standoff_params(hole_diameter, standoff_height, segments=None, chord_tolerance=None):
+    """Resolved geometry parameters of a hollow standoff"""
+    inner_radius = hole_diameter / 2
+    outer_radius = inner_radius * 1.5  # 1.5x bigger outer diameter
+    return {
+        'inner_radius': inner_radius,
+        'outer_radius': outer_radius,
+        'height': standoff_height,
+        'segments': meshing.resolve_segments(outer_radius, segments, chord_tolerance)
+    }
+
+
+def build_standoff_mesh(inner_radius, outer_radius, height, segments):
+    """Build the STL mesh of a cylindrical standoff with hollow center"""
+    vertices, faces = meshing.hollow_cylinder(inner_radius, outer_radius, height, segments)
+    return meshing.to_mesh(vertices, faces)
+
+
+def build_l_bracket_mesh(board_width, board_height, standoff_height):
+    """Build the STL mesh of the four corner L-brackets for a board, drilled for mounting screws"""
+    vertices, faces = meshing.l_brackets(board_width, board_height, BRACKET_THICKNESS,
+                                         BRACKET_WIDTH, standoff_height,
+                                         BRACKET_HOLE_DIAMETER, BRACKET_HOLE_OFFSET,
+                                         meshing.resolve_segments(BRACKET_HOLE_DIAMETER / 2))
+    return meshing.to_mesh(vertices, faces)
+
+
+def iter_layout_dxf(boards, base_width, base_height, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the layout DXF in encoded chunks without building a document
+
+    Uses ezdxf's R12 stream writer, so memory stays flat however many boards
+    the layout holds. R12 has no layer table here, so each entity carries
+    its layer color explicitly.
+    """
+    buffer = io.StringIO()
+
+    def flush():
+        data = buffer.getvalue().encode('cp1252', errors='replace')
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    with r12writer(buffer) as dxf:
+        dxf.add_polyline_2d([(0, 0), (base_width, 0), (base_width, base_height), (0, base_height)],
+                            closed=True, layer='BASE_OUTLINE', color=LAYER_COLORS['BASE_OUTLINE'])
+
+        for board in boards:
+            x, y = board['x'], board['y']
+            width, height = board['width'], board['height']
+
+            dxf.add_polyline_2d([(x, y), (x + width, y), (x + width, y + height), (x, y + height)],
+                                closed=True, layer='BOARD_OUTLINE', color=LAYER_COLORS['BOARD_OUTLINE'])
+            dxf.add_text(board['name'], insert=(x + width/2, y + height/2), height=5,
+                         layer='BOARD_LABELS', color=LAYER_COLORS['BOARD_LABELS'])
+            for hole in board.get('holes', []):
+                dxf.add_circle((hole['x'], hole['y']), hole['diameter']/2,
+                               layer='MOUNTING_HOLES', color=LAYER_COLORS['MOUNTING_HOLES'])
+
+            if buffer.tell() >= chunk_size:
+                yield flush()
+
+    yield flush()
+
+
+def dxf_bytes(doc):
+    """Serialise a DXF document in memory"""
+    stream = io.StringIO()
+    doc.write(stream)
+    return stream.getvalue().encode(doc.output_encoding, errors='replace')
+
+
+def stl_bytes(stl_mesh, name):
+    """Serialise a mesh as binary STL in memory"""
+    stream = io.BytesIO()
+    stl_mesh.save(name, fh=stream, mode=Mode.BINARY)
+    return stream.getvalue()
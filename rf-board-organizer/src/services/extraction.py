@@ -0,0 +1,280 @@
+import abc
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+from src.models.extraction import ExtractionResult
+from src.services import metrics
+from src.services.lazy import LazyModule
+
+# Pillow-based upload preprocessing, imported with the first extraction
+images = LazyModule('src.services.images')
+
+MODEL_NAME = 'gemini-2.5-flash-preview-05-20'
+PLACEHOLDER_API_KEY = 'YOUR_GOOGLE_API_KEY_HERE'
+
+# Images up to this size are sent inline with the prompt (Gemini caps inline requests at 20 MB)
+INLINE_IMAGE_LIMIT = 18 * 1024 * 1024
+
+# Cached extractions expire after this many seconds
+DEFAULT_CACHE_TTL = 30 * 24 * 3600
+
+SYSTEM_PROMPT = """
+You are an expert at analyzing technical drawings and dimensional diagrams of electronic circuit boards and RF modules.
+
+Analyze this image and extract the following information:
+1. Board/module name or identifier
+2. Overall board dimensions (width and height in mm)
+3. Number of mounting holes in X direction (1 or 2)
+4. Number of mounting holes in Y direction (1 or 2)
+5. Mounting hole spacing in X direction (center-to-center distance in mm)
+6. Mounting hole spacing in Y direction (center-to-center distance in mm)
+7. Mounting hole diameter (in mm)
+
+User's additional context: {user_prompt}
+
+Please respond with a JSON object in this exact format:
+{{
+  "name": "Board Name",
+  "width": 50.0,
+  "height": 30.0,
+  "mounting_holes_x": 2,
+  "mounting_holes_y": 2,
+  "hole_spacing_x": 40.0,
+  "hole_spacing_y": 20.0,
+  "hole_diameter": 3.0,
+  "standoff_height": 10.0
+}}
+
+Important notes:
+- All dimensions should be in millimeters
+- mounting_holes_x and mounting_holes_y should be 1 or 2 only
+- If only 1 hole in a direction, set the spacing for that direction to 0.0
+- If you cannot determine a value, use reasonable defaults for RF circuit boards
+- Ensure the JSON is valid and properly formatted
+"""
+
+REQUIRED_FIELDS = ['name', 'width', 'height', 'mounting_holes_x', 'mounting_holes_y',
+                   'hole_spacing_x', 'hole_spacing_y', 'hole_diameter']
+NUMERIC_FIELDS = ['width', 'height', 'hole_spacing_x', 'hole_spacing_y',
+                  'hole_diameter', 'standoff_height']
+INT_FIELDS = ['mounting_holes_x', 'mounting_holes_y']
+
+
+class ExtractionError(Exception):
+    """Model call or response parsing failed; keeps the raw model output if any"""
+
+    def __init__(self, message, raw_response=None):
+        super().__init__(message)
+        self.raw_response = raw_response
+
+
+def cache_ttl():
+    return int(os.getenv('EXTRACTION_CACHE_TTL', DEFAULT_CACHE_TTL))
+
+
+def normalise_prompt(user_prompt):
+    """Collapse whitespace and case so trivially different prompts share a cache entry"""
+    return ' '.join((user_prompt or '').split()).lower()
+
+
+def build_prompt(user_prompt):
+    return SYSTEM_PROMPT.format(user_prompt=user_prompt)
+
+
+def request_key(image_bytes, user_prompt, model_name):
+    """Cache key of an extraction: image bytes, normalised prompt and model"""
+    digest = hashlib.sha256()
+    digest.update(hashlib.sha256(image_bytes).digest())
+    digest.update(normalise_prompt(user_prompt).encode('utf-8'))
+    digest.update(model_name.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def parse_dimensions(response_text):
+    """Pull the dimensions JSON out of a model response and coerce its types"""
+    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+    if not json_match:
+        raise ValueError("Could not extract valid JSON from Gemini response")
+    dimensions = json.loads(json_match.group())
+
+    for field in REQUIRED_FIELDS:
+        if field not in dimensions:
+            raise ValueError(f"Missing required field: {field}")
+
+    for field in NUMERIC_FIELDS:
+        if field in dimensions:
+            dimensions[field] = float(dimensions[field])
+
+    for field in INT_FIELDS:
+        if field in dimensions:
+            dimensions[field] = int(dimensions[field])
+            # Validate hole counts
+            if dimensions[field] not in [1, 2]:
+                dimensions[field] = 2  # Default to 2 if invalid
+
+    # Set default standoff height if not provided
+    if 'standoff_height' not in dimensions:
+        dimensions['standoff_height'] = 3.0
+
+    return dimensions
+
+
+class DimensionExtractor(abc.ABC):
+    """Interface of a vision model that reads board dimensions from an image"""
+
+    model_name = None
+
+    @abc.abstractmethod
+    def generate(self, image_bytes, mime_type, prompt):
+        """Return the model's raw text response for one image"""
+
+
+class GeminiExtractor(DimensionExtractor):
+    """Google Gemini backend
+
+    google.generativeai takes most of a second to import, so it is loaded
+    when the first extractor is built rather than with this module.
+    """
+
+    def __init__(self, api_key, model_name=MODEL_NAME):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self.genai = genai
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, image_bytes, mime_type, prompt):
+        if len(image_bytes) <= INLINE_IMAGE_LIMIT:
+            image = {'mime_type': mime_type, 'data': image_bytes}
+        else:
+            image = self.genai.upload_file(io.BytesIO(image_bytes), mime_type=mime_type)
+        response = self.model.generate_content([image, prompt])
+        return response.text.strip()
+
+
+class FakeExtractor(DimensionExtractor):
+    """Local stand-in for tests and benchmarks: fixed answer after a fixed delay
+
+    bandwidth (bytes per second) adds the time a real call would spend
+    sending the image.
+    """
+
+    model_name = 'fake'
+
+    def __init__(self, dimensions=None, latency=0.0, bandwidth=None):
+        self.dimensions = dimensions or {
+            'name': 'Fake Board',
+            'width': 50.0,
+            'height': 30.0,
+            'mounting_holes_x': 2,
+            'mounting_holes_y': 2,
+            'hole_spacing_x': 40.0,
+            'hole_spacing_y': 20.0,
+            'hole_diameter': 3.0,
+            'standoff_height': 10.0
+        }
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.calls = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+
+    def generate(self, image_bytes, mime_type, prompt):
+        with self._lock:
+            self.calls += 1
+            self.bytes_received += len(image_bytes)
+        delay = self.latency + (len(image_bytes) / self.bandwidth if self.bandwidth else 0.0)
+        if delay:
+            time.sleep(delay)
+        return json.dumps(self.dimensions)
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution
+
+    The first caller runs the function; callers arriving while it is in
+    flight wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def do(self, key, func):
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return future.result()
+
+
+def extract_with_cache(extractor, flight, image_bytes, mime_type, user_prompt, throttle=None):
+    """Dimensions for one image, served from the database cache when possible
+
+    Misses go through `flight` so concurrent identical requests make a
+    single model call; `throttle` is called right before that call (e.g. a
+    rate limiter). Returns (dimensions, raw_response, cached).
+    """
+    key = request_key(image_bytes, user_prompt, extractor.model_name)
+    ttl = cache_ttl()
+
+    cached = ExtractionResult.lookup(key, ttl)
+    if cached is not None:
+        result = cached.to_dict()
+        return result['dimensions'], result['raw_response'], True
+
+    def run():
+        # Keyed on the original upload, so cache hits skip preprocessing too
+        with metrics.span('preprocess'):
+            payload, payload_type = images.prepare(image_bytes, mime_type)
+        if throttle is not None:
+            throttle()
+        with metrics.span('model_call'):
+            response_text = extractor.generate(payload, payload_type, build_prompt(user_prompt))
+        try:
+            with metrics.span('response_parse'):
+                dimensions = parse_dimensions(response_text)
+        except Exception as e:
+            raise ExtractionError(str(e), response_text)
+        ExtractionResult.store(key, dimensions, response_text, ttl)
+        return dimensions, response_text
+
+    dimensions, response_text = flight.do(key, run)
+    return dimensions, response_text, False
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_extractor():
+    """Configured extractor, or None when no Gemini API key is set"""
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            api_key = os.getenv('GOOGLE_API_KEY')
+            if api_key and api_key != PLACEHOLDER_API_KEY:
+                _extractor = GeminiExtractor(api_key)
+        return _extractor
+
+
+def set_extractor(extractor):
+    """Swap the extraction backend, e.g. for a FakeExtractor"""
+    global _extractor
+    with _extractor_lock:
+        _extractor = extractor
@@ -0,0 +1,170 @@
+import io
+import json
+import os
+import struct
+import zipfile
+from concurrent.futures import as_completed
+import numpy as np
+from werkzeug.utils import secure_filename
+from src.services import export, geometry
+from src.services import mesh as meshing
+from src.services.workers import process_pool
+
+# Holes per standoff task; each task returns raw binary STL records
+STANDOFF_CHUNK = 2000
+# Bracket types per task, so small parts are not dominated by pool round trips
+BRACKET_CHUNK = 50
+
+STL_HEADER = b'rf-board-organizer merged standoffs'.ljust(80, b' ')
+
+# Deflate is the serial part of a bundle; level 1 is several times faster than
+# the default and costs only a few percent of size on STL/DXF data
+COMPRESS_LEVEL = 1
+
+_executor = None
+
+
+def get_executor():
+    """Process pool shared by fabrication bundles (FABRICATION_WORKERS, default one per CPU)"""
+    global _executor
+    if _executor is None:
+        workers = int(os.getenv('FABRICATION_WORKERS', 0)) or os.cpu_count() or 1
+        _executor = process_pool(workers)
+    return _executor
+
+
+def plan_for_layout_items(items, base_width, base_height, include_brackets=True):
+    """Everything a bundle needs, as plain picklable data, from (id, board, placement) items
+
+    Returns a dict with the plate size, the DXF board dicts, a (N, 4) array of
+    standoffs (x, y, hole diameter, height) at their absolute hole positions,
+    and bracket file names grouped by identical (width, height, standoff_height).
+    """
+    boards = geometry.layout_geometry(items)
+    holes = [(hole['x'], hole['y'], hole['diameter'], board['standoff_height'])
+             for board in boards for hole in board['holes']]
+
+    # Brackets are per board type, not per placement: rotation does not change the part
+    brackets = {}
+    seen = set()
+    for _, board, _ in items:
+        if include_brackets and board.id not in seen:
+            seen.add(board.id)
+            name = f"brackets/{secure_filename(board.name) or 'board'}_{board.id}_l_brackets.stl"
+            brackets.setdefault((board.width, board.height, board.standoff_height), []).append(name)
+
+    return {
+        'base_width': base_width,
+        'base_height': base_height,
+        'boards': boards,
+        'holes': np.array(holes, dtype=float).reshape(-1, 4),
+        'brackets': brackets,
+    }
+
+
+def plate_dxf(boards, base_width, base_height):
+    return export.dxf_bytes(export.build_layout_dxf(boards, base_width, base_height))
+
+
+def standoff_records(holes, segments=None, chord_tolerance=None):
+    """(triangle count, binary STL records) of a standoff on every hole in holes
+
+    Holes sharing a diameter and height are built from one template and
+    translated in a single broadcast.
+    """
+    kinds, inverse = np.unique(holes[:, 2:4], axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    parts = []
+    for index, (diameter, height) in enumerate(kinds):
+        params = export.standoff_params(diameter, height, segments, chord_tolerance)
+        vertices, faces = meshing.hollow_cylinder(**params)
+        offsets = np.zeros((np.count_nonzero(inverse == index), 3))
+        offsets[:, :2] = holes[inverse == index, :2]
+        parts.append(meshing.translated_copies(vertices, faces, offsets))
+    stl_mesh = meshing.triangles_to_mesh(np.concatenate(parts))
+    return len(stl_mesh.data), stl_mesh.data.tobytes()
+
+
+def bracket_stls(specs):
+    """Binary L-bracket STLs for a list of (board_width, board_height, standoff_height)"""
+    return [export.stl_bytes(export.build_l_bracket_mesh(*spec), 'l_brackets.stl') for spec in specs]
+
+
+class _ZipPipe(io.RawIOBase):
+    """Write-only sink for ZipFile; drain() hands back what was written since the last call"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_bundle(plan, segments=None, chord_tolerance=None, executor=None):
+    """Yield a ZIP of plate.dxf, standoffs.stl and brackets/*.stl as its parts finish
+
+    The plate DXF, each chunk of standoffs and each batch of bracket types
+    are built as separate process-pool tasks. Finished parts are compressed into the
+    archive and flushed to the client straight away; the merged standoff STL
+    is written once its last chunk is in.
+    """
+    executor = executor or get_executor()
+    holes = plan['holes']
+    pipe = _ZipPipe()
+    futures = {executor.submit(plate_dxf, plan['boards'], plan['base_width'], plan['base_height']):
+               ('plate', ['plate.dxf'])}
+    chunks = [holes[start:start + STANDOFF_CHUNK] for start in range(0, len(holes), STANDOFF_CHUNK)]
+    for index, chunk in enumerate(chunks):
+        futures[executor.submit(standoff_records, chunk, segments, chord_tolerance)] = ('standoffs', index)
+    brackets = list(plan['brackets'].items())
+    for start in range(0, len(brackets), BRACKET_CHUNK):
+        specs, names = zip(*brackets[start:start + BRACKET_CHUNK])
+        futures[executor.submit(bracket_stls, list(specs))] = ('brackets', names)
+
+    standoff_chunks = {}
+    try:
+        with zipfile.ZipFile(pipe, 'w', compression=zipfile.ZIP_DEFLATED,
+                             compresslevel=COMPRESS_LEVEL) as bundle:
+            for future in as_completed(futures):
+                kind, target = futures[future]
+                if kind == 'standoffs':
+                    standoff_chunks[target] = future.result()
+                    if len(standoff_chunks) < len(chunks):
+                        continue
+                    count = sum(chunk_count for chunk_count, _ in standoff_chunks.values())
+                    with bundle.open('standoffs.stl', 'w') as entry:
+                        entry.write(STL_HEADER + struct.pack('<I', count))
+                        for index in range(len(chunks)):
+                            entry.write(standoff_chunks[index][1])
+                    standoff_chunks.clear()
+                elif kind == 'brackets':
+                    for names, data in zip(target, future.result()):
+                        for name in names:
+                            bundle.writestr(name, data)
+                else:
+                    for name in target:
+                        bundle.writestr(name, future.result())
+                data = pipe.drain()
+                if data:
+                    yield data
+
+            bundle.writestr('manifest.json', json.dumps({
+                'plate': {'width': plan['base_width'], 'height': plan['base_height']},
+                'boards': len(plan['boards']),
+                'standoffs': len(holes),
+                'bracket_files': sorted(name for names in plan['brackets'].values() for name in names),
+            }, indent=2))
+        yield pipe.drain()
+    finally:
+        # A client that disconnects mid-download leaves nothing queued on the pool
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,160 @@
+import math
+from collections import namedtuple
+import numpy as np
+
+# Server-side copies of getActualDimensions / getMountingHoles from App.jsx.
+# position_x, position_y is the lower-left corner of the rotated footprint and
+# holes are laid out symmetrically about the board centre before rotation.
+# The placement defaults to the Board row's own position_x/position_y/rotation;
+# pass x, y, rotation to place it elsewhere (e.g. from a LayoutPlacement).
+
+
+# Stand-in for a LayoutPlacement when a position comes from a request body
+Placement = namedtuple('Placement', ['x', 'y', 'rotation'])
+
+
+def _placement(board, x, y, rotation):
+    if x is None:
+        x = board.position_x or 0.0
+    if y is None:
+        y = board.position_y or 0.0
+    if rotation is None:
+        rotation = board.rotation or 0
+    return x, y, rotation
+
+
+def actual_dimensions(board, rotation=None):
+    """Width and height of a board's footprint after rotation"""
+    if rotation is None:
+        rotation = board.rotation or 0
+    if rotation % 180 == 90:
+        return board.height, board.width
+    return board.width, board.height
+
+
+def footprint(board, x=None, y=None, rotation=None):
+    """Axis-aligned footprint (x0, y0, x1, y1) of a placed board"""
+    x, y, rotation = _placement(board, x, y, rotation)
+    width, height = actual_dimensions(board, rotation)
+    return (x, y, x + width, y + height)
+
+
+def placement_footprint(placement):
+    return footprint(placement.board, placement.x, placement.y, placement.rotation)
+
+
+def placement_holes(placement):
+    return mounting_holes(placement.board, placement.x, placement.y, placement.rotation)
+
+
+def mounting_holes(board, x=None, y=None, rotation=None):
+    """Absolute (x, y, diameter) of every mounting hole of a placed board"""
+    if board.mounting_holes_x == 1:
+        x_positions = [0.0]
+    else:
+        x_positions = [-board.hole_spacing_x / 2, board.hole_spacing_x / 2]
+    if board.mounting_holes_y == 1:
+        y_positions = [0.0]
+    else:
+        y_positions = [-board.hole_spacing_y / 2, board.hole_spacing_y / 2]
+
+    x, y, rotation = _placement(board, x, y, rotation)
+    rad = math.radians(rotation)
+    cos, sin = round(math.cos(rad), 12), round(math.sin(rad), 12)
+    x0, y0, x1, y1 = footprint(board, x, y, rotation)
+    center_x, center_y = (x0 + x1) / 2, (y0 + y1) / 2
+
+    return [
+        (center_x + rel_x * cos - rel_y * sin,
+         center_y + rel_x * sin + rel_y * cos,
+         board.hole_diameter)
+        for rel_x in x_positions for rel_y in y_positions
+    ]
+
+
+# Vectorized versions of the above for whole layouts. Columns are NumPy arrays
+# with one entry per (id, board, placement) item; holes come back flattened
+# with the index of the item they belong to.
+
+BOARD_COLUMNS = ('width', 'height', 'mounting_holes_x', 'mounting_holes_y',
+                 'hole_spacing_x', 'hole_spacing_y', 'hole_diameter', 'standoff_height')
+
+# (x index, y index) of the up-to-four holes, in mounting_holes order
+_HOLE_GRID = np.array([(0, 0), (0, 1), (1, 0), (1, 1)])
+
+
+def item_columns(items):
+    """Columns of board specs and placements for (id, board, placement) items"""
+    rows = []
+    for _, board, placement in items:
+        if placement is not None:
+            position = _placement(board, placement.x, placement.y, placement.rotation)
+        else:
+            position = _placement(board, None, None, None)
+        rows.append((board.width, board.height, board.mounting_holes_x, board.mounting_holes_y,
+                     board.hole_spacing_x, board.hole_spacing_y, board.hole_diameter,
+                     board.standoff_height) + position)
+    table = np.array(rows, dtype=float).reshape(-1, len(BOARD_COLUMNS) + 3)
+    columns = dict(zip(BOARD_COLUMNS + ('x', 'y'), table.T))
+    columns['rotation'] = table[:, -1].astype(int) % 360
+    return columns
+
+
+def footprints(columns):
+    """(N, 4) rotated footprints x0, y0, x1, y1"""
+    quarter = columns['rotation'] % 180 == 90
+    width = np.where(quarter, columns['height'], columns['width'])
+    height = np.where(quarter, columns['width'], columns['height'])
+    return np.stack([columns['x'], columns['y'], columns['x'] + width, columns['y'] + height], axis=1)
+
+
+def hole_centres(columns, boxes=None):
+    """Every mounting hole of every item in one pass
+
+    Returns (owner, centres, diameters): the item index of each hole, its
+    absolute (H, 2) centre and its diameter, ordered by item and then as
+    mounting_holes() orders them.
+    """
+    if boxes is None:
+        boxes = footprints(columns)
+    count_x = columns['mounting_holes_x'][:, None]
+    count_y = columns['mounting_holes_y'][:, None]
+    grid_x, grid_y = _HOLE_GRID[:, 0][None], _HOLE_GRID[:, 1][None]
+
+    valid = (grid_x < count_x) & (grid_y < count_y)
+    rel_x = np.where(count_x == 1, 0.0, (grid_x - 0.5) * columns['hole_spacing_x'][:, None])
+    rel_y = np.where(count_y == 1, 0.0, (grid_y - 0.5) * columns['hole_spacing_y'][:, None])
+
+    rad = np.radians(columns['rotation'])[:, None]
+    cos, sin = np.round(np.cos(rad), 12), np.round(np.sin(rad), 12)
+    center_x = ((boxes[:, 0] + boxes[:, 2]) / 2)[:, None]
+    center_y = ((boxes[:, 1] + boxes[:, 3]) / 2)[:, None]
+    x = center_x + rel_x * cos - rel_y * sin
+    y = center_y + rel_x * sin + rel_y * cos
+
+    owner = np.nonzero(valid)[0]
+    centres = np.stack([x[valid], y[valid]], axis=1)
+    return owner, centres, columns['hole_diameter'][owner]
+
+
+def layout_geometry(items):
+    """Footprint and holes of every item, as JSON-ready dicts"""
+    if not items:
+        return []
+    columns = item_columns(items)
+    boxes = footprints(columns)
+    owner, centres, diameters = hole_centres(columns, boxes)
+
+    holes = [[] for _ in items]
+    for index, (x, y), diameter in zip(owner.tolist(), centres.tolist(), diameters.tolist()):
+        holes[index].append({'x': x, 'y': y, 'diameter': diameter})
+    return [{
+        'id': item_id,
+        'board_id': board.id,
+        'name': board.name,
+        'x': x0, 'y': y0, 'width': x1 - x0, 'height': y1 - y0,
+        'rotation': rotation,
+        'standoff_height': board.standoff_height,
+        'holes': board_holes
+    } for (item_id, board, _), (x0, y0, x1, y1), rotation, board_holes
+        in zip(items, boxes.tolist(), columns['rotation'].tolist(), holes)]
@@ -0,0 +1,127 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Pillow is optional: without it uploads go to the model as they came
+try:
+    from PIL import Image, ImageChops, ImageOps
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Uploads are shrunk to this many pixels on the long side before extraction
+MAX_DIMENSION = int(os.getenv('IMAGE_MAX_DIMENSION', 1600))
+JPEG_QUALITY = int(os.getenv('IMAGE_JPEG_QUALITY', 85))
+PREPROCESS = os.getenv('IMAGE_PREPROCESS', '1') == '1'
+
+# Uploads up to this size are sent as they are unless EXIF says they need rotating
+MIN_BYTES = int(os.getenv('IMAGE_MIN_BYTES', 256 * 1024))
+
+# Sources where PNG output may beat JPEG (screenshots, drawings)
+LOSSLESS_FORMATS = {'PNG', 'GIF', 'BMP'}
+
+EXIF_ORIENTATION = 0x0112
+
+# Border pixels within this grey level of the corner colour are cropped away
+BORDER_THRESHOLD = 24
+# Never crop to less than this fraction of either side (e.g. a mostly blank page)
+MIN_CROP_FRACTION = 0.2
+
+_executor = None
+
+
+def get_executor():
+    """Thread pool for preprocessing (IMAGE_WORKERS, default one per CPU)
+
+    Pillow releases the GIL while decoding, resampling and encoding, so
+    threads run in parallel without copying images between processes; the
+    pool bounds how many full-size images are decoded at once.
+    """
+    global _executor
+    if _executor is None:
+        workers = int(os.getenv('IMAGE_WORKERS', 0)) or os.cpu_count() or 1
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image')
+    return _executor
+
+
+def content_box(image, threshold=BORDER_THRESHOLD):
+    """Bounding box of everything that differs from the top-left corner colour, or None"""
+    grey = image.convert('L')
+    background = Image.new('L', grey.size, grey.getpixel((0, 0)))
+    mask = ImageChops.difference(grey, background).point(lambda value: 255 if value > threshold else 0)
+    box = mask.getbbox()
+    if box is None:
+        return None
+    width, height = box[2] - box[0], box[3] - box[1]
+    if width < grey.width * MIN_CROP_FRACTION or height < grey.height * MIN_CROP_FRACTION:
+        return None
+    if box == (0, 0, grey.width, grey.height):
+        return None
+    return box
+
+
+def _encode(image, quality, lossless):
+    """JPEG bytes, or PNG when the source was lossless and PNG comes out smaller"""
+    out = io.BytesIO()
+    image.save(out, 'JPEG', quality=quality, optimize=True)
+    encoded = out.getvalue(), 'image/jpeg'
+    if lossless:
+        out = io.BytesIO()
+        image.save(out, 'PNG')
+        if out.tell() < len(encoded[0]):
+            encoded = out.getvalue(), 'image/png'
+    return encoded
+
+
+def preprocess(image_bytes, mime_type, max_dimension=MAX_DIMENSION, quality=JPEG_QUALITY):
+    """Decode, auto-orient, crop uniform borders, downsize and re-encode an upload
+
+    Returns (bytes, mime type). Small upright uploads, images Pillow cannot
+    read, and results no smaller than the original (unless they had to be
+    rotated) come back unchanged.
+    """
+    if Image is None:
+        return image_bytes, mime_type
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        # getexif() decodes a whole PNG to find its chunk; camera orientation comes in JPEGs
+        rotated = image.format == 'JPEG' and image.getexif().get(EXIF_ORIENTATION, 1) != 1
+        if len(image_bytes) <= MIN_BYTES and not rotated:
+            return image_bytes, mime_type
+        lossless = image.format in LOSSLESS_FORMATS
+
+        # JPEG can decode straight to a reduced scale that still covers the target size
+        width, height = image.size
+        scale = max_dimension / max(width, height)
+        if scale < 1:
+            image.draft('RGB', (int(width * scale), int(height * scale)))
+        image = ImageOps.exif_transpose(image)
+
+        if image.mode not in ('RGB', 'L'):
+            rgba = image.convert('RGBA')
+            image = Image.new('RGB', rgba.size, 'white')
+            image.paste(rgba, mask=rgba.getchannel('A'))
+
+        box = content_box(image)
+        if box is not None:
+            image = image.crop(box)
+        if max(image.size) > max_dimension:
+            image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+
+        data, data_type = _encode(image, quality, lossless)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.info('Sending image unprocessed: %s', e)
+        return image_bytes, mime_type
+
+    if len(data) >= len(image_bytes) and not rotated:
+        return image_bytes, mime_type
+    return data, data_type
+
+
+def prepare(image_bytes, mime_type):
+    """Preprocessed upload via the shared pool; a no-op with IMAGE_PREPROCESS=0"""
+    if not PREPROCESS or Image is None:
+        return image_bytes, mime_type
+    return get_executor().submit(preprocess, image_bytes, mime_type).result()
@@ -0,0 +1,223 @@
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import insert
+from src.models.board import Board, db
+from src.services import extraction, library
+
+# Finished jobs are forgotten after this many seconds
+JOB_RETENTION = 3600
+
+BOARD_FIELDS = ['name', 'width', 'height', 'mounting_holes_x', 'mounting_holes_y',
+                'hole_spacing_x', 'hole_spacing_y', 'hole_diameter', 'standoff_height']
+
+
+class RateLimiter:
+    """Token bucket: at most `rate` acquisitions per second, bursts up to `burst`"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def with_retries(func, attempts=3, base_delay=1.0, max_delay=30.0, on_retry=None):
+    """Call func, retrying transient failures with jittered exponential backoff
+
+    ExtractionError (the model answered but the answer was unusable) is not
+    retried.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return func()
+        except extraction.ExtractionError:
+            raise
+        except Exception:
+            if attempt == attempts:
+                raise
+            if on_retry is not None:
+                on_retry(attempt)
+            delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+            time.sleep(delay * random.uniform(0.5, 1.0))
+
+
+def board_row(dimensions):
+    """Board column values from extracted dimensions, or None if they are unusable"""
+    try:
+        row = {field: dimensions[field] for field in BOARD_FIELDS}
+    except KeyError:
+        return None
+    if row['width'] <= 0 or row['height'] <= 0 or row['hole_diameter'] <= 0:
+        return None
+    row['name'] = str(row['name'])[:100]
+    return row
+
+
+class ExtractionJob:
+    """A batch of images extracted in the background, tracked per image"""
+
+    def __init__(self, images, user_prompt, create_boards):
+        self.id = uuid.uuid4().hex
+        self.user_prompt = user_prompt
+        self.create_boards = create_boards
+        self.created_at = time.time()
+        self.finished_at = None
+        self.board_ids = []
+        # Existing boards that extracted results duplicated (and were not inserted again)
+        self.duplicate_board_ids = []
+        # Results that repeated an earlier image of the same batch: {index, duplicate_of, board_id}
+        self.batch_duplicates = []
+        self.error = None
+        self.items = [{
+            'index': index,
+            'filename': filename,
+            'status': 'pending',
+            'attempts': 0,
+            'cached': False,
+            'dimensions': None,
+            'error': None
+        } for index, (filename, _, _) in enumerate(images)]
+        # Image bytes are dropped as soon as each item finishes
+        self._images = [(data, mime_type) for _, data, mime_type in images]
+        self._remaining = len(images)
+        self._lock = threading.Lock()
+
+    @property
+    def status(self):
+        if self.finished_at is not None:
+            return 'done'
+        if any(item['status'] != 'pending' for item in self.items):
+            return 'running'
+        return 'pending'
+
+    def to_dict(self):
+        with self._lock:
+            counts = {}
+            for item in self.items:
+                counts[item['status']] = counts.get(item['status'], 0) + 1
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'total': len(self.items),
+                'counts': counts,
+                'items': [dict(item) for item in self.items],
+                'board_ids': list(self.board_ids),
+                'duplicate_board_ids': list(self.duplicate_board_ids),
+                'batch_duplicates': [dict(duplicate) for duplicate in self.batch_duplicates],
+                'error': self.error
+            }
+
+
+class JobManager:
+    """Runs extraction jobs on a bounded thread pool with rate limiting and retries"""
+
+    def __init__(self, max_workers=None, rate_per_minute=None, attempts=3):
+        max_workers = max_workers or int(os.getenv('EXTRACTION_WORKERS', 4))
+        rate_per_minute = rate_per_minute or float(os.getenv('EXTRACTION_RATE_PER_MINUTE', 60))
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='extract')
+        self.limiter = RateLimiter(rate_per_minute / 60.0, burst=max_workers)
+        self.attempts = attempts
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, app, extractor, flight, images, user_prompt='', create_boards=False):
+        """Queue (filename, bytes, mime_type) images; returns the job immediately"""
+        job = ExtractionJob(images, user_prompt, create_boards)
+        with self._lock:
+            self._purge()
+            self.jobs[job.id] = job
+        for index in range(len(images)):
+            self.executor.submit(self._run_item, app, extractor, flight, job, index)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _purge(self):
+        cutoff = time.time() - JOB_RETENTION
+        for job_id in [job_id for job_id, job in self.jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    def _run_item(self, app, extractor, flight, job, index):
+        item = job.items[index]
+        image_bytes, mime_type = job._images[index]
+
+        def attempt():
+            with job._lock:
+                item['attempts'] += 1
+            return extraction.extract_with_cache(extractor, flight, image_bytes, mime_type,
+                                                 job.user_prompt, throttle=self.limiter.acquire)
+
+        with job._lock:
+            item['status'] = 'running'
+        try:
+            with app.app_context():
+                dimensions, _, cached = with_retries(attempt, self.attempts)
+            with job._lock:
+                item.update(status='done', dimensions=dimensions, cached=cached)
+        except Exception as e:
+            with job._lock:
+                item.update(status='failed', error=str(e))
+        finally:
+            with job._lock:
+                job._images[index] = None
+                job._remaining -= 1
+                last = job._remaining == 0
+            if last:
+                self._finish(app, job)
+
+    def _finish(self, app, job):
+        try:
+            if job.create_boards:
+                rows = [(item['index'], board_row(item['dimensions'])) for item in job.items
+                        if item['status'] == 'done']
+                rows = [(index, row) for index, row in rows if row is not None]
+                with app.app_context():
+                    # Skip near-duplicates of library boards, and repeats within the batch
+                    batch, unique, indexes, repeats = library.DuplicateIndex(), [], [], []
+                    for index, row in rows:
+                        existing = library.find_duplicates(row)
+                        if existing:
+                            job.duplicate_board_ids.append(existing[0])
+                            continue
+                        match = batch.match(row)
+                        if match is None:
+                            batch.add(('index', index), row)
+                            unique.append(row)
+                            indexes.append(index)
+                        else:
+                            repeats.append({'index': index, 'duplicate_of': match[1], 'board_id': None})
+                    board_ids = []
+                    if unique:
+                        # One executemany insert for the whole batch, ids returned in row order
+                        board_ids = db.session.scalars(
+                            insert(Board).returning(Board.id, sort_by_parameter_order=True), unique).all()
+                        db.session.commit()
+                        job.board_ids = list(board_ids)
+                    inserted = dict(zip(indexes, board_ids))
+                    for repeat in repeats:
+                        repeat['board_id'] = inserted.get(repeat['duplicate_of'])
+                    job.batch_duplicates = repeats
+        except Exception as e:
+            job.error = f"Could not create boards: {str(e)}"
+        finally:
+            job.finished_at = time.time()
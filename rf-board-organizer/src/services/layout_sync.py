@@ -0,0 +1,419 @@
+import json
+import logging
+import os
+import queue
+import threading
+from collections import deque
+from contextlib import contextmanager
+from flask import current_app
+from sqlalchemy import delete, insert, select, update
+from src.models.board import Board, Layout, LayoutPlacement, db
+
+logger = logging.getLogger(__name__)
+
+# Drag moves are held in memory and written at most once per this many
+# seconds per layout; 0 writes every delta straight through
+COALESCE_INTERVAL = float(os.getenv('LAYOUT_COALESCE_INTERVAL', 0.25))
+
+# Deltas remembered per layout, for conflict checks and for event-stream
+# clients catching up after a reconnect
+HISTORY = int(os.getenv('LAYOUT_HISTORY', 500))
+
+# Seconds between keep-alive comments on an idle event stream
+HEARTBEAT = 15.0
+
+# Events a slow event-stream client may fall behind by before it is told to reload
+SUBSCRIBER_BACKLOG = 1000
+
+OPS = ('move', 'rotate', 'add', 'remove')
+
+
+class DeltaError(ValueError):
+    """A delta that can never apply (malformed op, unknown board or version)"""
+
+
+class LayoutConflict(Exception):
+    """The delta touches placements someone else changed since the client's version
+
+    changes lists those deltas so the client can rebase, or is None when
+    they are no longer remembered and the client has to reload the layout.
+    """
+
+    def __init__(self, message, version, changes=None):
+        super().__init__(message)
+        self.version = version
+        self.changes = changes
+
+
+class Change:
+    """One applied delta; placement_ids None means the whole layout was rewritten"""
+
+    def __init__(self, version, client, ops, placement_ids):
+        self.version = version
+        self.client = client
+        self.ops = ops
+        self.placement_ids = placement_ids
+
+    def to_dict(self):
+        if self.placement_ids is None:
+            return {'version': self.version, 'client': self.client, 'reset': True}
+        return {'version': self.version, 'client': self.client, 'ops': self.ops}
+
+
+def format_event(change, layout_id):
+    """Server-sent event for a change; a whole-layout rewrite is a 'reset'"""
+    kind = 'reset' if change.placement_ids is None else 'change'
+    payload = json.dumps({'layout_id': layout_id, **change.to_dict()}, separators=(',', ':'))
+    return f'id: {change.version}\nevent: {kind}\ndata: {payload}\n\n'
+
+
+def parse_ops(ops):
+    """Check and normalise a list of delta ops"""
+    if not isinstance(ops, list) or not ops:
+        raise DeltaError('ops must be a non-empty list')
+    parsed = []
+    for op in ops:
+        kind = op.get('op') if isinstance(op, dict) else None
+        if kind not in OPS:
+            raise DeltaError(f"op must be one of {', '.join(OPS)}")
+        try:
+            if kind == 'add':
+                parsed.append({'op': kind, 'board_id': int(op['board_id']), 'x': float(op.get('x', 0.0)),
+                               'y': float(op.get('y', 0.0)), 'rotation': int(op.get('rotation', 0)) % 360})
+                continue
+            entry = {'op': kind, 'id': int(op['id'])}
+            if kind == 'move':
+                entry.update(x=float(op['x']), y=float(op['y']))
+            elif kind == 'rotate':
+                entry['rotation'] = int(op['rotation']) % 360
+                entry.update({axis: float(op[axis]) for axis in ('x', 'y') if axis in op})
+        except (KeyError, TypeError, ValueError):
+            raise DeltaError(f'Malformed {kind} op: {op}')
+        if entry.get('rotation', 0) % 90:
+            raise DeltaError('rotation must be a multiple of 90')
+        parsed.append(entry)
+    return parsed
+
+
+def _described(changes):
+    return None if changes is None else [change.to_dict() for change in changes]
+
+
+def _close(subscriber):
+    """Replace whatever a subscriber has queued with the end-of-stream marker"""
+    while not subscriber.empty():
+        subscriber.get_nowait()
+    subscriber.put_nowait((None, None))
+
+
+class LayoutState:
+    """What the hub knows about one layout; guarded by its own lock"""
+
+    def __init__(self, version, placement_ids):
+        self.version = version
+        # The version on the row as this process last read or wrote it; behind
+        # version while moves are pending
+        self.stored_version = version
+        self.placement_ids = placement_ids
+        self.log = deque(maxlen=HISTORY)
+        self.pending = {}
+        self.flush_timer = None
+        self.subscribers = set()
+        self.lock = threading.RLock()
+
+    def changes_since(self, version):
+        """Changes after version, or None if some of them are no longer in the log"""
+        if version == self.version:
+            return []
+        if not self.log or self.log[0].version > version + 1:
+            return None
+        return [change for change in self.log if change.version > version]
+
+
+class LayoutHub:
+    """Versions, delta history and live subscribers for every open layout
+
+    Deltas are checked optimistically: a client sends the version it last
+    saw, and its delta applies unless another client has since changed one
+    of the same placements. Moves only update memory and are written in
+    one statement per layout every COALESCE_INTERVAL; anything that adds,
+    removes or rotates a placement (or reads the layout) writes pending
+    moves first. State lives in this process, like the job and artifact
+    caches; every write is conditional on the row still having the version
+    this process last saw, so when several processes share the database a
+    write over another process's change is refused with LayoutConflict
+    (coalesced moves that lose this way are dropped and logged).
+    """
+
+    def __init__(self, interval=COALESCE_INTERVAL):
+        self.interval = interval
+        self._states = {}
+        self._lock = threading.Lock()
+        self.writes = 0
+
+    def _state(self, layout_id):
+        with self._lock:
+            state = self._states.get(layout_id)
+        if state is not None:
+            return state
+        version = db.session.scalar(select(Layout.version).where(Layout.id == layout_id))
+        if version is None:
+            return None
+        placement_ids = set(db.session.scalars(
+            select(LayoutPlacement.id).where(LayoutPlacement.layout_id == layout_id)))
+        with self._lock:
+            return self._states.setdefault(layout_id, LayoutState(version, placement_ids))
+
+    def version(self, layout_id):
+        state = self._state(layout_id)
+        return None if state is None else state.version
+
+    def apply(self, layout_id, base_version, ops, client=None):
+        """Apply a delta made against base_version; returns (new version, applied ops)
+
+        Added placements come back with their new ids. Raises DeltaError,
+        LayoutConflict, or LookupError for an unknown layout.
+        """
+        ops = parse_ops(ops)
+        state = self._state(layout_id)
+        if state is not None and base_version > state.version:
+            # Possibly written by another process since this one loaded it
+            state = self._refreshed(layout_id, state)
+        if state is None:
+            raise LookupError(layout_id)
+        with state.lock:
+            if base_version > state.version:
+                raise DeltaError(f'Unknown version {base_version}')
+            self._check(state, base_version, ops, client)
+            version = state.version + 1
+            if self.interval > 0 and all(op['op'] == 'move' for op in ops):
+                for op in ops:
+                    state.pending[op['id']] = {'id': op['id'], 'x': op['x'], 'y': op['y']}
+                self._schedule_flush(layout_id, state)
+            else:
+                ops = self._write(layout_id, state, ops, version)
+            state.version = version
+            touched = {op['id'] for op in ops}
+            state.placement_ids |= {op['id'] for op in ops if op['op'] == 'add'}
+            state.placement_ids -= {op['id'] for op in ops if op['op'] == 'remove'}
+            self._publish(layout_id, state, Change(version, client, ops, touched))
+            return version, ops
+
+    def _check(self, state, base_version, ops, client):
+        for op in ops:
+            if op['op'] != 'add' and op['id'] not in state.placement_ids:
+                raise LayoutConflict(f"Placement {op['id']} is not on this layout", state.version,
+                                     _described(state.changes_since(base_version)))
+        if base_version == state.version:
+            return
+        changes = state.changes_since(base_version)
+        if changes is None:
+            raise LayoutConflict('Layout changed too much since this version; reload it', state.version)
+        ids = {op['id'] for op in ops if op['op'] != 'add'}
+        for change in changes:
+            # A client's own earlier deltas (e.g. the previous steps of a drag) never conflict
+            if client is not None and change.client == client:
+                continue
+            if change.placement_ids is None or change.placement_ids & ids:
+                raise LayoutConflict('Placements were changed by someone else', state.version,
+                                     _described(changes))
+
+    def _write(self, layout_id, state, ops, version):
+        """Write pending moves, ops and the new version in one transaction"""
+        added = [op for op in ops if op['op'] == 'add']
+        if added:
+            board_ids = {op['board_id'] for op in added}
+            known = set(db.session.scalars(select(Board.id).where(Board.id.in_(board_ids))))
+            if board_ids - known:
+                raise DeltaError(f'Unknown board ids: {sorted(board_ids - known)}')
+        moves = list(state.pending.values())
+        state.pending.clear()
+        try:
+            self._store_version(layout_id, state, version)
+            if moves:
+                db.session.execute(update(LayoutPlacement), moves)
+            applied = []
+            for op in ops:
+                if op['op'] == 'add':
+                    values = {key: op[key] for key in ('board_id', 'x', 'y', 'rotation')}
+                    placement_id = db.session.scalar(
+                        insert(LayoutPlacement).returning(LayoutPlacement.id), [{**values, 'layout_id': layout_id}])
+                    op = {**op, 'id': placement_id}
+                elif op['op'] == 'remove':
+                    db.session.execute(delete(LayoutPlacement).where(LayoutPlacement.id == op['id']))
+                else:
+                    values = {key: op[key] for key in ('x', 'y', 'rotation') if key in op}
+                    db.session.execute(update(LayoutPlacement), [{'id': op['id'], **values}])
+                applied.append(op)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            for move in moves:
+                state.pending.setdefault(move['id'], move)
+            raise
+        state.stored_version = version
+        self.writes += 1
+        return applied
+
+    def _store_version(self, layout_id, state, version):
+        """Set the layout row's version, provided it is still the one this process last saw
+        
+        Otherwise another process has written the layout: the state here is
+        stale, so it is dropped and LayoutConflict raised.
+        """
+        result = db.session.execute(update(Layout).where(
+            Layout.id == layout_id, Layout.version == state.stored_version).values(version=version))
+        if result.rowcount == 1:
+            return
+        current = db.session.scalar(select(Layout.version).where(Layout.id == layout_id))
+        db.session.rollback()
+        self.forget(layout_id, write=False)
+        raise LayoutConflict('Layout was changed by someone else; reload it', current)
+
+    def _refreshed(self, layout_id, state):
+        """state, or the layout's state reloaded if another process has written the row since"""
+        stored = db.session.scalar(select(Layout.version).where(Layout.id == layout_id))
+        if stored == state.stored_version:
+            return state
+        self.forget(layout_id, write=False)
+        return self._state(layout_id)
+
+    def _schedule_flush(self, layout_id, state):
+        if state.flush_timer is None:
+            app = current_app._get_current_object()
+            state.flush_timer = threading.Timer(self.interval, self._flush_later, (app, layout_id))
+            state.flush_timer.daemon = True
+            state.flush_timer.start()
+
+    def _flush_later(self, app, layout_id):
+        with app.app_context():
+            try:
+                self.flush(layout_id)
+            except Exception:
+                # e.g. a placement deleted along with its board: drop the moves, reload from the database
+                logger.exception('Writing moves for layout %s failed', layout_id)
+                self.forget(layout_id, write=False)
+            finally:
+                db.session.remove()
+
+    def flush(self, layout_id):
+        """Write a layout's pending moves now (before reading its placements)"""
+        with self._lock:
+            state = self._states.get(layout_id)
+        if state is None:
+            return
+        with state.lock:
+            if state.flush_timer is not None:
+                state.flush_timer.cancel()
+                state.flush_timer = None
+            if state.pending:
+                try:
+                    self._write(layout_id, state, [], state.version)
+                except LayoutConflict:
+                    # Another process wrote the layout; its version stands and these moves are lost
+                    logger.warning('Dropped moves for layout %s changed by another process', layout_id)
+
+    @contextmanager
+    def rewriting(self, layout_id, expected_version=None, client=None):
+        """Hold a layout while a whole-layout write (PUT placements, packing) runs
+
+        Pending moves are written first; the caller makes its changes and
+        commits, and the version it is given (already set on the row) goes
+        out to subscribers as a reset. Raises LayoutConflict if
+        expected_version is given and stale.
+        """
+        state = self._state(layout_id)
+        if state is None:
+            raise LookupError(layout_id)
+        self.flush(layout_id)
+        state = self._refreshed(layout_id, state)
+        if state is None:
+            raise LookupError(layout_id)
+        with state.lock:
+            self.flush(layout_id)
+            if expected_version is not None and expected_version != state.version:
+                raise LayoutConflict('Layout was changed by someone else', state.version,
+                                     _described(state.changes_since(expected_version)))
+            version = state.version + 1
+            self._store_version(layout_id, state, version)
+            yield version
+            state.version = state.stored_version = version
+            state.placement_ids = set(db.session.scalars(
+                select(LayoutPlacement.id).where(LayoutPlacement.layout_id == layout_id)))
+            self.writes += 1
+            self._publish(layout_id, state, Change(version, client, None, None))
+
+    def _publish(self, layout_id, state, change):
+        state.log.append(change)
+        event = format_event(change, layout_id)
+        for subscriber in list(state.subscribers):
+            try:
+                subscriber.put_nowait((change.client, event))
+            except queue.Full:
+                # Too far behind to catch up: tell it to reload
+                state.subscribers.discard(subscriber)
+                _close(subscriber)
+
+    def subscribe(self, layout_id, since=None, client=None):
+        """Event stream (a generator of SSE text) of a layout's changes after since
+
+        Changes made by client are left out. If since is older than the
+        history the stream starts with a reset; it ends with one if the
+        client falls SUBSCRIBER_BACKLOG events behind. Returns None for an
+        unknown layout.
+        """
+        state = self._state(layout_id)
+        if state is None:
+            return None
+        subscriber = queue.Queue(SUBSCRIBER_BACKLOG)
+        with state.lock:
+            backlog = [] if since is None else state.changes_since(since)
+            if backlog is None:
+                backlog = [Change(state.version, None, None, None)]
+            backlog = [format_event(change, layout_id) for change in backlog
+                       if client is None or change.client != client]
+            state.subscribers.add(subscriber)
+
+        def stream():
+            try:
+                yield 'retry: 2000\n\n'
+                yield from backlog
+                while True:
+                    try:
+                        sender, event = subscriber.get(timeout=HEARTBEAT)
+                    except queue.Empty:
+                        yield ': keep-alive\n\n'
+                        continue
+                    if event is None:
+                        yield format_event(Change(state.version, None, None, None), layout_id)
+                        return
+                    if client is None or sender != client:
+                        yield event
+            finally:
+                with state.lock:
+                    state.subscribers.discard(subscriber)
+
+        return stream()
+
+    def forget(self, layout_id, write=True):
+        """Drop a layout's state, e.g. when its placements change outside the hub
+
+        Pending moves are written first unless write is False. Event streams
+        end with a reset, and reconnect to the state loaded next.
+        """
+        if write:
+            self.flush(layout_id)
+        with self._lock:
+            state = self._states.pop(layout_id, None)
+        if state is None:
+            return
+        with state.lock:
+            if state.flush_timer is not None:
+                state.flush_timer.cancel()
+            state.pending.clear()
+            for subscriber in list(state.subscribers):
+                _close(subscriber)
+            state.subscribers.clear()
+
+
+hub = LayoutHub()
@@ -0,0 +1,20 @@
+from src.models.board import Board
+from src.services import layout_sync
+
+
+def layout_items(layout, board_ids=None):
+    """(id, board, placement) for what a layout operation should act on
+    
+    Explicit board_ids select Board rows (positioned through their own
+    position_x/position_y/rotation); otherwise a layout with placements acts
+    on those, and one without falls back to every board, as before layouts
+    had placements. Every route and the export CLI read layouts through here.
+    """
+    if board_ids is None:
+        layout_sync.hub.flush(layout.id)
+    if board_ids is None and layout.placements:
+        return [(placement.id, placement.board, placement) for placement in layout.placements]
+    query = Board.query
+    if board_ids is not None:
+        query = query.filter(Board.id.in_(board_ids))
+    return [(board.id, board, None) for board in query.order_by(Board.id).all()]
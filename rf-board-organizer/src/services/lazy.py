@@ -0,0 +1,68 @@
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Modules that pull in the heavy third-party stacks (ezdxf, numpy-stl, NumPy,
+# Pillow, google.generativeai). Routes reach them through LazyModule, so a worker
+# that only serves board CRUD never imports them.
+EXPORT_BACKENDS = (
+    'src.services.geometry',
+    'src.services.validation',
+    'src.services.packing',
+    'src.services.stacking',
+    'src.services.board_import',
+    'src.services.toolpath',
+    'src.services.export',
+    'src.services.fabrication',
+    'src.services.preview',
+)
+EXTRACTION_BACKENDS = ('src.services.images', 'google.generativeai')
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access
+
+    Python's per-module import lock makes a first use racing a background
+    preload wait for it rather than import twice.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f'<LazyModule {self._name} ({state})>'
+
+
+def preload(names):
+    """Import names in a daemon thread; returns the thread
+
+    Start-up does not wait for it, and the first request that needs one of
+    the modules only waits for whatever is left.
+    """
+
+    def run():
+        for name in names:
+            start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except Exception:
+                logger.exception('Preloading %s failed', name)
+                continue
+            logger.debug('Preloaded %s in %.0f ms', name, (time.perf_counter() - start) * 1e3)
+
+    thread = threading.Thread(target=run, name='preload-backends', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,204 @@
+import math
+import os
+import re
+from collections import defaultdict
+from sqlalchemy import and_, column, func, literal_column, or_, select, table, text, union
+from sqlalchemy.schema import CreateIndex
+from src.models.board import Board, db
+from src.services.storage import is_sqlite
+
+# Near-duplicate tolerance in mm: boards whose hole pattern, hole diameter
+# and outline all agree this closely (either way round) are the same part
+DUPLICATE_TOLERANCE = float(os.getenv('DUPLICATE_TOLERANCE', 0.5))
+DIAMETER_TOLERANCE = 0.2
+
+# Signature buckets: 1 mm for lengths, 0.1 mm for hole diameters. The
+# expressions must match ix_board_signature exactly for SQLite to use it.
+SIGNATURE_COLUMNS = (
+    ('mounting_holes_x', Board.mounting_holes_x, None),
+    ('mounting_holes_y', Board.mounting_holes_y, None),
+    ('hole_spacing_x', func.round(Board.hole_spacing_x), 1.0),
+    ('hole_spacing_y', func.round(Board.hole_spacing_y), 1.0),
+    ('hole_diameter', func.round(Board.hole_diameter, literal_column('1')), 0.1),
+    ('width', func.round(Board.width), 1.0),
+    ('height', func.round(Board.height), 1.0),
+)
+SIGNATURE_FIELDS = tuple(field for field, _, _ in SIGNATURE_COLUMNS)
+
+# External-content FTS5 table over board names, kept in sync by triggers
+board_fts = table('board_fts', column('rowid'), column('rank'))
+FTS_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS board_fts USING fts5("
+    "name, content='board', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS board_fts_insert AFTER INSERT ON board BEGIN "
+    "INSERT INTO board_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS board_fts_delete AFTER DELETE ON board BEGIN "
+    "INSERT INTO board_fts(board_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS board_fts_update AFTER UPDATE OF name ON board BEGIN "
+    "INSERT INTO board_fts(board_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO board_fts(rowid, name) VALUES (new.id, new.name); END",
+]
+
+
+def uses_fts():
+    return is_sqlite(str(db.engine.url))
+
+
+def ensure_search_index():
+    """Create the signature index and name search index on an existing database
+
+    create_all only builds indexes with new tables, so this adds them to
+    older databases; a newly created FTS table is filled from the board
+    table. Call inside an app context.
+    """
+    with db.engine.begin() as connection:
+        # Reflection skips expression indexes, so checkfirst cannot see them
+        for index in Board.__table__.indexes:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+        if not uses_fts():
+            return
+        exists = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'board_fts'")).first()
+        for statement in FTS_SCHEMA:
+            connection.execute(text(statement))
+        if not exists:
+            connection.execute(text("INSERT INTO board_fts(board_fts) VALUES ('rebuild')"))
+
+
+def fts_query(terms):
+    """FTS5 MATCH expression: every word of terms, each as a prefix"""
+    words = re.findall(r'\w+', terms)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def buckets(value, step, tolerance):
+    """Rounded values (as SQLite's round() gives them) that value +/- tolerance can fall in"""
+    low = math.floor((value - tolerance) / step + 0.5)
+    high = math.floor((value + tolerance) / step + 0.5)
+    return [round(k * step, 1) for k in range(low, high + 1)]
+
+
+def signature_filter(spec, tolerance=DUPLICATE_TOLERANCE, diameter_tolerance=DIAMETER_TOLERANCE):
+    """WHERE clause for boards matching spec's signature within tolerance
+
+    spec may leave out trailing signature fields after the hole pattern
+    (the first four); the given ones become IN lists over the index
+    columns, followed by exact tolerance checks on the raw values. A spec
+    without a whole hole pattern raises ValueError rather than matching
+    every board.
+    """
+    missing = [field for field in SIGNATURE_FIELDS[:4] if spec.get(field) is None]
+    if missing:
+        raise ValueError(f"Signature is missing {', '.join(missing)}")
+    conditions = []
+    for field, expression, step in SIGNATURE_COLUMNS:
+        value = spec.get(field)
+        if value is None:
+            break
+        if step is None:
+            conditions.append(expression == int(value))
+            continue
+        limit = diameter_tolerance if field == 'hole_diameter' else tolerance
+        conditions.append(expression.in_(buckets(float(value), step, limit)))
+        conditions.append(func.abs(getattr(Board, field) - float(value)) <= limit)
+    return and_(*conditions)
+
+
+def rotated(spec):
+    """The same board specified the other way round (x and y swapped)"""
+    swapped = dict(spec)
+    for x, y in (('width', 'height'), ('mounting_holes_x', 'mounting_holes_y'),
+                 ('hole_spacing_x', 'hole_spacing_y')):
+        swapped[x], swapped[y] = spec.get(y), spec.get(x)
+    return swapped
+
+
+def search(terms=None, spec=None, columns=None, limit=50, tolerance=DUPLICATE_TOLERANCE):
+    """Boards whose name matches terms and/or whose signature matches spec
+
+    Name matches are ranked by relevance (bm25), otherwise results are in
+    id order. Returns rows of (id, *columns).
+    """
+    columns = columns or [getattr(Board, field) for field in Board.SPEC_FIELDS]
+    query = select(Board.id, *columns)
+    if spec:
+        query = query.where(signature_filter(spec, tolerance))
+    if terms and uses_fts():
+        match = fts_query(terms)
+        if not match:
+            return []
+        query = (query.join(board_fts, board_fts.c.rowid == Board.id)
+                 .where(literal_column('board_fts').op('MATCH')(match))
+                 .order_by(board_fts.c.rank))
+    elif terms:
+        query = query.where(or_(*[Board.name.ilike(f'%{word}%') for word in re.findall(r'\w+', terms)]))
+    return db.session.execute(query.order_by(Board.id).limit(limit)).all()
+
+
+def find_duplicates(spec, tolerance=DUPLICATE_TOLERANCE, exclude_id=None):
+    """Ids of existing boards that are near-duplicates of spec, in either orientation
+
+    spec must give every signature field (ValueError otherwise).
+    """
+    missing = [field for field in SIGNATURE_FIELDS if spec.get(field) is None]
+    if missing:
+        raise ValueError(f"Signature is missing {', '.join(missing)}")
+    # A UNION rather than OR: SQLite only uses the whole index for each arm separately
+    queries = [select(Board.id).where(signature_filter(candidate, tolerance)) for candidate in (spec, rotated(spec))]
+    if exclude_id is not None:
+        queries = [query.where(Board.id != exclude_id) for query in queries]
+    return sorted(db.session.scalars(union(*queries)))
+
+
+def _same(a, b, tolerance):
+    return (a[0] == b[0] and a[1] == b[1] and abs(a[6] - b[6]) <= DIAMETER_TOLERANCE
+            and all(abs(a[k] - b[k]) <= tolerance for k in (2, 3, 4, 5)))
+
+
+class DuplicateIndex:
+    """In-memory signature buckets of the whole library, for bulk imports
+
+    One query loads every board's spec; each imported row is then checked
+    against at most a few neighbouring buckets (and added, so duplicates
+    within the import are caught too) instead of querying per row. Entries
+    carry a (kind, value) reference: ('board_id', id) for loaded boards,
+    whatever the caller passes to add() for the rest.
+    """
+
+    FIELDS = ('mounting_holes_x', 'mounting_holes_y', 'width', 'height', 'hole_spacing_x', 'hole_spacing_y',
+              'hole_diameter')
+
+    def __init__(self, tolerance=DUPLICATE_TOLERANCE):
+        self.tolerance = tolerance
+        self.buckets = defaultdict(list)
+
+    @classmethod
+    def load(cls, tolerance=DUPLICATE_TOLERANCE):
+        index = cls(tolerance)
+        rows = db.session.execute(select(Board.id, *[getattr(Board, field) for field in cls.FIELDS]))
+        for board_id, *spec in rows:
+            index._add(('board_id', board_id), tuple(spec))
+        return index
+
+    def _add(self, reference, spec):
+        self.buckets[(spec[0], spec[1], math.floor(spec[2] + 0.5), math.floor(spec[3] + 0.5))].append(
+            (reference, spec))
+
+    def _find(self, spec):
+        tolerance = self.tolerance
+        for width in buckets(spec[2], 1.0, tolerance):
+            for height in buckets(spec[3], 1.0, tolerance):
+                for reference, other in self.buckets.get((spec[0], spec[1], int(width), int(height)), ()):
+                    if _same(spec, other, tolerance):
+                        return reference
+        return None
+
+    def match(self, row):
+        """Reference of an entry that row (a Board column dict) duplicates either way round, or None"""
+        spec = tuple(row[field] for field in self.FIELDS)
+        turned = (spec[1], spec[0], spec[3], spec[2], spec[5], spec[4], spec[6])
+        found = self._find(spec)
+        return found if found is not None else self._find(turned)
+
+    def add(self, reference, row):
+        self._add(reference, tuple(row[field] for field in self.FIELDS))
@@ -0,0 +1,225 @@
+import functools
+import math
+import numpy as np
+from stl import mesh
+from src.services import polygon
+
+# Default tessellation used by the standoff exporter
+DEFAULT_SEGMENTS = 16
+MIN_SEGMENTS = 8
+MAX_SEGMENTS = 4096
+
+# L-bracket corners: (x, y as fractions of the board size, quarter turn of the template)
+CORNER_ROTATIONS = {
+    'bottom_left': (0, 0, 0),
+    'bottom_right': (1, 0, 90),
+    'top_right': (1, 1, 180),
+    'top_left': (0, 1, 270),
+}
+
+
+def segments_for_tolerance(radius, chord_tolerance, minimum=MIN_SEGMENTS, maximum=MAX_SEGMENTS):
+    """Smallest segment count whose chord deviates at most chord_tolerance from the circle"""
+    if radius <= 0 or chord_tolerance <= 0:
+        return minimum
+    if chord_tolerance >= radius:
+        return minimum
+    # Sagitta of a chord spanning 2*pi/n is r * (1 - cos(pi/n))
+    segments = math.ceil(math.pi / math.acos(1 - chord_tolerance / radius))
+    return int(min(max(segments, minimum), maximum))
+
+
+def resolve_segments(radius, segments=None, chord_tolerance=None):
+    """Pick a segment count from an explicit value or a chord tolerance"""
+    if segments is not None:
+        return int(min(max(int(segments), 3), MAX_SEGMENTS))
+    if chord_tolerance is not None:
+        return segments_for_tolerance(radius, float(chord_tolerance))
+    return DEFAULT_SEGMENTS
+
+
+def hollow_cylinder(inner_radius, outer_radius, height, segments=DEFAULT_SEGMENTS):
+    """Build vertices and faces of a hollow cylinder (standoff) centred on the origin
+
+    Vertex 4*i + k holds, for segment i, the outer bottom, inner bottom,
+    outer top and inner top point (k = 0..3).
+    """
+    angles = 2 * np.pi * np.arange(segments) / segments
+    cos, sin = np.cos(angles), np.sin(angles)
+
+    vertices = np.empty((segments, 4, 3))
+    vertices[:, 0::2, 0] = (outer_radius * cos)[:, None]
+    vertices[:, 0::2, 1] = (outer_radius * sin)[:, None]
+    vertices[:, 1::2, 0] = (inner_radius * cos)[:, None]
+    vertices[:, 1::2, 1] = (inner_radius * sin)[:, None]
+    vertices[:, :2, 2] = 0.0
+    vertices[:, 2:, 2] = height
+    vertices = vertices.reshape(-1, 3)
+
+    curr = np.arange(segments) * 4
+    nxt = np.roll(curr, -1)
+    ob, ib, ot, it = curr, curr + 1, curr + 2, curr + 3
+    nob, nib, not_, nit = nxt, nxt + 1, nxt + 2, nxt + 3
+
+    faces = np.stack([
+        # Outer wall
+        np.stack([ob, nob, ot], axis=1),
+        np.stack([nob, not_, ot], axis=1),
+        # Inner wall (reversed winding)
+        np.stack([ib, it, nib], axis=1),
+        np.stack([nib, it, nit], axis=1),
+        # Bottom ring
+        np.stack([ob, ib, nob], axis=1),
+        np.stack([nob, ib, nib], axis=1),
+        # Top ring
+        np.stack([ot, not_, it], axis=1),
+        np.stack([not_, nit, it], axis=1),
+    ], axis=1).reshape(-1, 3)
+
+    return vertices, faces
+
+
+def extrude_polygon(outer, height, holes=()):
+    """Extrude a polygon with optional holes along Z
+
+    The caps are ear-clipped (holes bridged in), so concave outlines and
+    drilled holes come out watertight. Vertex 2*i is the bottom copy of
+    point i of the outer ring followed by the hole rings, 2*i + 1 the top copy.
+    """
+    points, triangles = polygon.triangulate(outer, holes)
+    n = len(points)
+
+    vertices = np.zeros((n, 2, 3))
+    vertices[:, :, :2] = points[:, None, :]
+    vertices[:, 1, 2] = height
+    vertices = vertices.reshape(-1, 3)
+
+    # Caps face outwards: down for the bottom, up for the top
+    bottom = triangles[:, ::-1] * 2
+    top = triangles * 2 + 1
+
+    # Outer ring is counter-clockwise and holes clockwise, so one rule gives outward walls
+    sides = []
+    sizes = [len(outer)] + [len(hole) for hole in holes]
+    for start, size in zip(np.cumsum([0] + sizes[:-1]), sizes):
+        i = start + np.arange(size)
+        j = start + (np.arange(size) + 1) % size
+        sides.append(np.stack([
+            np.stack([i * 2, j * 2, i * 2 + 1], axis=1),
+            np.stack([j * 2, j * 2 + 1, i * 2 + 1], axis=1),
+        ], axis=1).reshape(-1, 3))
+
+    return vertices, np.concatenate([bottom, top] + sides)
+
+
+def l_bracket_outline(thickness, width, pad=0.0):
+    """2D outline of an L-bracket in its template frame
+
+    The board corner sits at the origin with the arms running along +X and
+    +Y. A pad larger than the wall thickness adds a square mounting tab of
+    that size behind the outer corner, off the board.
+    """
+    if pad <= thickness:
+        return np.array([
+            [-thickness, -thickness],  # Outer corner
+            [width, -thickness],       # End of horizontal arm
+            [width, 0.0],              # Inner edge of horizontal arm
+            [0.0, 0.0],                # Board corner
+            [0.0, width],              # Inner edge of vertical arm
+            [-thickness, width],       # End of vertical arm
+        ])
+    return np.array([
+        [-pad, -pad],                  # Outer corner of the tab
+        [0.0, -pad],
+        [0.0, -thickness],
+        [width, -thickness],           # End of horizontal arm
+        [width, 0.0],
+        [0.0, 0.0],                    # Board corner
+        [0.0, width],
+        [-thickness, width],           # End of vertical arm
+        [-thickness, 0.0],
+        [-pad, 0.0],
+    ])
+
+
+@functools.lru_cache(maxsize=256)
+def l_bracket_template(thickness, width, height, hole_diameter=0.0, hole_offset=0.0,
+                       segments=DEFAULT_SEGMENTS):
+    """Vertices and faces of one L-bracket in its template frame, triangulated once per shape
+
+    With a hole_diameter the bracket gets a mounting tab drilled through at
+    (-hole_offset, -hole_offset), i.e. hole_offset from both outer edges of
+    the corner. The arrays are read-only since they are shared by every caller.
+    """
+    holes = []
+    pad = 0.0
+    if hole_diameter > 0:
+        pad = 2 * hole_offset
+        holes.append(polygon.circle(-hole_offset, -hole_offset, hole_diameter / 2, segments,
+                                    counter_clockwise=False))
+    vertices, faces = extrude_polygon(l_bracket_outline(thickness, width, pad), height, holes)
+    vertices.flags.writeable = False
+    faces.flags.writeable = False
+    return vertices, faces
+
+
+def corner_transforms(board_width, board_height):
+    """(4, 2, 3) affine matrices taking the template to each board corner
+
+    The template is symmetric about its diagonal, so quarter turns give the
+    mirrored corners without flipping the face winding.
+    """
+    matrices = np.zeros((len(CORNER_ROTATIONS), 2, 3))
+    for k, (corner_x, corner_y, rotation) in enumerate(
+            (x * board_width, y * board_height, rotation) for x, y, rotation in CORNER_ROTATIONS.values()):
+        rad = math.radians(rotation)
+        cos, sin = round(math.cos(rad)), round(math.sin(rad))
+        matrices[k] = [[cos, -sin, corner_x], [sin, cos, corner_y]]
+    return matrices
+
+
+def transform_copies(vertices, faces, matrices):
+    """One copy of a part per 2D affine matrix (K, 2, 3), as a single vertex/face set"""
+    copies = np.repeat(vertices[None], len(matrices), axis=0)
+    copies[:, :, :2] = np.einsum('kij,vj->kvi', matrices[:, :, :2], vertices[:, :2]) + matrices[:, None, :, 2]
+    offsets = np.arange(len(matrices))[:, None, None] * len(vertices)
+    return copies.reshape(-1, 3), (faces[None] + offsets).reshape(-1, 3)
+
+
+def l_brackets(board_width, board_height, thickness, width, height, hole_diameter=0.0, hole_offset=0.0,
+               segments=DEFAULT_SEGMENTS):
+    """Four L-brackets, one per corner of a board, as a single vertex/face set"""
+    template = l_bracket_template(float(thickness), float(width), float(height),
+                                  float(hole_diameter), float(hole_offset), int(segments))
+    return transform_copies(*template, corner_transforms(board_width, board_height))
+
+
+def combine(parts):
+    """Concatenate (vertices, faces) pairs into one, offsetting the face indices"""
+    vertices = [v for v, _ in parts]
+    offsets = np.cumsum([0] + [len(v) for v in vertices[:-1]])
+    faces = [f + offset for (_, f), offset in zip(parts, offsets)]
+    return np.concatenate(vertices), np.concatenate(faces)
+
+
+def translated_copies(vertices, faces, offsets):
+    """Triangles (N*F, 3, 3) of one part copied to every row of offsets (N, 3)
+
+    The part is gathered into triangles once and broadcast against the
+    offsets, so placing thousands of identical standoffs is a single add.
+    """
+    triangles = vertices[faces]
+    offsets = np.asarray(offsets, dtype=float).reshape(-1, 1, 1, 3)
+    return (triangles[None] + offsets).reshape(-1, 3, 3)
+
+
+def triangles_to_mesh(triangles):
+    """Build a numpy-stl Mesh from a (F, 3, 3) triangle array"""
+    data = np.zeros(len(triangles), dtype=mesh.Mesh.dtype)
+    data['vectors'] = triangles
+    return mesh.Mesh(data)
+
+
+def to_mesh(vertices, faces):
+    """Build a numpy-stl Mesh with a single gather of the face vertices"""
+    return triangles_to_mesh(vertices[faces])
@@ -0,0 +1,212 @@
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+from flask import Response, g, has_request_context, jsonify, request
+
+# Latency histograms for every route and for named spans inside them, in
+# Prometheus text format at /metrics. Values are per process: behind a
+# multi-process server each worker reports its own.
+
+# Upper bounds in seconds; an implicit +Inf bucket follows
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Requests carrying X-Profile: <PROFILE_TOKEN> run under cProfile; unset disables profiling
+PROFILE_HEADER = 'X-Profile'
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', 20))
+PROFILE_LINES = 40
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, one series per label set"""
+
+    def __init__(self, name, help_text, label_names, buckets=BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts (made cumulative on render), then sum
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self):
+        """{labels: (cumulative bucket counts, sum)}"""
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        snapshot = {}
+        for labels, counts, total in items:
+            running = 0
+            for i, count in enumerate(counts):
+                running += count
+                counts[i] = running
+            snapshot[labels] = (counts, total)
+        return snapshot
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total) in sorted(self.snapshot().items()):
+            pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels)]
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                le = bound if isinstance(bound, str) else repr(float(bound))
+                bucket_labels = ','.join(pairs + [f'le="{le}"'])
+                lines.append(f'{self.name}_bucket{{{bucket_labels}}} {count}')
+            label_text = '{' + ','.join(pairs) + '}' if pairs else ''
+            lines.append(f'{self.name}_sum{label_text} {total!r}')
+            lines.append(f'{self.name}_count{label_text} {counts[-1]}')
+        return '\n'.join(lines)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+request_duration = Histogram('http_request_duration_seconds', 'Time to handle a request, by route template',
+                             ['method', 'route', 'status'])
+span_duration = Histogram('span_duration_seconds', 'Time spent in named sections of request handling',
+                          ['span'])
+
+
+@contextmanager
+def span(name):
+    """Time a named section (upload, model_call, mesh_build, ...)
+
+    Always recorded in span_duration_seconds; inside a request the timing is
+    also reported back to the client in its Server-Timing header.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        span_duration.observe(elapsed, name)
+        if has_request_context() and 'metrics_spans' in g:
+            g.metrics_spans.append((name, elapsed))
+
+
+def render_prometheus():
+    return '\n'.join([request_duration.render(), span_duration.render()]) + '\n'
+
+
+class ProfileStore:
+    """The last few request profiles as pstats text, by id"""
+
+    def __init__(self, keep=PROFILE_KEEP):
+        self.keep = keep
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile_id, summary):
+        with self._lock:
+            self._profiles[profile_id] = summary
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self):
+        with self._lock:
+            return [{'id': profile_id, 'method': summary['method'], 'path': summary['path'],
+                     'seconds': summary['seconds']} for profile_id, summary in self._profiles.items()]
+
+
+profiles = ProfileStore()
+
+
+def profiling_requested():
+    token = os.getenv('PROFILE_TOKEN')
+    return bool(token) and request.headers.get(PROFILE_HEADER) == token
+
+
+def _profile_text(profiler):
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats('cumulative').print_stats(PROFILE_LINES)
+    return out.getvalue()
+
+
+def init_app(app):
+    """Time every request and serve /metrics (plus profiles) on app
+
+    Streamed responses are timed until the body is closed, not until the
+    handler returns.
+    """
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_spans = []
+        if profiling_requested():
+            g.metrics_profile_id = uuid.uuid4().hex[:12]
+            g.metrics_profiler = cProfile.Profile()
+            g.metrics_profiler.enable()
+
+    @app.after_request
+    def record(response):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return response
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        labels = (request.method, route, str(response.status_code))
+        profiler = g.pop('metrics_profiler', None)
+        profile_id = g.pop('metrics_profile_id', None)
+        method, path = request.method, request.path
+
+        def finish():
+            elapsed = time.perf_counter() - start
+            request_duration.observe(elapsed, *labels)
+            if profiler is not None:
+                profiler.disable()
+                profiles.add(profile_id, {'method': method, 'path': path, 'seconds': round(elapsed, 6),
+                                          'stats': _profile_text(profiler)})
+
+        spans = g.pop('metrics_spans', [])
+        if spans:
+            response.headers['Server-Timing'] = ', '.join(
+                f'{name};dur={elapsed * 1e3:.2f}' for name, elapsed in spans)
+        if profile_id is not None:
+            response.headers['X-Profile-Id'] = profile_id
+        # send_file bodies are passed straight through and never closed via the response
+        if response.is_streamed and not response.direct_passthrough:
+            response.call_on_close(finish)
+        else:
+            finish()
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/metrics/profiles')
+    def list_profiles():
+        if not profiling_requested():
+            return jsonify({'error': 'Profiling not enabled'}), 404
+        return jsonify(profiles.list())
+
+    @app.route('/metrics/profiles/<profile_id>')
+    def get_profile(profile_id):
+        if not profiling_requested():
+            return jsonify({'error': 'Profiling not enabled'}), 404
+        summary = profiles.get(profile_id)
+        if summary is None:
+            return jsonify({'error': 'Profile not found'}), 404
+        return Response(summary['stats'], mimetype='text/plain')
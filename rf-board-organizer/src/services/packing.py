@@ -0,0 +1,145 @@
+import numpy as np
+
+ROTATIONS = (0, 90, 180, 270)
+
+
+class MaxRectsPacker:
+    """MaxRects bin packer (best short side fit) over NumPy arrays of free rectangles
+
+    Free space is kept as an (F, 4) array of maximal x, y, w, h rectangles,
+    so scoring, splitting and pruning each run as a handful of vectorized
+    operations per placed item instead of Python loops over F.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.free = np.array([[0.0, 0.0, width, height]])
+
+    def find(self, w, h, allow_turn=True):
+        """Best free-rectangle position for a w x h item, or None
+
+        Returns (x, y, turned) where turned means the item is placed as h x w.
+        """
+        fx, fy, fw, fh = self.free.T
+        best = None
+        for turned, (iw, ih) in enumerate([(w, h), (h, w)] if allow_turn else [(w, h)]):
+            fits = (fw >= iw) & (fh >= ih)
+            if not fits.any():
+                continue
+            dw, dh = fw - iw, fh - ih
+            short = np.where(fits, np.minimum(dw, dh), np.inf)
+            long = np.where(fits, np.maximum(dw, dh), np.inf)
+            index = np.lexsort((long, short))[0]
+            score = (short[index], long[index])
+            if best is None or score < best[0]:
+                best = (score, index, bool(turned))
+        if best is None:
+            return None
+        _, index, turned = best
+        return self.free[index, 0], self.free[index, 1], turned
+
+    def place(self, x, y, w, h):
+        """Carve a placed rectangle out of the free space"""
+        fx, fy, fw, fh = self.free.T
+        hit = (fx < x + w) & (fx + fw > x) & (fy < y + h) & (fy + fh > y)
+        if not hit.any():
+            return
+        kept = self.free[~hit]
+        sx, sy, sw, sh = self.free[hit].T
+
+        right, top = np.full_like(sx, x + w), np.full_like(sy, y + h)
+        pieces = [
+            np.stack([sx, sy, x - sx, sh], axis=1),                  # left
+            np.stack([right, sy, sx + sw - right, sh], axis=1),      # right
+            np.stack([sx, sy, sw, y - sy], axis=1),                  # below
+            np.stack([sx, top, sw, sy + sh - top], axis=1),          # above
+        ]
+        new = np.concatenate(pieces)
+        new = new[(new[:, 2] > 1e-9) & (new[:, 3] > 1e-9)]
+        self.free = self._prune(kept, new)
+
+    @staticmethod
+    def _contains(outer, inner):
+        """Matrix [i, j]: outer[i] fully contains inner[j]"""
+        ox, oy, ow, oh = (c[:, None] for c in outer.T)
+        ix, iy, iw, ih = (c[None, :] for c in inner.T)
+        return (ox <= ix) & (oy <= iy) & (ox + ow >= ix + iw) & (oy + oh >= iy + ih)
+
+    def _prune(self, kept, new):
+        """Drop free rectangles contained in another one
+
+        The kept rectangles were already maximal and cannot sit inside a piece
+        of a rectangle they were not contained in, so only the new pieces
+        need checking.
+        """
+        if len(new) == 0:
+            return kept
+        # New rectangles swallowed by a kept one
+        new = new[~self._contains(kept, new).any(axis=0)] if len(kept) else new
+        # New rectangles swallowed by another new one (ties keep the lower index)
+        inside = self._contains(new, new)
+        np.fill_diagonal(inside, False)
+        same = inside & inside.T
+        inside &= ~(same & np.triu(np.ones_like(same), 1).T)
+        new = new[~inside.any(axis=0)]
+        return np.concatenate([kept, new])
+
+
+def rotation_for(turned, allowed, current):
+    """Pick a rotation with the requested footprint, preferring the board's current one"""
+    candidates = [r for r in allowed if (r % 180 == 90) == turned]
+    if current in candidates:
+        return current
+    return candidates[0]
+
+
+def rotation_modes(rotations):
+    """Normalised rotations and whether upright and quarter-turned footprints are allowed"""
+    rotations = [int(r) % 360 for r in rotations] or [0]
+    return rotations, any(r % 180 == 0 for r in rotations), any(r % 180 == 90 for r in rotations)
+
+
+def fit(packer, w, h, upright, turned_ok):
+    """(x, y, turned) for a w x h item on packer under the allowed footprints, or None"""
+    if upright:
+        return packer.find(w, h, allow_turn=turned_ok)
+    # Only quarter-turned placements allowed
+    found = packer.find(h, w, allow_turn=False)
+    if found is not None:
+        found = (found[0], found[1], True)
+    return found
+
+
+def pack_rectangles(sizes, plate_width, plate_height, margin=0.0, rotations=ROTATIONS,
+                    current_rotations=None):
+    """Pack (width, height) rectangles onto a plate
+
+    Every rectangle keeps at least `margin` of clearance to its neighbours
+    and to the plate edge. Returns one (x, y, rotation) per input, or None
+    for rectangles that do not fit; x, y is the lower-left corner of the
+    rotated footprint.
+    """
+    rotations, upright, turned_ok = rotation_modes(rotations)
+    if current_rotations is None:
+        current_rotations = [0] * len(sizes)
+
+    packer = MaxRectsPacker(plate_width - margin, plate_height - margin)
+    results = [None] * len(sizes)
+
+    # Largest side first, then largest area
+    sizes_arr = np.asarray(sizes, dtype=float).reshape(-1, 2)
+    order = np.lexsort((-sizes_arr.prod(axis=1), -sizes_arr.max(axis=1)))
+
+    for index in order:
+        w, h = sizes_arr[index] + margin
+        found = fit(packer, w, h, upright, turned_ok)
+        if found is None:
+            continue
+        x, y, turned = found
+        pw, ph = (h, w) if turned else (w, h)
+        packer.place(x, y, pw, ph)
+        rotation = rotation_for(turned, rotations, current_rotations[index])
+        results[index] = (float(x + margin), float(y + margin), rotation)
+
+    return results
@@ -0,0 +1,130 @@
+import numpy as np
+
+# 2D polygon helpers for the mesh kernel. Rings are (N, 2) arrays without a
+# repeated closing point; outer rings wind counter-clockwise, holes clockwise.
+
+EPSILON = 1e-12
+
+
+def signed_area(ring):
+    """Shoelace area: positive for counter-clockwise rings"""
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def orient(ring, counter_clockwise=True):
+    """ring as a float array wound the requested way"""
+    ring = np.asarray(ring, dtype=float)
+    if (signed_area(ring) > 0) != counter_clockwise:
+        return ring[::-1].copy()
+    return ring
+
+
+def circle(center_x, center_y, radius, segments, counter_clockwise=True):
+    """Regular polygon approximating a circle, starting on the +X axis"""
+    angles = 2 * np.pi * np.arange(segments) / segments
+    if not counter_clockwise:
+        angles = -angles
+    return np.stack([center_x + radius * np.cos(angles), center_y + radius * np.sin(angles)], axis=1)
+
+
+def _cross(o, a, b):
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def _in_triangle(p, a, b, c):
+    """p strictly inside the counter-clockwise triangle abc"""
+    return _cross(a, b, p) > EPSILON and _cross(b, c, p) > EPSILON and _cross(c, a, p) > EPSILON
+
+
+def _bridge(points, ring, hole):
+    """Splice hole (indices into points) into ring through a mutually visible vertex pair
+
+    The hole's rightmost vertex M is joined to a ring vertex found by casting
+    a ray towards +X (the hole elimination step of Eberly's ear clipping).
+    """
+    m = max(range(len(hole)), key=lambda k: (points[hole[k]][0], -points[hole[k]][1]))
+    mx, my = points[hole[m]]
+
+    best_x, best = np.inf, None
+    for i in range(len(ring)):
+        a, b = points[ring[i]], points[ring[(i + 1) % len(ring)]]
+        if not min(a[1], b[1]) <= my <= max(a[1], b[1]) or a[1] == b[1]:
+            continue
+        x = a[0] + (my - a[1]) * (b[0] - a[0]) / (b[1] - a[1])
+        if mx <= x < best_x:
+            best_x = x
+            # Candidate: the edge endpoint with the larger x
+            best = i if a[0] > b[0] else (i + 1) % len(ring)
+    if best is None:
+        raise ValueError('Hole is not inside the outer ring')
+
+    # A reflex ring vertex inside triangle (M, I, P) would block the bridge;
+    # take the one with the smallest angle to the ray instead
+    candidate = points[ring[best]]
+    intersection = (best_x, my)
+    tri = (np.array((mx, my)), np.array(intersection), candidate)
+    if _cross(*tri) < 0:
+        tri = (tri[0], tri[2], tri[1])
+    best_angle = None
+    for i in range(len(ring)):
+        p = points[ring[i]]
+        prev_p, next_p = points[ring[i - 1]], points[ring[(i + 1) % len(ring)]]
+        if _cross(prev_p, p, next_p) >= 0 or not _in_triangle(p, *tri):
+            continue
+        angle = abs(p[1] - my) / max(p[0] - mx, EPSILON)
+        if best_angle is None or angle < best_angle:
+            best_angle, best = angle, i
+
+    return ring[:best + 1] + hole[m:] + hole[:m + 1] + ring[best:]
+
+
+def triangulate(outer, holes=()):
+    """Ear-clipping triangulation of a polygon with holes
+
+    Returns (points, triangles): the outer ring followed by every hole ring
+    as one (N, 2) array, and (T, 3) counter-clockwise indices into it. Holes
+    are bridged into the outer ring first, so the result covers the polygon
+    minus its holes.
+    """
+    rings = [orient(outer, True)] + [orient(hole, False) for hole in holes]
+    points = np.concatenate(rings)
+    starts = np.cumsum([0] + [len(ring) for ring in rings])
+
+    ring = list(range(starts[1]))
+    hole_indices = [list(range(starts[k], starts[k + 1])) for k in range(1, len(rings))]
+    for hole in sorted(hole_indices, key=lambda h: -points[h, 0].max()):
+        ring = _bridge(points, ring, hole)
+
+    triangles = []
+    while len(ring) > 3:
+        n = len(ring)
+        indices = np.array(ring)
+        ring_points = points[indices]
+        clipped = False
+        for i in range(n):
+            a, b, c = ring[i - 1], ring[i], ring[(i + 1) % n]
+            pa, pb, pc = points[a], points[b], points[c]
+            if _cross(pa, pb, pc) <= EPSILON:
+                continue
+            # Any other vertex inside or on the boundary blocks the ear; one lying on
+            # the new diagonal would otherwise leave a T-junction in the mesh.
+            # Bridged rings repeat vertices, so only other indices count.
+            inside = ((_cross(pa, pb, ring_points.T) >= -EPSILON) & (_cross(pb, pc, ring_points.T) >= -EPSILON)
+                      & (_cross(pc, pa, ring_points.T) >= -EPSILON))
+            inside &= (indices != a) & (indices != b) & (indices != c)
+            if inside.any():
+                continue
+            triangles.append((a, b, c))
+            del ring[i]
+            clipped = True
+            break
+        if not clipped:
+            # Degenerate remainder (collinear slivers): drop the flattest vertex
+            i = min(range(n), key=lambda k: abs(_cross(points[ring[k - 1]], points[ring[k]],
+                                                        points[ring[(k + 1) % n]])))
+            del ring[i]
+    if len(ring) == 3 and _cross(*points[ring]) > EPSILON:
+        triangles.append(tuple(ring))
+
+    return points, np.array(triangles, dtype=int).reshape(-1, 3)
@@ -0,0 +1,206 @@
+import html
+import math
+import struct
+import zlib
+import numpy as np
+from src.services import geometry
+
+# Preview images are this many pixels wide unless asked otherwise; neither
+# side is ever longer than MAX_WIDTH, however tall the plate
+DEFAULT_WIDTH = 320
+MIN_WIDTH = 16
+MAX_WIDTH = 2048
+
+# Samples per pixel side for anti-aliasing, chosen so the sample grid stays
+# near this many samples across (large previews need less smoothing)
+SUPERSAMPLE_SAMPLES = 1024
+MAX_SUPERSAMPLE = 4
+
+# Hole-mask elements per batch, bounding memory when holes are large in pixels
+HOLE_BATCH_ELEMENTS = 4 * 1024 * 1024
+
+PNG_COMPRESS_LEVEL = 6
+
+# Weight of the shrunk footprints in rasterize's coverage sums
+INNER_WEIGHT = 1 << 32
+
+# Palette, indexed by the label each sample gets
+PLATE, BOARD, BOARD_EDGE, OVERLAP, HOLE, PLATE_EDGE = range(6)
+PALETTE = np.array([
+    (236, 239, 241),  # plate
+    (74, 144, 217),   # board
+    (31, 78, 140),    # board outline
+    (217, 83, 79),    # boards overlapping
+    (40, 40, 40),     # mounting hole
+    (120, 130, 140),  # plate outline
+], dtype=np.uint8)
+SVG_COLORS = ['#%02x%02x%02x' % tuple(color) for color in PALETTE.tolist()]
+
+
+def layout_shapes(items):
+    """(N, 4) footprints, (H, 2) hole centres and (H,) diameters of (id, board, placement) items"""
+    if not items:
+        return np.zeros((0, 4)), np.zeros((0, 2)), np.zeros(0)
+    columns = geometry.item_columns(items)
+    boxes = geometry.footprints(columns)
+    _, centres, diameters = geometry.hole_centres(columns, boxes)
+    return boxes, centres, diameters
+
+
+def valid_plate(base_width, base_height):
+    return all(isinstance(side, (int, float)) and math.isfinite(side) and side > 0
+               for side in (base_width, base_height))
+
+
+def image_size(base_width, base_height, width=DEFAULT_WIDTH):
+    """(width, height) in pixels, keeping the plate's aspect with the longer side at most MAX_WIDTH"""
+    scale = min(width / base_width, MAX_WIDTH / base_height)
+    return max(1, round(base_width * scale)), max(1, round(base_height * scale))
+
+
+def _number(value):
+    return f'{value:.2f}'.rstrip('0').rstrip('.')
+
+
+def render_svg(items, base_width, base_height, width=DEFAULT_WIDTH):
+    """SVG of the plate, board footprints (titled with board names) and mounting holes
+
+    Drawn in millimetres with y pointing up, as in the DXF exports.
+    """
+    boxes, centres, diameters = layout_shapes(items)
+    width, height = image_size(base_width, base_height, width)
+    w, h = _number(base_width), _number(base_height)
+    stroke = _number(max(base_width, base_height) / 400)
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {w} {h}">',
+        f'<rect width="{w}" height="{h}" fill="{SVG_COLORS[PLATE]}" stroke="{SVG_COLORS[PLATE_EDGE]}" '
+        f'stroke-width="{stroke}"/>',
+        f'<g transform="matrix(1 0 0 -1 0 {h})">',
+        f'<g fill="{SVG_COLORS[BOARD]}" fill-opacity="0.85" stroke="{SVG_COLORS[BOARD_EDGE]}" '
+        f'stroke-width="{stroke}">',
+    ]
+    for (_, board, _), (x0, y0, x1, y1) in zip(items, boxes.tolist()):
+        parts.append(f'<rect x="{_number(x0)}" y="{_number(y0)}" width="{_number(x1 - x0)}" '
+                     f'height="{_number(y1 - y0)}"><title>{html.escape(board.name)}</title></rect>')
+    parts.append(f'</g><g fill="{SVG_COLORS[HOLE]}">')
+    for (x, y), diameter in zip(centres.tolist(), diameters.tolist()):
+        parts.append(f'<circle cx="{_number(x)}" cy="{_number(y)}" r="{_number(diameter / 2)}"/>')
+    parts.append('</g></g></svg>')
+    return '\n'.join(parts).encode('utf-8')
+
+
+def _coverage(rows0, cols0, rows1, cols1, weights, shape):
+    """Summed weights of the half-open sample rectangles covering each sample, via a 2-D difference array"""
+    diff = np.zeros((shape[0] + 1, shape[1] + 1), dtype=np.int64)
+    np.add.at(diff, (rows0, cols0), weights)
+    np.add.at(diff, (rows0, cols1), -weights)
+    np.add.at(diff, (rows1, cols0), -weights)
+    np.add.at(diff, (rows1, cols1), weights)
+    np.cumsum(diff, axis=0, out=diff)
+    np.cumsum(diff, axis=1, out=diff)
+    return diff[:shape[0], :shape[1]]
+
+
+def _hole_mask(centres, radii, shape):
+    """Samples inside any hole, given centres and radii in sample units"""
+    mask = np.zeros(shape, dtype=bool)
+    if not len(radii):
+        return mask
+    reach = int(np.ceil(radii.max()))
+    offsets = np.arange(-reach, reach + 1)
+    per_hole = len(offsets) ** 2
+    batch = max(1, HOLE_BATCH_ELEMENTS // per_hole)
+    for start in range(0, len(radii), batch):
+        centre = centres[start:start + batch]
+        base = np.floor(centre).astype(int)
+        rows = base[:, 1, None, None] + offsets[None, :, None]
+        cols = base[:, 0, None, None] + offsets[None, None, :]
+        # Distance from each sample's centre to the hole centre
+        inside = ((rows + 0.5 - centre[:, 1, None, None]) ** 2 + (cols + 0.5 - centre[:, 0, None, None]) ** 2
+                  <= radii[start:start + batch, None, None] ** 2)
+        inside &= (rows >= 0) & (rows < shape[0]) & (cols >= 0) & (cols < shape[1])
+        mask[np.broadcast_to(rows, inside.shape)[inside], np.broadcast_to(cols, inside.shape)[inside]] = True
+    return mask
+
+
+def rasterize(items, base_width, base_height, width=DEFAULT_WIDTH):
+    """(height, width, 3) uint8 image of the plate as render_svg draws it
+
+    Every board and hole is drawn in the same few array operations,
+    whatever their number: footprints by summing a difference array
+    (so overlaps show up as counts above one), outlines as the difference
+    from the same footprints shrunk by a pixel, holes as distance masks.
+    Drawn on a supersampled grid and averaged down.
+    """
+    boxes, centres, diameters = layout_shapes(items)
+    width, height = image_size(base_width, base_height, width)
+    factor = int(np.clip(SUPERSAMPLE_SAMPLES // max(width, height), 1, MAX_SUPERSAMPLE))
+    shape = (height * factor, width * factor)
+    scale_x, scale_y = shape[1] / base_width, shape[0] / base_height
+
+    # Sample (row, col) covers mm [col / scale_x, ...) across and, y pointing up, from the top down
+    cols0 = np.clip(np.ceil(boxes[:, 0] * scale_x - 0.5), 0, shape[1]).astype(int)
+    cols1 = np.clip(np.ceil(boxes[:, 2] * scale_x - 0.5), 0, shape[1]).astype(int)
+    rows0 = np.clip(np.ceil((base_height - boxes[:, 3]) * scale_y - 0.5), 0, shape[0]).astype(int)
+    rows1 = np.clip(np.ceil((base_height - boxes[:, 1]) * scale_y - 0.5), 0, shape[0]).astype(int)
+    # The same footprints a pixel in from each side (empty for boards thinner than two pixels),
+    # counted in the high 32 bits of the same sums so one pass covers both
+    inner_rows0, inner_cols0 = np.minimum(rows0 + factor, rows1), np.minimum(cols0 + factor, cols1)
+    inner_rows1, inner_cols1 = np.maximum(rows1 - factor, inner_rows0), np.maximum(cols1 - factor, inner_cols0)
+    weights = np.repeat(np.array([1, INNER_WEIGHT], dtype=np.int64), len(boxes))
+    total = _coverage(np.concatenate([rows0, inner_rows0]), np.concatenate([cols0, inner_cols0]),
+                      np.concatenate([rows1, inner_rows1]), np.concatenate([cols1, inner_cols1]), weights, shape)
+    count, inner = total & (INNER_WEIGHT - 1), total >> 32
+
+    labels = np.full(shape, PLATE, dtype=np.uint8)
+    labels[count > 0] = BOARD
+    labels[count > inner] = BOARD_EDGE
+    labels[count > 1] = OVERLAP
+    hole_centres = np.stack([centres[:, 0] * scale_x, (base_height - centres[:, 1]) * scale_y], axis=1)
+    labels[_hole_mask(hole_centres, diameters / 2 * scale_x, shape)] = HOLE
+    labels[:factor] = labels[-factor:] = PLATE_EDGE
+    labels[:, :factor] = labels[:, -factor:] = PLATE_EDGE
+
+    return _downsample(PALETTE.take(labels, axis=0), factor)
+
+
+def _downsample(samples, factor):
+    """Average factor x factor blocks of a (rows, cols, 3) uint8 image
+    
+    Summed one strided slice at a time, which is several times faster
+    than a reduction over the block axes.
+    """
+    height, width = samples.shape[0] // factor, samples.shape[1] // factor
+    rows = samples[0::factor].astype(np.uint16)
+    for offset in range(1, factor):
+        rows += samples[offset::factor]
+    total = rows[:, 0::factor].copy()
+    for offset in range(1, factor):
+        total += rows[:, offset::factor]
+    return (total // (factor * factor)).astype(np.uint8).reshape(height, width, 3)
+
+
+def _png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def png_bytes(image, level=PNG_COMPRESS_LEVEL):
+    """Encode an (height, width, 3) uint8 image as PNG
+
+    Every row uses the Up filter (difference from the row above), computed
+    for the whole image at once; previews are mostly flat colour, so the
+    filtered rows are mostly zeros and deflate well.
+    """
+    height, width, _ = image.shape
+    rows = image.reshape(height, width * 3)
+    filtered = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    filtered[:, 0] = 2
+    filtered[:, 1:] = rows
+    filtered[1:, 1:] -= rows[:-1]
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + _png_chunk(b'IHDR', header)
+            + _png_chunk(b'IDAT', zlib.compress(filtered.tobytes(), level)) + _png_chunk(b'IEND', b''))
+
+
+def render_png(items, base_width, base_height, width=DEFAULT_WIDTH):
+    return png_bytes(rasterize(items, base_width, base_height, width))
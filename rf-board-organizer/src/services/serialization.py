@@ -0,0 +1,52 @@
+import gzip
+import json
+from flask import Response, request
+
+# orjson and brotli are optional speed-ups; the stdlib fallbacks give the same output
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+
+def dumps(payload):
+    """Encode a payload as compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def negotiate_encoding(accept_encoding):
+    """Best supported content coding the client accepts: 'br', 'gzip' or None"""
+    if brotli is not None and accept_encoding['br']:
+        return 'br'
+    if accept_encoding['gzip']:
+        return 'gzip'
+    return None
+
+
+def json_response(payload, status=200, headers=None):
+    """JSON response encoded with the fast encoder and compressed when the client accepts it"""
+    body = dumps(payload)
+    response = Response(body, status=status, mimetype='application/json', headers=headers)
+    response.vary.add('Accept-Encoding')
+
+    if len(body) < MIN_COMPRESS_SIZE:
+        return response
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding == 'br':
+        response.set_data(brotli.compress(body, quality=4))
+    elif encoding == 'gzip':
+        response.set_data(gzip.compress(body, compresslevel=5))
+    else:
+        return response
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,228 @@
+import math
+import os
+import time
+from concurrent.futures import FIRST_EXCEPTION, wait
+import numpy as np
+from src.services.packing import ROTATIONS, MaxRectsPacker, fit, rotation_for, rotation_modes
+from src.services.workers import process_pool
+
+# A stack is a column of identical base plates. Each plate needs room above it
+# for its tallest board: standoff, PCB and the parts on top of it.
+PCB_THICKNESS = 1.6
+DEFAULT_HEADROOM = 10.0
+DEFAULT_PLATE_THICKNESS = 3.0
+DEFAULT_TIME_BUDGET = 2.0
+
+# Per worker, after the deterministic orders; the time budget usually ends the search first
+MAX_CANDIDATES = 5000
+
+# Extra seconds to wait past the budget for a worker's last candidate before giving up
+SEARCH_GRACE = 30.0
+
+_executor = None
+
+
+def worker_count():
+    return int(os.getenv('STACKING_WORKERS', 0)) or os.cpu_count() or 1
+
+
+def get_executor():
+    """Process pool for stack searches (STACKING_WORKERS, default one per CPU)"""
+    global _executor
+    if _executor is None:
+        _executor = process_pool(worker_count())
+    return _executor
+
+
+def clearance(standoff_heights, headroom=DEFAULT_HEADROOM):
+    """Vertical space a plate needs above it for boards on these standoffs"""
+    return max(standoff_heights, default=0.0) + PCB_THICKNESS + headroom
+
+
+def assign(problem, order):
+    """Place boards in order onto as few plates as first fit allows
+
+    Each board goes on the existing plate where it fits and raises that
+    plate's required clearance the least (ties: the earliest plate), or on
+    a new plate. Returns (score, plates, unplaced) where plates are lists of
+    (index, x, y, rotation) and score is (plate count, total clearance).
+    """
+    sizes, heights = problem['sizes'], problem['heights']
+    margin = problem['margin']
+    rotations, upright, turned_ok = rotation_modes(problem['rotations'])
+    width, height = problem['plate_width'] - margin, problem['plate_height'] - margin
+
+    packers, plates, tallest = [], [], []
+    unplaced = []
+    for index in order:
+        w, h = sizes[index] + margin
+        board_height = heights[index]
+        best = None
+        for plate, packer in enumerate(packers):
+            raise_by = max(board_height - tallest[plate], 0.0)
+            if best is not None and raise_by >= best[0]:
+                continue
+            found = fit(packer, w, h, upright, turned_ok)
+            if found is not None:
+                best = (raise_by, plate, found)
+                if raise_by == 0.0:
+                    break
+        if best is None:
+            packer = MaxRectsPacker(width, height)
+            found = fit(packer, w, h, upright, turned_ok)
+            if found is None:
+                unplaced.append(int(index))
+                continue
+            packers.append(packer)
+            plates.append([])
+            tallest.append(board_height)
+            best = (0.0, len(packers) - 1, found)
+        _, plate, (x, y, turned) = best
+        pw, ph = (h, w) if turned else (w, h)
+        packers[plate].place(x, y, pw, ph)
+        tallest[plate] = max(tallest[plate], board_height)
+        rotation = rotation_for(turned, rotations, int(problem['current_rotations'][index]))
+        plates[plate].append((int(index), float(x + margin), float(y + margin), rotation))
+
+    total = sum(clearance([top], problem['headroom']) for top in tallest)
+    return (len(plates), round(float(total), 6)), plates, unplaced
+
+
+def base_orders(problem):
+    """Deterministic orders: tallest standoff first, longest side first, largest area first"""
+    sizes, heights = problem['sizes'], problem['heights']
+    longest, area = sizes.max(axis=1), sizes.prod(axis=1)
+    return [
+        np.lexsort((-area, -longest, -heights)),
+        np.lexsort((-area, -heights, -longest)),
+        np.lexsort((-longest, -heights, -area)),
+    ]
+
+
+def _perturbed(problem, rng):
+    """A base order with its sort keys jittered, so similar boards swap places"""
+    sizes, heights = problem['sizes'], problem['heights']
+    noise = rng.uniform(0.85, 1.15, size=(3, len(sizes)))
+    keys = [-sizes.prod(axis=1) * noise[0], -sizes.max(axis=1) * noise[1], -heights * noise[2]]
+    primary = int(rng.integers(3))
+    keys.append(keys.pop(primary))
+    return np.lexsort(keys)
+
+
+def optimal(problem, score):
+    """score cannot be beaten: plate count at the area bound and minimal clearance for it
+
+    The tallest board sets one plate's clearance; the rest need at least the
+    lowest board's.
+    """
+    plates, total = score
+    heights, headroom = problem['heights'], problem['headroom']
+    if plates > problem['lower_bound']:
+        return False
+    least = clearance([heights.max()], headroom) + (plates - 1) * clearance([heights.min()], headroom)
+    return total <= round(least, 6)
+
+
+def _mutated(order, rng):
+    """order with a few random pairs swapped, or one run moved to the front"""
+    order = order.copy()
+    n = len(order)
+    if n < 2:
+        return order
+    if rng.random() < 0.5:
+        pairs = rng.integers(n, size=(int(rng.integers(1, 4)), 2))
+        for a, b in pairs:
+            order[a], order[b] = order[b], order[a]
+        return order
+    start = int(rng.integers(n))
+    end = min(n, start + int(rng.integers(1, max(2, n // 10))))
+    return np.concatenate([order[start:end], order[:start], order[end:]])
+
+
+def search(problem, seed, deadline, include_base=False, max_candidates=MAX_CANDIDATES):
+    """Best assignment this worker finds before deadline (a time.time() value)
+
+    At least one order is always tried, even by a worker that starts late.
+    After the deterministic orders (worker 0 only) the search alternates
+    between jittered sort orders and small mutations of the best order so
+    far, keeping mutations that score no worse. Returns (score, plates,
+    unplaced, candidates evaluated).
+    """
+    rng = np.random.default_rng(seed)
+    best, best_order, evaluated = None, None, 0
+    orders = base_orders(problem) if include_base else []
+    while evaluated < max_candidates:
+        if orders:
+            order = orders.pop(0)
+        elif best is not None and time.time() >= deadline:
+            break
+        elif best_order is None or rng.random() < 0.25:
+            order = _perturbed(problem, rng)
+        else:
+            order = _mutated(best_order, rng)
+        result = assign(problem, order)
+        evaluated += 1
+        if best is None or (len(result[2]), result[0]) <= (len(best[2]), best[0]):
+            best, best_order = result, order
+        if not orders and optimal(problem, best[0]):
+            break
+    return (*best, evaluated)
+
+
+def plan_stack(boards, plate_width, plate_height, margin=2.0, rotations=ROTATIONS,
+               headroom=DEFAULT_HEADROOM, plate_thickness=DEFAULT_PLATE_THICKNESS,
+               time_budget=DEFAULT_TIME_BUDGET, executor=None, workers=None):
+    """Split boards over the fewest stacked plates, then the lowest stack
+
+    boards are objects or dicts with width, height, standoff_height and
+    optionally rotation. Candidate board orders are packed on a process pool
+    (every worker searching from its own seed until time_budget runs out)
+    and the best (fewest plates, then least total clearance) wins. Returns a
+    dict with 'plates' (each a list of (board index, x, y, rotation), plus
+    its clearance), 'unplaced' board indices, 'stack_height' and search
+    statistics.
+    """
+    def value(board, field, default=None):
+        return board.get(field, default) if isinstance(board, dict) else getattr(board, field, default)
+
+    sizes = np.array([[value(b, 'width'), value(b, 'height')] for b in boards], dtype=float).reshape(-1, 2)
+    heights = np.array([value(b, 'standoff_height') or 0.0 for b in boards], dtype=float)
+    problem = {
+        'sizes': sizes,
+        'heights': heights,
+        'current_rotations': np.array([value(b, 'rotation') or 0 for b in boards], dtype=int),
+        'plate_width': float(plate_width),
+        'plate_height': float(plate_height),
+        'margin': float(margin),
+        'rotations': list(rotations),
+        'headroom': float(headroom),
+        'lower_bound': math.ceil(((sizes + margin).prod(axis=1).sum()) / (plate_width * plate_height)),
+    }
+
+    start = time.perf_counter()
+    deadline = time.time() + time_budget
+    if len(boards) == 0:
+        results = [((0, 0.0), [], [], 0)]
+    elif time_budget <= 0:
+        results = [search(problem, 0, deadline, include_base=True)]
+    else:
+        executor = executor or get_executor()
+        workers = workers or worker_count()
+        futures = [executor.submit(search, problem, seed, deadline, seed == 0) for seed in range(workers)]
+        done, _ = wait(futures, timeout=time_budget + SEARCH_GRACE, return_when=FIRST_EXCEPTION)
+        for future in futures:
+            future.cancel()
+        results = [future.result() for future in done]
+        if not results:
+            raise TimeoutError('Stack search did not finish')
+
+    score, plates, unplaced, _ = min(results, key=lambda r: (len(r[2]), r[0]))
+    clearances = [float(clearance([heights[index] for index, *_ in plate], headroom)) for plate in plates]
+    return {
+        'plates': [{'placements': plate, 'clearance': round(c, 3)} for plate, c in zip(plates, clearances)],
+        'unplaced': sorted(unplaced),
+        'stack_height': round(sum(clearances) + plate_thickness * len(plates), 3),
+        'lower_bound': problem['lower_bound'],
+        'candidates': sum(r[3] for r in results),
+        'elapsed': round(time.perf_counter() - start, 3),
+    }
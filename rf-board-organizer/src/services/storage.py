@@ -0,0 +1,120 @@
+import os
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateColumn
+from src.models.user import db
+
+DEFAULT_DATABASE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'app.db')
+
+# Milliseconds a connection waits on a locked database before raising "database is locked"
+DEFAULT_BUSY_TIMEOUT = 5000
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# single writer, and NORMAL synchronous is durable under WAL except on power loss.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'foreign_keys': 'ON',
+    'temp_store': 'MEMORY',
+    'cache_size': -32000,          # KiB, i.e. 32 MiB per connection
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+
+def database_url():
+    """SQLAlchemy URL from DATABASE_URL, defaulting to the bundled SQLite file"""
+    return os.getenv('DATABASE_URL') or f'sqlite:///{DEFAULT_DATABASE_PATH}'
+
+
+def is_sqlite(url):
+    return make_url(url).get_backend_name() == 'sqlite'
+
+
+def is_memory_sqlite(url):
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(url, pool_size=None, max_overflow=None, busy_timeout=None):
+    """SQLALCHEMY_ENGINE_OPTIONS suited to the database behind url
+
+    File-backed SQLite gets a connection per worker thread (SQLite allows one
+    writer, so extra connections only queue on the busy timeout); in-memory
+    SQLite shares a single connection; other databases get a sized,
+    pre-pinged pool.
+    """
+    pool_size = int(pool_size or os.getenv('DB_POOL_SIZE', 10))
+    max_overflow = int(max_overflow if max_overflow is not None else os.getenv('DB_MAX_OVERFLOW', 20))
+    busy_timeout = int(busy_timeout or os.getenv('DB_BUSY_TIMEOUT', DEFAULT_BUSY_TIMEOUT))
+
+    if is_memory_sqlite(url):
+        return {'poolclass': StaticPool, 'connect_args': {'check_same_thread': False}}
+    if is_sqlite(url):
+        return {
+            'pool_size': pool_size,
+            'max_overflow': max_overflow,
+            'pool_timeout': 30,
+            'connect_args': {'timeout': busy_timeout / 1000, 'check_same_thread': False},
+        }
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+    }
+
+
+def apply_sqlite_pragmas(dbapi_connection, busy_timeout=DEFAULT_BUSY_TIMEOUT, pragmas=None):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f'PRAGMA busy_timeout = {int(busy_timeout)}')
+        for name, value in (SQLITE_PRAGMAS if pragmas is None else pragmas).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+
+def configure_storage(app, url=None, tuned=True):
+    """Point app at its database and register the engine with db
+
+    url defaults to database_url(). With tuned=False the engine keeps
+    SQLAlchemy's defaults (used by the load benchmark as a baseline).
+    """
+    url = url or database_url()
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if tuned:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(url)
+    db.init_app(app)
+
+    if tuned and is_sqlite(url):
+        busy_timeout = int(os.getenv('DB_BUSY_TIMEOUT', DEFAULT_BUSY_TIMEOUT))
+        pragmas = dict(SQLITE_PRAGMAS)
+        if is_memory_sqlite(url):
+            # WAL needs a file; in-memory databases keep their own journal
+            pragmas.pop('journal_mode')
+            pragmas.pop('mmap_size')
+        with app.app_context():
+            event.listen(db.engine, 'connect',
+                         lambda connection, _: apply_sqlite_pragmas(connection, busy_timeout, pragmas))
+    return app
+
+
+def add_missing_columns():
+    """Add model columns that an existing database's tables lack
+
+    create_all only creates missing tables, so a column added to a model
+    later (with a server default, or nullable) is added here with ALTER
+    TABLE. Call inside an app context, after create_all.
+    """
+    inspector = inspect(db.engine)
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    definition = CreateColumn(column).compile(dialect=db.engine.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {definition}'))
@@ -0,0 +1,225 @@
+import math
+from collections import defaultdict, namedtuple
+import numpy as np
+from src.services.validation import SpatialGrid
+
+# Cut order: holes drop out first, then board outlines, then the plate is released
+LEVELS = {'MOUNTING_HOLES': 0, 'BOARD_OUTLINE': 1, 'BASE_OUTLINE': 2}
+
+# Coordinates closer than this (mm) are the same point for merging
+TOLERANCE = 1e-6
+
+# 2-opt only tries reversals up to this many entities long, and stops after MAX_PASSES
+TWO_OPT_WINDOW = 100
+MAX_PASSES = 8
+
+# A cut entity: kind is 'line' or 'circle'; line runs start -> end, a circle
+# starts and ends at its +X quadrant point
+Cut = namedtuple('Cut', ['kind', 'layer', 'start', 'end', 'center', 'radius'])
+
+
+def _line(layer, start, end):
+    return Cut('line', layer, tuple(start), tuple(end), None, None)
+
+
+def _circle(layer, center_x, center_y, radius):
+    point = (center_x + radius, center_y)
+    return Cut('circle', layer, point, point, (center_x, center_y), radius)
+
+
+def _rectangle(layer, x0, y0, x1, y1):
+    corners = [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+    return [_line(layer, corners[i], corners[(i + 1) % 4]) for i in range(4)]
+
+
+def layout_cuts(boards, base_width, base_height):
+    """Cut entities in the order the plain DXF writer emits them"""
+    cuts = _rectangle('BASE_OUTLINE', 0, 0, base_width, base_height)
+    for board in boards:
+        x, y = board['x'], board['y']
+        cuts.extend(_rectangle('BOARD_OUTLINE', x, y, x + board['width'], y + board['height']))
+        cuts.extend(_circle('MOUNTING_HOLES', hole['x'], hole['y'], hole['diameter'] / 2)
+                    for hole in board.get('holes', []))
+    return cuts
+
+
+def cut_length(cuts):
+    return sum(2 * math.pi * cut.radius if cut.kind == 'circle' else math.dist(cut.start, cut.end)
+               for cut in cuts)
+
+
+def travel_length(cuts, origin=(0.0, 0.0)):
+    """Rapid (non-cutting) distance from origin through the cuts in order"""
+    position, total = origin, 0.0
+    for cut in cuts:
+        total += math.dist(position, cut.start)
+        position = cut.end
+    return total
+
+
+def merge_segments(cuts, tolerance=TOLERANCE):
+    """Drop duplicate circles and fuse overlapping or end-to-end collinear lines
+
+    Lines are grouped by their supporting line (direction and offset), their
+    intervals along it are unioned, and each union becomes one line. A merged
+    line keeps the latest-cut layer among the pieces it absorbed.
+    """
+    circles = {}
+    groups = defaultdict(list)
+    for cut in cuts:
+        if cut.kind == 'circle':
+            key = (round(cut.center[0] / tolerance), round(cut.center[1] / tolerance),
+                   round(cut.radius / tolerance))
+            circles.setdefault(key, cut)
+            continue
+        (x0, y0), (x1, y1) = cut.start, cut.end
+        length = math.hypot(x1 - x0, y1 - y0)
+        if length <= tolerance:
+            continue
+        dx, dy = (x1 - x0) / length, (y1 - y0) / length
+        # One canonical direction per supporting line
+        if dx < -tolerance or (abs(dx) <= tolerance and dy < 0):
+            dx, dy = -dx, -dy
+        offset = -dy * x0 + dx * y0
+        key = (round(dx / tolerance), round(dy / tolerance), round(offset / tolerance))
+        t0, t1 = sorted((dx * x0 + dy * y0, dx * x1 + dy * y1))
+        groups[key].append((t0, t1, cut.layer, dx, dy, offset))
+
+    merged = list(circles.values())
+    for pieces in groups.values():
+        pieces.sort()
+        _, _, _, dx, dy, offset = pieces[0]
+
+        def emit(t0, t1, layer):
+            merged.append(_line(layer, (-dy * offset + dx * t0, dx * offset + dy * t0),
+                                (-dy * offset + dx * t1, dx * offset + dy * t1)))
+
+        start, end, layer = pieces[0][:3]
+        for t0, t1, piece_layer, *_ in pieces[1:]:
+            if t0 <= end + tolerance:
+                end = max(end, t1)
+                layer = max(layer, piece_layer, key=LEVELS.get)
+            else:
+                emit(start, end, layer)
+                start, end, layer = t0, t1, piece_layer
+        emit(start, end, layer)
+    return merged
+
+
+def _flip(cut):
+    return cut._replace(start=cut.end, end=cut.start) if cut.kind == 'line' else cut
+
+
+def nearest_neighbour(cuts, origin):
+    """Greedy order: always cut next whichever free entity end is closest
+
+    Lines may be cut in either direction. Entity ends live in a SpatialGrid
+    so each step only looks at nearby candidates.
+    """
+    if not cuts:
+        return []
+    points = np.array([[cut.start, cut.end] for cut in cuts], dtype=float)
+    span = np.ptp(points.reshape(-1, 2), axis=0).max() if len(cuts) > 1 else 1.0
+    cell = max(span / math.sqrt(len(cuts)), TOLERANCE * 10, 1e-3)
+    grid = SpatialGrid(cell)
+    for index, (start, end) in enumerate(points):
+        grid.insert((index, 0), (*start, *start))
+        if cuts[index].kind == 'line':
+            grid.insert((index, 1), (*end, *end))
+
+    order = []
+    position = np.asarray(origin, dtype=float)
+    for _ in range(len(cuts)):
+        radius = cell
+        while True:
+            found = grid.query((position[0] - radius, position[1] - radius,
+                                position[0] + radius, position[1] + radius))
+            if found:
+                best = min(found, key=lambda k: (np.hypot(*(points[k[0], k[1]] - position)), k))
+                distance = np.hypot(*(points[best[0], best[1]] - position))
+                # A box hit can still be beaten by a point just outside the box's corner
+                if distance <= radius:
+                    break
+                found = grid.query((position[0] - distance, position[1] - distance,
+                                    position[0] + distance, position[1] + distance))
+                best = min(found, key=lambda k: (np.hypot(*(points[k[0], k[1]] - position)), k))
+                break
+            radius *= 2
+        index, end = best
+        grid.remove((index, 0))
+        grid.remove((index, 1))
+        cut = cuts[index] if end == 0 else _flip(cuts[index])
+        order.append(cut)
+        position = np.asarray(cut.end, dtype=float)
+    return order
+
+
+def two_opt(cuts, origin, window=TWO_OPT_WINDOW, max_passes=MAX_PASSES):
+    """Improve an order by reversing runs of entities (and their directions)
+
+    Reversing entries i..j replaces the rapids into i and out of j; the gain
+    for every j in the window is computed at once with NumPy.
+    """
+    n = len(cuts)
+    if n < 3:
+        return list(cuts)
+    cuts = list(cuts)
+    starts = np.array([origin] + [cut.start for cut in cuts], dtype=float)
+    ends = np.array([origin] + [cut.end for cut in cuts], dtype=float)
+
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n + 1):
+            j = np.arange(i + 1, min(i + window, n) + 1)
+            if not len(j):
+                continue
+            before = ends[i - 1]
+            has_next = j < n
+            following = starts[np.minimum(j + 1, n)]
+            old = np.hypot(*(starts[i] - before)) + np.where(
+                has_next, np.hypot(*(following - ends[j]).T), 0.0)
+            new = np.hypot(*(ends[j] - before).T) + np.where(
+                has_next, np.hypot(*(following - starts[i]).T), 0.0)
+            gain = old - new
+            best = int(np.argmax(gain))
+            if gain[best] <= 1e-9:
+                continue
+            k = int(j[best])
+            starts[i:k + 1], ends[i:k + 1] = ends[i:k + 1][::-1].copy(), starts[i:k + 1][::-1].copy()
+            cuts[i - 1:k] = [_flip(cut) for cut in reversed(cuts[i - 1:k])]
+            improved = True
+        if not improved:
+            break
+    return cuts
+
+
+def optimise(cuts, origin=(0.0, 0.0)):
+    """Merged cuts ordered level by level (holes, board outlines, plate outline)
+
+    Within a level the reordered batch is only used when its rapids are
+    shorter than those of the merged cuts left in their original order.
+    """
+    merged = merge_segments(cuts)
+    ordered = []
+    position = origin
+    for level in sorted(set(LEVELS.values())):
+        batch = [cut for cut in merged if LEVELS.get(cut.layer, 1) == level]
+        reordered = two_opt(nearest_neighbour(batch, position), position)
+        if travel_length(reordered, position) < travel_length(batch, position):
+            batch = reordered
+        if batch:
+            position = batch[-1].end
+        ordered.extend(batch)
+    return ordered
+
+
+def report(before, after, origin=(0.0, 0.0)):
+    """Estimated cut and rapid travel length (mm) of two cut sequences"""
+    return {
+        'entities_before': len(before),
+        'entities_after': len(after),
+        'cut_length_before': round(cut_length(before), 3),
+        'cut_length_after': round(cut_length(after), 3),
+        'travel_length_before': round(travel_length(before, origin), 3),
+        'travel_length_after': round(travel_length(after, origin), 3),
+    }
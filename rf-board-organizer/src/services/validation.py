@@ -0,0 +1,194 @@
+import math
+from collections import defaultdict
+from src.services import geometry
+
+EPSILON = 1e-6
+
+# Standoff outer diameter relative to the hole, as in export.standoff_params
+STANDOFF_RATIO = 1.5
+
+
+class SpatialGrid:
+    """Uniform grid hash of bounding boxes
+
+    Each key is registered in every cell its box touches, so a query only
+    visits keys in the cells around the query box instead of every key.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self._cells = defaultdict(set)
+        self._keys = {}
+
+    def _span(self, box):
+        x0, y0, x1, y1 = box
+        size = self.cell_size
+        return [(i, j)
+                for i in range(math.floor(x0 / size), math.floor(x1 / size) + 1)
+                for j in range(math.floor(y0 / size), math.floor(y1 / size) + 1)]
+
+    def insert(self, key, box):
+        cells = self._span(box)
+        self._keys[key] = cells
+        for cell in cells:
+            self._cells[cell].add(key)
+
+    def remove(self, key):
+        for cell in self._keys.pop(key, []):
+            self._cells[cell].discard(key)
+            if not self._cells[cell]:
+                del self._cells[cell]
+
+    def query(self, box):
+        found = set()
+        for cell in self._span(box):
+            found |= self._cells.get(cell, set())
+        return found
+
+
+def _expand(box, amount):
+    x0, y0, x1, y1 = box
+    return (x0 - amount, y0 - amount, x1 + amount, y1 + amount)
+
+
+def _rect_gap(a, b):
+    """Per-axis signed separation of two boxes; both negative means they overlap"""
+    return max(b[0] - a[2], a[0] - b[2]), max(b[1] - a[3], a[1] - b[3])
+
+
+def _point_rect_distance(x, y, box):
+    dx = max(box[0] - x, 0.0, x - box[2])
+    dy = max(box[1] - y, 0.0, y - box[3])
+    return math.hypot(dx, dy)
+
+
+class LayoutValidator:
+    """Overlap, clearance and plate-bounds checks for placed boards
+
+    Footprints are indexed in a SpatialGrid, so a full validation only
+    compares neighbouring boards. After add() or move(), check(board_id)
+    re-validates just that board against its neighbours.
+    """
+
+    def __init__(self, plate_width, plate_height, clearance=2.0, hole_clearance=1.0, cell_size=None):
+        self.plate_width = plate_width
+        self.plate_height = plate_height
+        self.clearance = clearance
+        self.hole_clearance = hole_clearance
+        self.cell_size = cell_size
+        self.boards = {}
+        self.grid = None
+        # Largest distance at which two boards can still conflict
+        self.reach = clearance
+
+    def add(self, board_id, box, holes):
+        """Register a board's footprint (x0, y0, x1, y1) and holes [(x, y, diameter)]"""
+        self.boards[board_id] = (box, holes)
+        for _, _, diameter in holes:
+            self.reach = max(self.reach, self._keepout(diameter))
+        if self.grid is not None:
+            self.grid.insert(board_id, box)
+
+    def move(self, board_id, box, holes):
+        """Replace a board's geometry, keeping the index current"""
+        if self.grid is not None:
+            self.grid.remove(board_id)
+        self.add(board_id, box, holes)
+
+    def remove(self, board_id):
+        self.boards.pop(board_id, None)
+        if self.grid is not None:
+            self.grid.remove(board_id)
+
+    def _ensure_grid(self):
+        if self.grid is not None:
+            return
+        cell_size = self.cell_size
+        if cell_size is None:
+            # Typical board size keeps each footprint in a few cells
+            sizes = sorted(max(box[2] - box[0], box[3] - box[1]) for box, _ in self.boards.values())
+            cell_size = sizes[len(sizes) // 2] if sizes else 50.0
+        self.grid = SpatialGrid(max(cell_size, self.clearance, 1.0))
+        for board_id, (box, _) in self.boards.items():
+            self.grid.insert(board_id, box)
+
+    def _keepout(self, diameter):
+        return diameter / 2 * STANDOFF_RATIO + self.hole_clearance
+
+    def _plate_issues(self, board_id, box, holes):
+        issues = []
+        if (box[0] < -EPSILON or box[1] < -EPSILON or
+                box[2] > self.plate_width + EPSILON or box[3] > self.plate_height + EPSILON):
+            issues.append({'type': 'out_of_plate', 'boards': [board_id]})
+        for x, y, diameter in holes:
+            keepout = self._keepout(diameter)
+            if (x - keepout < -EPSILON or y - keepout < -EPSILON or
+                    x + keepout > self.plate_width + EPSILON or y + keepout > self.plate_height + EPSILON):
+                issues.append({'type': 'hole_out_of_plate', 'boards': [board_id], 'hole': [x, y]})
+        return issues
+
+    def _pair_issues(self, a_id, b_id):
+        a_box, a_holes = self.boards[a_id]
+        b_box, b_holes = self.boards[b_id]
+        issues = []
+        dx, dy = _rect_gap(a_box, b_box)
+        if dx < -EPSILON and dy < -EPSILON:
+            # Standoff conflicts are implied by the overlap itself
+            return [{'type': 'overlap', 'boards': [a_id, b_id]}]
+        distance = math.hypot(max(dx, 0.0), max(dy, 0.0))
+        if distance < self.clearance - EPSILON:
+            issues.append({'type': 'clearance', 'boards': [a_id, b_id],
+                           'distance': round(distance, 3)})
+        # A standoff must not land under a neighbouring board
+        for (owner, other_id, other_box, holes) in ((a_id, b_id, b_box, a_holes), (b_id, a_id, a_box, b_holes)):
+            for x, y, diameter in holes:
+                if _point_rect_distance(x, y, other_box) < self._keepout(diameter) - EPSILON:
+                    issues.append({'type': 'hole_clearance', 'boards': [owner, other_id], 'hole': [x, y]})
+        return issues
+
+    def check(self, board_id):
+        """Issues involving one board, found through the spatial index"""
+        self._ensure_grid()
+        box, holes = self.boards[board_id]
+        issues = self._plate_issues(board_id, box, holes)
+        for other_id in sorted(self.grid.query(_expand(box, self.reach)), key=str):
+            if other_id != board_id:
+                issues.extend(self._pair_issues(board_id, other_id))
+        return issues
+
+    def validate(self):
+        """Every issue in the layout, each neighbouring pair compared once"""
+        self._ensure_grid()
+        issues = []
+        order = {board_id: index for index, board_id in enumerate(self.boards)}
+        for board_id, (box, holes) in self.boards.items():
+            issues.extend(self._plate_issues(board_id, box, holes))
+            for other_id in sorted(self.grid.query(_expand(box, self.reach)), key=order.get):
+                if order[other_id] > order[board_id]:
+                    issues.extend(self._pair_issues(board_id, other_id))
+        return issues
+
+
+def validator_for_layout_items(items, plate_width, plate_height, clearance=2.0, hole_clearance=1.0):
+    """LayoutValidator over (id, board, placement) items
+
+    Items with a LayoutPlacement are positioned by it, the rest by the
+    Board row's own position_x/position_y/rotation.
+    """
+    validator = LayoutValidator(plate_width, plate_height, clearance, hole_clearance)
+    for item_id, board, placement in items:
+        if placement is not None:
+            validator.add(item_id, geometry.placement_footprint(placement), geometry.placement_holes(placement))
+        else:
+            validator.add(item_id, geometry.footprint(board), geometry.mounting_holes(board))
+    return validator
+
+
+def validator_for_export(boards, plate_width, plate_height, clearance=2.0, hole_clearance=1.0):
+    """LayoutValidator over the board dicts posted to /generate-dxf"""
+    validator = LayoutValidator(plate_width, plate_height, clearance, hole_clearance)
+    for index, board in enumerate(boards):
+        x, y = board['x'], board['y']
+        validator.add(board.get('id', index), (x, y, x + board['width'], y + board['height']),
+                      [(hole['x'], hole['y'], hole['diameter']) for hole in board.get('holes', [])])
+    return validator
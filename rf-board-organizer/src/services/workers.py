@@ -0,0 +1,19 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Pool workers for the web server start from a forkserver (spawn where there is
+# none), never a fork of the server itself: forking a threaded process with
+# live database pools, job threads and flush timers can leave a child holding
+# a lock no thread will ever release. Tasks are plain functions of plain data.
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Imported once in the fork server, so each worker starts with them loaded
+PRELOAD = ('src.services.fabrication', 'src.services.stacking')
+
+
+def process_pool(max_workers):
+    """ProcessPoolExecutor whose workers share none of the server's threads, locks or connections"""
+    context = multiprocessing.get_context(START_METHOD)
+    if START_METHOD == 'forkserver':
+        context.set_forkserver_preload(list(PRELOAD))
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
@@ -0,0 +1,67 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from flask import Flask
+from src.models.user import db
+from src.routes.board import artifact_cache, board_bp
+from src.services import layout_sync, library
+from src.services.storage import add_missing_columns, configure_storage
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Board routes on a scratch SQLite database, with an empty artifact cache and layout hub"""
+    hub = layout_sync.LayoutHub()
+    monkeypatch.setattr(layout_sync, 'hub', hub)
+    app = Flask(__name__)
+    configure_storage(app, f"sqlite:///{tmp_path / 'test.db'}")
+    app.register_blueprint(board_bp, url_prefix='/api')
+    with app.app_context():
+        db.create_all()
+        add_missing_columns()
+        library.ensure_search_index()
+    artifact_cache.clear()
+    yield app
+    for layout_id in list(hub._states):
+        hub.forget(layout_id, write=False)
+    artifact_cache.clear()
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def spec(i=0, **overrides):
+    """Board columns for POST /boards; different i give boards that are not near-duplicates"""
+    return {'name': f'Board {i}', 'width': 40.0 + 5 * i, 'height': 25.0, 'mounting_holes_x': 2,
+            'mounting_holes_y': 2, 'hole_spacing_x': 34.0 + 5 * i, 'hole_spacing_y': 19.0,
+            'hole_diameter': 3.0, **overrides}
+
+
+@pytest.fixture
+def add_board(client):
+    """add_board(i=0, **columns) creates a library board (see spec) and returns its id"""
+    def add(i=0, **overrides):
+        response = client.post('/api/boards', json=spec(i, **overrides))
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()['id']
+    return add
+
+
+@pytest.fixture
+def add_layout(client):
+    """add_layout(placements=(), **columns) creates a layout and returns its JSON (with placements)"""
+    def add(placements=(), **columns):
+        layout = client.post('/api/layouts', json={'name': 'Layout', 'base_width': 200.0,
+                                                   'base_height': 150.0, **columns}).get_json()
+        if placements:
+            response = client.put(f"/api/layouts/{layout['id']}/placements", json={'placements': list(placements)})
+            assert response.status_code == 200, response.get_json()
+            layout = response.get_json()
+        return layout
+    return add
@@ -0,0 +1,107 @@
+import io
+import json
+
+import pytest
+from conftest import spec
+from src.services import board_import
+
+CSV_HEADER = 'name,width,height,mounting_holes_x,mounting_holes_y,hole_spacing_x,hole_spacing_y,hole_diameter\n'
+
+
+def csv_row(row):
+    return ','.join(str(row[field]) for field in CSV_HEADER.strip().split(',')) + '\n'
+
+
+def bulk(client, body, content_type, query=''):
+    return client.post(f'/api/boards/bulk{query}', data=body, content_type=content_type)
+
+
+@pytest.mark.parametrize('read_size', [1, 7, board_import.READ_SIZE])
+def test_json_array_elements_span_read_chunks(read_size):
+    values = [spec(0), {'width': 12345.678}, 42, [1, 2], 'text']
+    body = '  [' + ' ,\n'.join(json.dumps(value) for value in values) + ']  '
+    assert list(board_import.iter_json_array(io.StringIO(body), read_size)) == values
+
+
+@pytest.mark.parametrize('body, message', [
+    ('{"name": "x"}', 'Expected a JSON array'),
+    ('[{"name": "x"}', 'Unexpected end'),
+    ('[{"name": }]', 'Invalid JSON'),
+])
+def test_json_array_format_errors(body, message):
+    with pytest.raises(board_import.ImportFormatError, match=message):
+        list(board_import.iter_json_array(io.StringIO(body), 4))
+
+
+def test_json_import(client):
+    response = bulk(client, json.dumps([spec(0), spec(1)]), 'application/json')
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert (summary['received'], summary['inserted'], summary['failed']) == (2, 2, 0)
+    assert len(client.get('/api/boards').get_json()) == 2
+
+
+def test_ndjson_import_reports_bad_lines_and_keeps_the_rest(client):
+    body = '\n'.join([json.dumps(spec(0)), '{not json', '', json.dumps(spec(1, width=-1)), json.dumps(spec(2))])
+    summary = bulk(client, body, 'application/x-ndjson').get_json()
+    assert (summary['received'], summary['inserted'], summary['failed']) == (4, 2, 2)
+    assert [error['row'] for error in summary['errors']] == [2, 4]
+    assert summary['errors'][0]['errors'][0].startswith('Invalid JSON')
+    assert 'width must be positive' in summary['errors'][1]['errors']
+
+
+def test_csv_import_with_a_bom_and_blank_cells(client):
+    body = '﻿' + CSV_HEADER + csv_row(spec(0)) + csv_row(spec(1, hole_diameter=''))
+    summary = bulk(client, body.encode('utf-8'), 'text/csv; charset=utf-8').get_json()
+    assert (summary['received'], summary['inserted'], summary['failed']) == (2, 1, 1)
+    assert summary['errors'] == [{'row': 2, 'errors': ['hole_diameter is missing or not a number']}]
+    board = client.get('/api/boards').get_json()[0]
+    assert (board['name'], board['mounting_holes_x'], board['standoff_height']) == ('Board 0', 2, 10.0)
+
+
+def test_component_aliases_and_canonical_names(client):
+    component = spec(0)
+    component['mounting_hole_dx'] = component.pop('hole_spacing_x')
+    component['mounting_hole_diameter'] = 4.0
+    summary = bulk(client, json.dumps([component]), 'application/json').get_json()
+    assert summary['inserted'] == 1
+    board = client.get('/api/boards').get_json()[0]
+    assert board['hole_spacing_x'] == spec(0)['hole_spacing_x']
+    # hole_diameter was given under its own name too, and wins over the alias
+    assert board['hole_diameter'] == spec(0)['hole_diameter']
+
+
+def test_rows_that_are_not_boards(client):
+    body = json.dumps([spec(0, name=''), 7, spec(1, mounting_holes_x=3, hole_spacing_x=999)])
+    summary = bulk(client, body, 'application/json').get_json()
+    assert summary['inserted'] == 0
+    errors = {error['row']: error['errors'] for error in summary['errors']}
+    assert errors[1] == ['name is required (at most 100 characters)']
+    assert errors[2] == ['Row is not an object']
+    assert set(errors[3]) == {'mounting_holes_x must be 1 or 2', 'hole_spacing_x exceeds width'}
+
+
+def test_near_duplicates_are_skipped_unless_allowed(client, add_board):
+    board_id = add_board(0)
+    rotated = spec(5, width=spec(0)['height'], height=spec(0)['width'] + 0.2,
+                   hole_spacing_x=spec(0)['hole_spacing_y'], hole_spacing_y=spec(0)['hole_spacing_x'])
+    body = json.dumps([rotated, spec(1), spec(1, name='Again')])
+    summary = bulk(client, body, 'application/json').get_json()
+    assert summary['inserted'] == 1
+    assert summary['duplicate_rows'] == [{'row': 1, 'board_id': board_id}, {'row': 3, 'duplicate_of_row': 2}]
+
+    summary = bulk(client, body, 'application/json', '?duplicates=allow').get_json()
+    assert (summary['inserted'], summary['duplicates']) == (3, 0)
+
+
+def test_format_errors(client):
+    response = bulk(client, 'name\nx\n', 'text/plain')
+    assert response.status_code == 400
+    assert 'Content-Type' in response.get_json()['error']
+
+    # Rows read before the body broke off are still imported
+    response = bulk(client, '[' + json.dumps(spec(0)) + ', {"name"', 'application/json')
+    assert response.status_code == 200
+    summary = response.get_json()
+    assert summary['inserted'] == 1
+    assert 'format_error' in summary
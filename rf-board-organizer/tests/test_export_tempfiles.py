@@ -0,0 +1,44 @@
+import os
+import tempfile
+
+import pytest
+
+BURST = 20
+
+
+def board(i):
+    x, y, width, height = 10.0 * i, 5.0, 40.0, 25.0
+    return {'name': f'Board {i}', 'x': x, 'y': y, 'width': width, 'height': height,
+            'holes': [{'x': x + 3, 'y': y + 3, 'diameter': 3.0},
+                      {'x': x + width - 3, 'y': y + height - 3, 'diameter': 3.0}]}
+
+
+@pytest.fixture
+def temp_dir(tmp_path, monkeypatch):
+    """A private directory standing in for the system temp directory"""
+    path = tmp_path / 'tmp'
+    path.mkdir()
+    monkeypatch.setattr(tempfile, 'tempdir', str(path))
+    return path
+
+
+def test_export_burst_leaves_no_temp_files(client, temp_dir):
+    # Distinct parameters per request, so every export is built rather than served from the cache
+    for i in range(BURST):
+        responses = [
+            client.post('/api/generate-dxf', json={'base_width': 200 + i, 'base_height': 150,
+                                                   'boards': [board(k) for k in range(3)]}),
+            client.post('/api/generate-stl/burst', json={'hole_diameter': 2.0 + i / 100, 'standoff_height': 5.0}),
+            client.post('/api/generate-l-bracket/burst', json={'board_width': 40.0 + i, 'board_height': 30.0}),
+        ]
+        for response in responses:
+            assert response.status_code == 200, response.get_data()
+            assert response.get_data()
+
+    # The streamed R12 writer as well
+    response = client.post('/api/generate-dxf', json={'base_width': 500, 'base_height': 500, 'format': 'r12',
+                                                      'boards': [board(k) for k in range(BURST)]})
+    assert response.status_code == 200
+    assert b'EOF' in response.get_data()
+
+    assert os.listdir(temp_dir) == []
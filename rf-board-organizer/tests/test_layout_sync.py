@@ -0,0 +1,148 @@
+import json
+
+import pytest
+from sqlalchemy import update
+from src.models.board import Layout, LayoutPlacement, db
+from src.services import layout_sync
+
+
+@pytest.fixture
+def layout(add_board, add_layout):
+    """A layout with two placements of one board"""
+    board_id = add_board()
+    return add_layout([{'board_id': board_id, 'x': 10.0, 'y': 10.0, 'rotation': 0},
+                       {'board_id': board_id, 'x': 80.0, 'y': 10.0, 'rotation': 0}])
+
+
+def patch(client, layout, version, ops, client_id=None):
+    return client.patch(f"/api/layouts/{layout['id']}/placements",
+                        json={'version': version, 'ops': ops, 'client': client_id})
+
+
+def move(placement_id, x, y=20.0):
+    return {'op': 'move', 'id': placement_id, 'x': x, 'y': y}
+
+
+def placement_ids(layout):
+    return [placement['id'] for placement in layout['placements']]
+
+
+def read_events(chunks, count):
+    """The next count SSE events (as dicts) from a streamed response's chunks"""
+    events = []
+    while len(events) < count:
+        chunk = next(chunks).decode()
+        if chunk.startswith(('retry:', ':')):
+            continue
+        fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines())
+        events.append({'id': int(fields['id']), 'event': fields['event'], 'data': json.loads(fields['data'])})
+    return events
+
+
+def test_patch_moves_a_placement_and_bumps_the_version(client, layout):
+    first, _ = placement_ids(layout)
+    response = patch(client, layout, layout['version'], [move(first, 42.0)])
+    assert response.status_code == 200
+    assert response.get_json()['version'] == layout['version'] + 1
+
+    stored = client.get(f"/api/layouts/{layout['id']}").get_json()
+    assert stored['version'] == layout['version'] + 1
+    assert stored['placements'][0]['x'] == 42.0
+
+
+def test_patch_on_a_placement_changed_by_someone_else_conflicts(client, layout):
+    first, second = placement_ids(layout)
+    assert patch(client, layout, layout['version'], [move(first, 30.0)], 'a').status_code == 200
+
+    response = patch(client, layout, layout['version'], [move(first, 50.0)], 'b')
+    assert response.status_code == 409
+    body = response.get_json()
+    assert body['version'] == layout['version'] + 1
+    assert body['changes'][0]['client'] == 'a'
+
+    # A different placement, or the same client's next step, still applies from the old version
+    assert patch(client, layout, layout['version'], [move(second, 90.0)], 'b').status_code == 200
+    assert patch(client, layout, layout['version'], [move(first, 35.0)], 'a').status_code == 200
+
+
+@pytest.mark.parametrize('version', [None, True, '1'])
+def test_patch_needs_an_integer_version(client, layout, version):
+    first, _ = placement_ids(layout)
+    assert patch(client, layout, version, [move(first, 30.0)]).status_code == 400
+
+
+def test_put_with_a_stale_version_conflicts(client, layout):
+    first, _ = placement_ids(layout)
+    assert patch(client, layout, layout['version'], [move(first, 30.0)]).status_code == 200
+    response = client.put(f"/api/layouts/{layout['id']}/placements",
+                          json={'placements': layout['placements'], 'version': layout['version']})
+    assert response.status_code == 409
+
+
+def test_moves_are_coalesced_into_one_write(client, layout):
+    layout_sync.hub.interval = 60  # only reads flush during the test
+    first, second = placement_ids(layout)
+    version, writes = layout['version'], layout_sync.hub.writes
+    for step in range(10):
+        response = patch(client, layout, version, [move(first, 20.0 + step), move(second, 90.0 + step)], 'drag')
+        version = response.get_json()['version']
+    assert layout_sync.hub.writes == writes
+
+    stored = client.get(f"/api/layouts/{layout['id']}").get_json()
+    assert layout_sync.hub.writes == writes + 1
+    assert stored['version'] == version
+    assert [placement['x'] for placement in stored['placements']] == [29.0, 99.0]
+
+
+def test_write_over_another_process_change_conflicts(app, client, layout):
+    first, _ = placement_ids(layout)
+    assert patch(client, layout, layout['version'], [move(first, 30.0)]).status_code == 200
+    # Another process rewrites the layout behind this process's hub
+    with app.app_context():
+        db.session.execute(update(Layout).where(Layout.id == layout['id']).values(version=Layout.version + 5))
+        db.session.execute(update(LayoutPlacement).where(LayoutPlacement.id == first).values(x=1.0))
+        db.session.commit()
+
+    response = patch(client, layout, layout['version'] + 1, [{'op': 'rotate', 'id': first, 'rotation': 90}])
+    assert response.status_code == 409
+    assert response.get_json()['version'] == layout['version'] + 5
+    # The hub reloads, so the next delta against the stored version applies
+    response = patch(client, layout, layout['version'] + 5, [{'op': 'rotate', 'id': first, 'rotation': 90}])
+    assert response.status_code == 200
+
+
+def test_event_stream_sends_changes_and_resumes_after_a_version(client, layout):
+    first, second = placement_ids(layout)
+    version = layout['version']
+    response = client.get(f"/api/layouts/{layout['id']}/events?client=viewer")
+    assert response.mimetype == 'text/event-stream'
+    try:
+        patch(client, layout, version, [move(first, 30.0)], 'editor')
+        patch(client, layout, version + 1, [move(second, 90.0)], 'viewer')  # its own change is left out
+        patch(client, layout, version + 2, [{'op': 'remove', 'id': first}], 'editor')
+        events = read_events(response.response, 2)
+    finally:
+        response.close()
+    assert [event['event'] for event in events] == ['change', 'change']
+    assert [event['id'] for event in events] == [version + 1, version + 3]
+    assert events[0]['data']['ops'] == [move(first, 30.0)]
+    assert events[1]['data']['ops'] == [{'op': 'remove', 'id': first}]
+
+    # Reconnecting with Last-Event-ID replays only what came after it
+    response = client.get(f"/api/layouts/{layout['id']}/events", headers={'Last-Event-ID': str(version + 1)})
+    try:
+        events = read_events(response.response, 2)
+    finally:
+        response.close()
+    assert [event['id'] for event in events] == [version + 2, version + 3]
+
+
+def test_whole_layout_rewrite_is_a_reset_event(client, layout):
+    response = client.get(f"/api/layouts/{layout['id']}/events")
+    try:
+        client.post(f"/api/layouts/{layout['id']}/pack", json={})
+        events = read_events(response.response, 1)
+    finally:
+        response.close()
+    assert events[0]['event'] == 'reset'
+    assert events[0]['data']['reset'] is True
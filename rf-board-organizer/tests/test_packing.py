@@ -0,0 +1,88 @@
+import itertools
+
+import pytest
+from src.services import packing
+
+
+def footprint(size, result):
+    width, height = size
+    x, y, rotation = result
+    return (x, y, x + height, y + width) if rotation % 180 == 90 else (x, y, x + width, y + height)
+
+
+def gap(a, b):
+    return max(b[0] - a[2], a[0] - b[2], b[1] - a[3], a[1] - b[3])
+
+
+@pytest.mark.parametrize('margin', [0.0, 2.0])
+def test_packed_rectangles_stay_on_the_plate_and_apart(margin):
+    sizes = [(40, 25), (60, 30), (25, 25), (80, 20), (30, 50), (45, 35), (20, 10), (55, 40)]
+    results = packing.pack_rectangles(sizes, 200, 150, margin)
+    assert all(result is not None for result in results)
+    boxes = [footprint(size, result) for size, result in zip(sizes, results)]
+    for x0, y0, x1, y1 in boxes:
+        assert x0 >= margin - 1e-9 and y0 >= margin - 1e-9
+        assert x1 <= 200 - margin + 1e-9 and y1 <= 150 - margin + 1e-9
+    for a, b in itertools.combinations(boxes, 2):
+        assert gap(a, b) >= margin - 1e-9
+
+
+def test_rectangles_that_do_not_fit_are_none():
+    # Two fit side by side turned; a third does not, nor does anything longer than the plate
+    results = packing.pack_rectangles([(150, 100)] * 3 + [(300, 10)], 200, 150, 0.0, rotations=[0, 90])
+    assert [result is None for result in results] == [False, False, True, True]
+
+
+def test_only_allowed_rotations_are_used():
+    # A tall board only fits a wide plate turned; without 90/270 it is left out
+    assert packing.pack_rectangles([(20, 100)], 150, 50, rotations=[0, 90])[0][2] == 90
+    assert packing.pack_rectangles([(20, 100)], 150, 50, rotations=[0, 180]) == [None]
+    assert packing.pack_rectangles([(20, 100)], 150, 50, rotations=[270])[0][2] == 270
+
+
+def test_current_rotation_is_kept_when_allowed():
+    results = packing.pack_rectangles([(40, 20)], 200, 150, rotations=[0, 180], current_rotations=[180])
+    assert results[0][2] == 180
+
+
+def test_pack_route_moves_placements(client, add_board, add_layout):
+    first, second = add_board(0), add_board(1)
+    layout = add_layout([{'board_id': first, 'x': 0, 'y': 0, 'rotation': 0},
+                         {'board_id': second, 'x': 0, 'y': 0, 'rotation': 0}])
+    response = client.post(f"/api/layouts/{layout['id']}/pack", json={'margin': 5})
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result['target'] == 'placements'
+    assert result['unplaced'] == []
+    assert {placement['id'] for placement in result['placements']} == {p['id'] for p in layout['placements']}
+
+    stored = client.get(f"/api/layouts/{layout['id']}").get_json()
+    assert stored['version'] > layout['version']
+    issues = client.get(f"/api/layouts/{layout['id']}/validate?clearance=5").get_json()['issues']
+    assert [issue for issue in issues if issue['type'] in ('overlap', 'clearance', 'out_of_plate')] == []
+
+
+def test_pack_route_without_placements_moves_boards(client, add_board, add_layout):
+    board_ids = [add_board(i) for i in range(3)]
+    layout = add_layout(base_width=120.0, base_height=60.0)
+    result = client.post(f"/api/layouts/{layout['id']}/pack", json={'board_ids': board_ids[:2]}).get_json()
+    assert result['target'] == 'boards'
+    assert sorted(placement['id'] for placement in result['placements']) == board_ids[:2]
+    boards = {board['id']: board for board in client.get('/api/boards?fields=id,position_x').get_json()}
+    assert boards[board_ids[0]]['position_x'] == next(
+        placement['position_x'] for placement in result['placements'] if placement['id'] == board_ids[0])
+    assert 0 < result['utilisation'] <= 1
+
+
+@pytest.mark.parametrize('body', [
+    {'margin': 'x'},
+    {'margin': -1},
+    {'margin': None},
+    {'rotations': [45]},
+    {'rotations': []},
+    {'board_ids': ['1']},
+    {'board_ids': 1},
+])
+def test_pack_route_rejects_bad_parameters(client, add_layout, body):
+    layout = add_layout()
+    assert client.post(f"/api/layouts/{layout['id']}/pack", json=body).status_code == 400
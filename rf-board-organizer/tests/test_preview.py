@@ -0,0 +1,75 @@
+import pytest
+
+
+def preview(client, layout, image_format='svg', headers=None, **query):
+    query = ''.join(f'&{key}={value}' for key, value in query.items())
+    return client.get(f"/api/layouts/{layout['id']}/preview.{image_format}?width=200{query}", headers=headers or {})
+
+
+@pytest.fixture
+def layout(add_board, add_layout):
+    board_id = add_board()
+    return add_layout([{'board_id': board_id, 'x': 10, 'y': 10, 'rotation': 0}])
+
+
+@pytest.mark.parametrize('image_format, mimetype', [('svg', 'image/svg+xml'), ('png', 'image/png')])
+def test_preview_is_cached_and_revalidated(client, layout, image_format, mimetype):
+    first = preview(client, layout, image_format)
+    assert first.status_code == 200
+    assert first.mimetype == mimetype
+    again = preview(client, layout, image_format)
+    assert again.headers['ETag'] == first.headers['ETag']
+    assert again.data == first.data
+
+    revalidated = preview(client, layout, image_format, {'If-None-Match': first.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+
+
+def test_placement_changes_invalidate_the_preview(client, layout):
+    before = preview(client, layout)
+    placement_id = layout['placements'][0]['id']
+    response = client.patch(f"/api/layouts/{layout['id']}/placements", json={
+        'version': layout['version'], 'ops': [{'op': 'move', 'id': placement_id, 'x': 100, 'y': 60}]})
+    assert response.status_code == 200
+
+    after = preview(client, layout, headers={'If-None-Match': before.headers['ETag']})
+    assert after.status_code == 200
+    assert after.headers['ETag'] != before.headers['ETag']
+    assert after.data != before.data
+
+
+def test_versioned_url_is_immutable(client, layout):
+    assert preview(client, layout).headers['Cache-Control'] == 'no-cache'
+    response = preview(client, layout, v=layout['version'])
+    assert 'immutable' in response.headers['Cache-Control']
+    # An old version's URL is only revalidated
+    assert preview(client, layout, v=layout['version'] - 1).headers['Cache-Control'] == 'no-cache'
+
+
+def test_layout_without_placements_follows_the_boards(client, add_board, add_layout):
+    add_board(0)
+    empty = add_layout()
+    before = preview(client, empty, v=empty['version'])
+    assert before.headers['Cache-Control'] == 'no-cache'
+
+    # Packing another layout without placements moves the Board rows this one previews
+    other = add_layout(base_width=100.0, base_height=80.0)
+    assert client.post(f"/api/layouts/{other['id']}/pack", json={'margin': 20}).status_code == 200
+    moved = preview(client, empty, headers={'If-None-Match': before.headers['ETag']})
+    assert moved.status_code == 200
+    assert moved.headers['ETag'] != before.headers['ETag']
+    assert moved.data != before.data
+
+    add_board(1)
+    added = preview(client, empty, headers={'If-None-Match': moved.headers['ETag']})
+    assert added.status_code == 200
+    assert added.headers['ETag'] != moved.headers['ETag']
+
+
+def test_preview_rejects_bad_requests(client, layout, add_layout):
+    assert preview(client, layout, 'gif').status_code == 404
+    assert client.get(f"/api/layouts/{layout['id']}/preview.svg?width=5").status_code == 400
+    flat = add_layout(base_width=0.0)
+    assert preview(client, flat).status_code == 400
+    assert client.get('/api/layouts/999/preview.svg').status_code == 404
@@ -0,0 +1,94 @@
+import math
+
+import pytest
+from src.services import toolpath
+
+
+def board(x, y, width=50.0, height=30.0):
+    return {'x': x, 'y': y, 'width': width, 'height': height,
+            'holes': [{'x': x + 3, 'y': y + 3, 'diameter': 3.0},
+                      {'x': x + width - 3, 'y': y + height - 3, 'diameter': 3.0}]}
+
+
+def levels(cuts):
+    return [toolpath.LEVELS[cut.layer] for cut in cuts]
+
+
+def test_merge_fuses_collinear_lines_and_drops_duplicate_circles():
+    cuts = [toolpath._line('BOARD_OUTLINE', (0, 0), (10, 0)),
+            toolpath._line('BOARD_OUTLINE', (20, 0), (10, 0)),  # end-to-end, drawn backwards
+            toolpath._line('BASE_OUTLINE', (5, 0), (15, 0)),  # overlapping, on a later layer
+            toolpath._line('BOARD_OUTLINE', (0, 5), (10, 5)),
+            toolpath._circle('MOUNTING_HOLES', 3, 3, 1.5),
+            toolpath._circle('MOUNTING_HOLES', 3, 3, 1.5)]
+    merged = toolpath.merge_segments(cuts)
+    lines = sorted((cut for cut in merged if cut.kind == 'line'), key=lambda cut: cut.start[1])
+    assert [(cut.layer, cut.start, cut.end) for cut in lines] == [
+        ('BASE_OUTLINE', (0.0, 0.0), (20.0, 0.0)),
+        ('BOARD_OUTLINE', (0.0, 5.0), (10.0, 5.0)),
+    ]
+    assert sum(cut.kind == 'circle' for cut in merged) == 1
+
+
+def test_abutting_boards_share_one_cut_edge():
+    cuts = toolpath.layout_cuts([board(10, 10), board(60, 10)], 200, 150)
+    optimised = toolpath.optimise(cuts)
+    # The shared edge is cut once and the boards' top and bottom edges each become one line:
+    # 4 plate lines, 5 board lines and 4 holes
+    assert len(cuts) == 16
+    assert len(optimised) == 13
+    assert toolpath.cut_length(optimised) == pytest.approx(toolpath.cut_length(cuts) - 30.0)
+
+
+@pytest.mark.parametrize('boards', [
+    [board(10, 10), board(60, 10)],
+    [board(10, 10), board(70, 10)],
+    [board(x, y, 20, 15) for x in range(5, 180, 25) for y in range(5, 130, 20)],
+])
+def test_optimise_cuts_holes_then_board_outlines_then_the_plate(boards):
+    cuts = toolpath.layout_cuts(boards, 200, 150)
+    optimised = toolpath.optimise(cuts)
+    assert levels(optimised) == sorted(levels(optimised))
+    assert levels(optimised)[-1] == toolpath.LEVELS['BASE_OUTLINE']
+    assert toolpath.cut_length(optimised) <= toolpath.cut_length(cuts) + 1e-6
+
+
+def test_optimise_never_lengthens_a_level_beyond_its_merged_order():
+    cuts = toolpath.layout_cuts([board(x, y, 20, 15) for x in range(5, 180, 25) for y in range(5, 130, 20)],
+                                200, 150)
+    merged = toolpath.merge_segments(cuts)
+    in_level_order = sorted(merged, key=lambda cut: toolpath.LEVELS[cut.layer])
+    optimised = toolpath.optimise(cuts)
+    assert toolpath.travel_length(optimised) <= toolpath.travel_length(in_level_order)
+    assert toolpath.travel_length(optimised) < toolpath.travel_length(cuts)
+
+
+def test_nearest_neighbour_may_cut_lines_backwards():
+    cuts = [toolpath._line('BOARD_OUTLINE', (10, 0), (0, 0)), toolpath._line('BOARD_OUTLINE', (20, 0), (30, 0))]
+    order = toolpath.nearest_neighbour(cuts, (0.0, 0.0))
+    assert [(cut.start, cut.end) for cut in order] == [((0, 0), (10, 0)), ((20, 0), (30, 0))]
+    assert toolpath.travel_length(order) == pytest.approx(10.0)
+
+
+def test_toolpath_report_route(client, add_board):
+    board_id = add_board()
+    response = client.post('/api/toolpath-report', json={
+        'base_width': 200, 'base_height': 150,
+        'boards': [{'board_id': board_id, 'x': 10, 'y': 10}, {'board_id': board_id, 'x': 50, 'y': 10}]})
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report['entities_after'] < report['entities_before']
+    assert report['cut_length_after'] < report['cut_length_before']
+    assert math.isfinite(report['travel_length_after'])
+
+
+@pytest.mark.parametrize('body', [
+    {'boards': [{'board_id': [1]}]},
+    {'boards': [{'board_id': 99}]},
+    {'boards': [{'x': 1}]},
+    {'boards': 'all'},
+    [1],
+])
+def test_toolpath_report_rejects_bad_boards(client, add_board, body):
+    add_board()
+    assert client.post('/api/toolpath-report', json=body).status_code == 400
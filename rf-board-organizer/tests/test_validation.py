@@ -0,0 +1,100 @@
+import itertools
+import random
+
+import pytest
+from src.services import validation
+
+
+def holes(box, diameter=3.0, inset=3.0):
+    x0, y0, x1, y1 = box
+    return [(x0 + inset, y0 + inset, diameter), (x1 - inset, y1 - inset, diameter)]
+
+
+def validator(boxes, width=200.0, height=150.0, **kwargs):
+    result = validation.LayoutValidator(width, height, **kwargs)
+    for board_id, box in enumerate(boxes, 1):
+        result.add(board_id, box, holes(box))
+    return result
+
+
+def kinds(issues):
+    return sorted((issue['type'], tuple(issue['boards'])) for issue in issues)
+
+
+def test_overlap_clearance_and_plate_bounds():
+    issues = validator([
+        (10, 10, 50, 40),
+        (40, 30, 80, 60),  # overlaps board 1
+        (81, 10, 121, 40),  # 1 mm from board 2, under the 2 mm clearance
+        (180, 120, 220, 150),  # off the plate's right edge
+    ]).validate()
+    assert kinds(issues) == [('clearance', (2, 3)), ('hole_out_of_plate', (4,)), ('out_of_plate', (4,)),
+                             ('overlap', (1, 2))]
+    clearance = next(issue for issue in issues if issue['type'] == 'clearance')
+    assert clearance['distance'] == 1.0
+
+
+def test_standoff_under_a_neighbour():
+    # The boards are 2.5 mm apart, so board 1's hole 3 mm in from its edge is 5.5 mm from board 2;
+    # its standoff (1.5 x the 1.5 mm radius) plus 4 mm hole clearance needs 6.25 mm
+    issues = validator([(10, 10, 50, 40), (52.5, 10, 92.5, 40)], hole_clearance=4.0).validate()
+    assert ('hole_clearance', (1, 2)) in kinds(issues)
+    assert not validator([(10, 10, 50, 40), (60, 10, 100, 40)]).validate()
+
+
+def test_spatial_index_finds_what_comparing_every_pair_finds():
+    rng = random.Random(5)
+    boxes = []
+    for _ in range(300):
+        x, y = rng.uniform(-5, 1000), rng.uniform(-5, 700)
+        boxes.append((x, y, x + rng.uniform(10, 60), y + rng.uniform(10, 40)))
+    checked = validator(boxes, 1000.0, 700.0)
+    expected = []
+    for board_id, (box, board_holes) in checked.boards.items():
+        expected.extend(checked._plate_issues(board_id, box, board_holes))
+    for a, b in itertools.combinations(checked.boards, 2):
+        expected.extend(checked._pair_issues(a, b))
+    assert expected
+    assert kinds(checked.validate()) == kinds(expected)
+
+
+def test_check_after_a_move_uses_the_new_position():
+    checked = validator([(10, 10, 50, 40), (100, 10, 140, 40)])
+    assert checked.check(2) == []
+    checked.move(2, (45, 10, 85, 40), holes((45, 10, 85, 40)))
+    assert kinds(checked.check(2)) == [('overlap', (2, 1))]
+    checked.remove(1)
+    assert checked.check(2) == []
+
+
+def test_validate_route(client, add_board, add_layout):
+    board_id = add_board()
+    layout = add_layout([{'board_id': board_id, 'x': 10, 'y': 10, 'rotation': 0},
+                         {'board_id': board_id, 'x': 30, 'y': 20, 'rotation': 90},
+                         {'board_id': board_id, 'x': 120, 'y': 80, 'rotation': 0}])
+    first, second, third = (placement['id'] for placement in layout['placements'])
+    result = client.get(f"/api/layouts/{layout['id']}/validate").get_json()
+    assert result['valid'] is False
+    assert ('overlap', (first, second)) in kinds(result['issues'])
+    assert all(third not in issue['boards'] for issue in result['issues'])
+
+    moved = client.get(f"/api/layouts/{layout['id']}/validate?moved={third}").get_json()
+    assert moved['valid'] is True
+    assert client.get(f"/api/layouts/{layout['id']}/validate?moved=999").status_code == 404
+
+
+def test_validate_route_with_board_ids(client, add_board, add_layout):
+    board_ids = [add_board(i) for i in range(2)]
+    layout = add_layout()
+    result = client.get(f"/api/layouts/{layout['id']}/validate?board_ids={board_ids[0]}").get_json()
+    # Boards are positioned at their own (default) position
+    assert result['layout_id'] == layout['id']
+    assert all(issue['boards'] == [board_ids[0]] for issue in result['issues'])
+
+
+@pytest.mark.parametrize('board_ids', ['abc', '1,,2', '1;2'])
+def test_validate_route_rejects_bad_board_ids(client, add_layout, board_ids):
+    layout = add_layout()
+    response = client.get(f"/api/layouts/{layout['id']}/validate?board_ids={board_ids}")
+    assert response.status_code == 400
+    assert 'board_ids' in response.get_json()['error']